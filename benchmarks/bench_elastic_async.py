@@ -0,0 +1,162 @@
+"""对比同步 ElasticsearchStore 与 AsyncElasticsearchStore 的并发检索吞吐量。
+
+启动一个本地的 Elasticsearch 替身（aiohttp 实现，支持 info、_search、_msearch、_bulk，
+每个请求固定延迟），分别用两种向量库并发执行相同数量的 asimilarity_search：
+
+    - sync: langchain_elasticsearch.ElasticsearchStore，异步调用在线程池中执行；
+    - async: shared.elastic.AsyncElasticsearchStore，通过共享的 AsyncElasticsearch 发送请求。
+
+需要安装 langchain-elasticsearch 与 aiohttp。
+
+用法:
+    python benchmarks/bench_elastic_async.py [--requests 256] [--latency-ms 20] [--connections 32]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+from aiohttp import web
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+)
+
+from langchain_core.embeddings import DeterministicFakeEmbedding  # noqa: E402
+from langchain_elasticsearch import ElasticsearchStore  # noqa: E402
+
+from shared.elastic import (  # noqa: E402
+    AsyncElasticsearchStore,
+    aclose_clients,
+    connection_params,
+    get_sync_client,
+)
+
+_HEADERS = {"X-Elastic-Product": "Elasticsearch"}
+
+
+def make_stand_in(latency: float) -> web.Application:
+    """返回模拟 Elasticsearch 接口的 aiohttp 应用，每个检索请求延迟 latency 秒。"""
+
+    def hits(k: int) -> dict:
+        return {
+            "total": {"value": k, "relation": "eq"},
+            "hits": [
+                {
+                    "_index": "bench",
+                    "_id": str(i),
+                    "_score": 1.0 / (i + 1),
+                    "_source": {"text": f"文档 {i}", "metadata": {"i": i}},
+                }
+                for i in range(k)
+            ],
+        }
+
+    async def info(request: web.Request) -> web.Response:
+        return web.json_response(
+            {"version": {"number": "8.15.0"}, "tagline": "You Know, for Search"},
+            headers=_HEADERS,
+        )
+
+    async def search(request: web.Request) -> web.Response:
+        body = await request.json()
+        await asyncio.sleep(latency)
+        return web.json_response({"hits": hits(body.get("size", 4))}, headers=_HEADERS)
+
+    async def msearch(request: web.Request) -> web.Response:
+        lines = [json.loads(line) for line in (await request.text()).splitlines() if line]
+        await asyncio.sleep(latency)
+        return web.json_response(
+            {"responses": [{"hits": hits(body.get("size", 4))} for body in lines[1::2]]},
+            headers=_HEADERS,
+        )
+
+    async def bulk(request: web.Request) -> web.Response:
+        lines = [json.loads(line) for line in (await request.text()).splitlines() if line]
+        await asyncio.sleep(latency)
+        items = [{"index": {"_id": action["index"].get("_id"), "status": 201}} for action in lines[0::2]]
+        return web.json_response({"errors": False, "items": items}, headers=_HEADERS)
+
+    async def ok(request: web.Request) -> web.Response:
+        return web.json_response({}, headers=_HEADERS)
+
+    app = web.Application()
+    app.router.add_get("/", info)
+    app.router.add_route("HEAD", "/{index}", ok)
+    app.router.add_post("/{index}/_search", search)
+    app.router.add_post("/_msearch", msearch)
+    app.router.add_route("*", "/_bulk", bulk)
+    app.router.add_route("*", "/{index}/_refresh", ok)
+    return app
+
+
+def start_stand_in(latency: float) -> int:
+    """在独立线程的事件循环中启动替身服务，返回监听端口。"""
+    started = threading.Event()
+    port: list[int] = []
+
+    async def serve() -> None:
+        runner = web.AppRunner(make_stand_in(latency))
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port.append(site._server.sockets[0].getsockname()[1])  # type: ignore[union-attr]
+        started.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=asyncio.run, args=(serve(),), daemon=True).start()
+    started.wait()
+    return port[0]
+
+
+async def run(port: int, requests: int, connections: int) -> list[dict]:
+    connection = connection_params(
+        f"http://127.0.0.1:{port}", params={"connections_per_node": connections}
+    )
+    embedding = DeterministicFakeEmbedding(size=8)
+    stores = {
+        "sync": ElasticsearchStore(
+            es_connection=get_sync_client(connection), index_name="bench", embedding=embedding
+        ),
+        "async": AsyncElasticsearchStore(
+            connection=connection, index_name="bench", embedding=embedding
+        ),
+    }
+
+    results = []
+    for name, store in stores.items():
+        await store.asimilarity_search("预热", k=4)
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(store.asimilarity_search(f"查询 {i}", k=4) for i in range(requests))
+        )
+        elapsed = time.perf_counter() - started
+        results.append(
+            {
+                "store": name,
+                "requests": requests,
+                "elapsed_ms": round(elapsed * 1000, 1),
+                "requests_per_sec": round(requests / elapsed, 1),
+            }
+        )
+    await aclose_clients()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=256)
+    parser.add_argument("--latency-ms", type=float, default=20)
+    parser.add_argument("--connections", type=int, default=32)
+    args = parser.parse_args()
+    port = start_stand_in(args.latency_ms / 1000)
+    for result in asyncio.run(run(port, args.requests, args.connections)):
+        print(result)  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""测量 shared.utils 的导入耗时。
+
+每次测量都在全新的子进程中进行，避免模块缓存影响结果；同时报告导入后
+langchain_community.document_loaders 是否已被加载，用于验证加载器是否为按需导入。
+
+用法:
+    python benchmarks/bench_import_time.py [--repeat 10]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+_SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+
+_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+import shared.utils
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "elapsed": elapsed,
+    "loaders_imported": "langchain_community.document_loaders" in sys.modules,
+    "modules": len(sys.modules),
+}))
+"""
+
+
+def measure(repeat: int) -> dict:
+    """在子进程中重复导入 shared.utils 并汇总耗时。"""
+    env = {**os.environ, "PYTHONPATH": _SRC_DIR, "PYTHONWARNINGS": "ignore"}
+    runs = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", _SNIPPET],
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        runs.append(json.loads(output.strip().splitlines()[-1]))
+    elapsed = [run["elapsed"] for run in runs]
+    return {
+        "min_ms": round(min(elapsed) * 1000, 1),
+        "median_ms": round(statistics.median(elapsed) * 1000, 1),
+        "loaders_imported": runs[-1]["loaders_imported"],
+        "modules": runs[-1]["modules"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps(measure(args.repeat), ensure_ascii=False))  # noqa: T201
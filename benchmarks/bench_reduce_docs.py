@@ -0,0 +1,65 @@
+"""测量 shared.state.reduce_docs 在大量小批次归约下的耗时。
+
+模拟研究子图的 Send 扇出：每个检索任务返回少量文档（其中部分与已有文档重复），
+LangGraph 依次调用 reducer 把它们合并进状态。
+
+去重只与新文档数量有关，但每次归约仍会浅拷贝已有列表（O(n)），
+因此 per_update_us 会随文档数增长；copy_us 单独给出最终规模下一次拷贝的耗时。
+
+用法:
+    python benchmarks/bench_reduce_docs.py [--updates 2000] [--batch 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+)
+
+from langchain_core.documents import Document  # noqa: E402
+
+from shared.state import reduce_docs  # noqa: E402
+
+
+def measure(updates: int, batch: int) -> dict:
+    """依次执行 updates 次归约，每次 batch 个文档，约五分之一与已有文档重复。"""
+    batches = [
+        [
+            Document(page_content=f"文档 {(i * batch + j) * 4 // 5}", metadata={})
+            for j in range(batch)
+        ]
+        for i in range(updates)
+    ]
+    docs: list[Document] = []
+    start = time.perf_counter()
+    for new in batches:
+        docs = reduce_docs(docs, new)
+    elapsed = time.perf_counter() - start
+    copies = 100
+    start = time.perf_counter()
+    for _ in range(copies):
+        docs.extended([])
+    copy_elapsed = (time.perf_counter() - start) / copies
+    return {
+        "updates": updates,
+        "docs": len(docs),
+        "elapsed_ms": round(elapsed * 1000, 1),
+        "per_update_us": round(elapsed / updates * 1e6, 1),
+        "copy_us": round(copy_elapsed * 1e6, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--updates", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=5)
+    args = parser.parse_args()
+    for updates in (args.updates // 4, args.updates // 2, args.updates):
+        print(measure(updates, args.batch))  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""通讯录请求之间共享的缓存。
+
+- pandas dataframe agent 按 (模型, 数据版本) 缓存，不再每次请求重新拼装提示词、绑定工具；
+- 检索结果按规范化后的问题文本缓存，重复的查询（如“张三的电话”）无需任何 LLM 调用。
+
+两类缓存都以通讯录的内容版本为作用域：数据版本变化时，该文件对应的旧缓存全部失效。
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from shared.utils import normalize_question  # noqa: F401
+
+
+class VersionedLRUCache:
+    """按数据文件版本隔离的 LRU 缓存，线程安全。"""
+
+    def __init__(self, max_size: int) -> None:
+        """初始化缓存。
+
+        Args:
+            max_size (int): 最多缓存的条目数，小于等于 0 时不缓存。
+        """
+        self.max_size = max_size
+        self._items: OrderedDict[tuple[str, Hashable], Any] = OrderedDict()
+        self._versions: dict[str, str] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_version(self, path: str, version: str) -> None:
+        """数据版本变化时，丢弃该文件的所有缓存条目。"""
+        if self._versions.get(path) == version:
+            return
+        self._versions[path] = version
+        for key in [key for key in self._items if key[0] == path]:
+            del self._items[key]
+
+    def get(self, path: str, version: str, key: Hashable) -> Optional[Any]:
+        """读取缓存，未命中时返回 None。"""
+        with self._lock:
+            self._check_version(path, version)
+            value = self._items.get((path, key))
+            if value is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end((path, key))
+            self.hits += 1
+            return value
+
+    def put(self, path: str, version: str, key: Hashable, value: Any) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目。"""
+        if self.max_size <= 0 or value is None:
+            return
+        with self._lock:
+            self._check_version(path, version)
+            self._items[(path, key)] = value
+            self._items.move_to_end((path, key))
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+agent_cache = VersionedLRUCache(max_size=8)
+"""pandas dataframe agent 缓存，键为模型名"""
+
+answer_cache = VersionedLRUCache(max_size=256)
+"""检索结果缓存，键为 (检索方式, 模型名, 规范化问题)"""
@@ -6,7 +6,7 @@ from dataclasses import dataclass, field
 
 from shared.configuration import BaseConfiguration
 
-from typing import Annotated
+from typing import Annotated, Literal, Optional
 
 from address_book_agent import prompts
 
@@ -25,6 +25,56 @@ class AddressBookAgentConfiguration(BaseConfiguration):
         },
     )
 
+    address_book_path: str = field(
+        default="/mnt/sdb/data/audio/文档样本/oa/通讯录样本.xlsx",
+        metadata={"description": "通讯录Excel文件的路径"},
+    )
+
+    address_book_cache_dir: Optional[str] = field(
+        default=".cache/address_book",
+        metadata={
+            "description": "通讯录列式(Parquet)缓存目录，设为None时只使用进程内缓存"
+        },
+    )
+
+    address_book_categorical_columns: list[str] = field(
+        default_factory=lambda: ["部门", "职务", "职位", "岗位"],
+        metadata={
+            "description": "通讯录中使用category类型存储的列（如部门、职务），不存在的列会被忽略"
+        },
+    )
+
+    address_book_backend: Literal["index", "duckdb", "pandas"] = field(
+        default="index",
+        metadata={
+            "description": "通讯录检索方式：index为LLM抽取结构化条件后由预建索引确定性检索，duckdb为LLM生成一条只读SQL由DuckDB执行（两者失败时都回退pandas agent），pandas为直接使用pandas agent"
+        },
+    )
+
+    use_answer_cache: bool = field(
+        default=True,
+        metadata={
+            "description": "是否按规范化后的问题缓存检索结果，通讯录文件变化时缓存自动失效"
+        },
+    )
+
+    enable_fast_path: bool = field(
+        default=True,
+        metadata={
+            "description": "检索结果无歧义时跳过think直接回答；单字段查询使用模板回答，跳过respond的LLM调用"
+        },
+    )
+
+    lookup_extract_prompt: str = field(
+        default=prompts.LOOKUP_EXTRACT_PROMPT,
+        metadata={"description": "将问题抽取为结构化通讯录查询条件的系统提示词"},
+    )
+
+    sql_system_prompt: str = field(
+        default=prompts.SQL_SYSTEM_PROMPT,
+        metadata={"description": "生成通讯录DuckDB查询的系统提示词，{schema}处填入表结构与样例"},
+    )
+
     query_system_prompt: str = field(
         default=prompts.QUERY_SYSTEM_PROMPT,
         metadata={
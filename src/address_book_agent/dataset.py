@@ -0,0 +1,176 @@
+"""通讯录数据集管理。
+
+通讯录 Excel 只在首次使用或文件变化时解析一次，解析结果转换为紧凑的列式格式
+（部门、职务等列使用 category 类型）并缓存为 Parquet 文件，进程内则共享同一个 DataFrame。
+
+失效规则：
+    - 每次获取时检查源文件的 mtime 与大小，未变化则直接返回内存中的数据；
+    - mtime 或大小变化时计算内容哈希，哈希未变只更新元数据，哈希变化才重新解析 Excel。
+
+Parquet 缓存依赖 pyarrow；未安装时仅使用进程内缓存。
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class AddressBookSnapshot:
+    """某一版本的通讯录数据。
+
+    df 在多个请求之间共享，调用方应将其视为只读。
+    """
+
+    df: pd.DataFrame
+    """通讯录数据"""
+
+    version: str
+    """源文件内容的 sha256，可用于作为下游缓存的版本号"""
+
+    path: str
+    """源文件路径"""
+
+
+@dataclass
+class _CacheEntry:
+    snapshot: AddressBookSnapshot
+    mtime_ns: int
+    size: int
+
+
+_CACHE: dict[str, _CacheEntry] = {}
+_LOCKS: dict[str, threading.Lock] = {}
+_LOCKS_GUARD = threading.Lock()
+
+
+def _file_hash(path: str) -> str:
+    """计算文件内容的 sha256。"""
+    sha256 = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _lock_for(path: str) -> threading.Lock:
+    with _LOCKS_GUARD:
+        return _LOCKS.setdefault(path, threading.Lock())
+
+
+def _to_columnar(
+    df: pd.DataFrame, categorical_columns: Sequence[str]
+) -> pd.DataFrame:
+    """把重复值较多的列转换为 category 类型，其他文本列保持字符串。"""
+    for column in categorical_columns:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def _cache_paths(path: str, cache_dir: str) -> tuple[str, str]:
+    """返回某个源文件对应的 Parquet 缓存路径和元数据路径。"""
+    digest = hashlib.md5(os.path.abspath(path).encode()).hexdigest()[:16]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    base = os.path.join(cache_dir, f"{stem}.{digest}")
+    return f"{base}.parquet", f"{base}.json"
+
+
+def _read_cached(parquet_path: str, meta_path: str, version: str) -> Optional[pd.DataFrame]:
+    """读取与指定版本一致的 Parquet 缓存，不存在或版本不一致时返回 None。"""
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != version:
+            return None
+        return pd.read_parquet(parquet_path)
+    except (OSError, ValueError, ImportError):
+        return None
+
+
+def _write_cached(
+    df: pd.DataFrame, parquet_path: str, meta_path: str, version: str
+) -> None:
+    """写入 Parquet 缓存；缺少 pyarrow 或写入失败时只记录警告。"""
+    try:
+        os.makedirs(os.path.dirname(parquet_path) or ".", exist_ok=True)
+        df.to_parquet(parquet_path, index=False)
+        with open(meta_path, "w", encoding="utf-8") as f:
+            json.dump({"version": version}, f)
+    except (OSError, ImportError, ValueError) as e:
+        logger.warning("通讯录列式缓存写入失败: %s", e)
+
+
+def load_address_book(
+    path: str,
+    *,
+    cache_dir: Optional[str] = None,
+    categorical_columns: Sequence[str] = (),
+) -> AddressBookSnapshot:
+    """获取通讯录数据，必要时才重新解析 Excel。
+
+    Args:
+        path (str): 通讯录 Excel 文件路径。
+        cache_dir (Optional[str]): Parquet 缓存目录，为 None 时只使用进程内缓存。
+        categorical_columns (Sequence[str]): 需要转换为 category 类型的列名。
+
+    Returns:
+        AddressBookSnapshot: 当前版本的通讯录数据。
+    """
+    stat = os.stat(path)
+    entry = _CACHE.get(path)
+    if entry and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+        return entry.snapshot
+
+    with _lock_for(path):
+        # 其他线程可能已经完成了加载
+        entry = _CACHE.get(path)
+        if entry and (entry.mtime_ns, entry.size) == (stat.st_mtime_ns, stat.st_size):
+            return entry.snapshot
+
+        version = _file_hash(path)
+        if entry and entry.snapshot.version == version:
+            # 只是mtime变化，内容未变
+            entry.mtime_ns, entry.size = stat.st_mtime_ns, stat.st_size
+            return entry.snapshot
+
+        df = None
+        if cache_dir:
+            parquet_path, meta_path = _cache_paths(path, cache_dir)
+            df = _read_cached(parquet_path, meta_path, version)
+        if df is None:
+            df = _to_columnar(pd.read_excel(path), categorical_columns)
+            if cache_dir:
+                _write_cached(df, parquet_path, meta_path, version)
+
+        snapshot = AddressBookSnapshot(df=df, version=version, path=path)
+        _CACHE[path] = _CacheEntry(
+            snapshot=snapshot, mtime_ns=stat.st_mtime_ns, size=stat.st_size
+        )
+        return snapshot
+
+
+async def aload_address_book(
+    path: str,
+    *,
+    cache_dir: Optional[str] = None,
+    categorical_columns: Sequence[str] = (),
+) -> AddressBookSnapshot:
+    """load_address_book 的异步版本，在线程池中执行以免阻塞事件循环。"""
+    return await asyncio.to_thread(
+        load_address_book,
+        path,
+        cache_dir=cache_dir,
+        categorical_columns=categorical_columns,
+    )
@@ -1,8 +1,9 @@
 from datetime import datetime, timezone
 from turtle import update
-from typing import cast, Literal
-import pandas as pd
-from langchain_core.messages import BaseMessage
+from typing import Any, cast, Literal, Optional
+import asyncio
+import logging
+from langchain_core.messages import AIMessage, BaseMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnableConfig
 from langchain_experimental.agents import create_pandas_dataframe_agent
@@ -10,9 +11,15 @@ from langgraph.graph import StateGraph, START, END
 from langgraph.types import Command
 from shared.utils import load_chat_model, get_message_text
 from address_book_agent.configuration import AddressBookAgentConfiguration
-from address_book_agent.state import State, ThinkContent, SearchQuery
+from address_book_agent.cache import agent_cache, answer_cache, normalize_question
+from address_book_agent.dataset import AddressBookSnapshot, aload_address_book
+from address_book_agent.lookup import LookupResult, format_records, get_address_book_index
+from address_book_agent.sql import get_sql_engine
+from address_book_agent.state import State, ThinkContent, SearchQuery, AddressBookQuery, AddressBookSQL
 from address_book_agent.prompts import THINK_PROMPT
 
+logger = logging.getLogger(__name__)
+
 
 async def generate_query(
     state: State, *, config: RunnableConfig
@@ -66,29 +73,203 @@ async def generate_query(
         }
 
 
+async def _lookup_with_index(
+    snapshot: AddressBookSnapshot,
+    question: str,
+    configuration: AddressBookAgentConfiguration,
+    config: RunnableConfig,
+) -> Optional[LookupResult]:
+    """抽取结构化查询条件并用预建索引检索，无法由索引回答时返回None。"""
+    model = load_chat_model(configuration.query_model).with_structured_output(
+        AddressBookQuery
+    )
+    messages = [
+        {"role": "system", "content": configuration.lookup_extract_prompt},
+        {"role": "user", "content": question},
+    ]
+    query = cast(AddressBookQuery, await model.ainvoke(messages, config))
+    index = await asyncio.to_thread(get_address_book_index, snapshot)
+    if not index.can_answer(query):
+        logger.info("通讯录索引无法表达该问题，回退pandas agent: %s", query)
+        return None
+    result = index.search(query)
+    if not result.records:
+        logger.info("通讯录索引未命中，回退pandas agent: %s", query)
+        return None
+    return result
+
+
+async def _query_with_sql(
+    snapshot: AddressBookSnapshot,
+    question: str,
+    configuration: AddressBookAgentConfiguration,
+    config: RunnableConfig,
+) -> Optional[str]:
+    """让LLM生成一条只读SQL并由DuckDB执行，生成或执行失败时返回None。"""
+    engine = await asyncio.to_thread(get_sql_engine, snapshot)
+    model = load_chat_model(configuration.query_model).with_structured_output(
+        AddressBookSQL
+    )
+    messages = [
+        {"role": "system", "content": configuration.sql_system_prompt.format(schema=engine.schema)},
+        {"role": "user", "content": question},
+    ]
+    generated = cast(AddressBookSQL, await model.ainvoke(messages, config))
+    try:
+        result = await engine.aexecute(generated.sql)
+    except Exception as e:
+        logger.warning("通讯录SQL执行失败，回退pandas agent: %s, %s", generated.sql, e)
+        return None
+    text = f"SQL: {result.sql}\n{format_records(result.records)}"
+    if result.truncated:
+        text += "\n（结果过多，仅展示部分记录）"
+    return text
+
+
+async def _ask_pandas_agent(
+    snapshot: AddressBookSnapshot,
+    question: str,
+    configuration: AddressBookAgentConfiguration,
+) -> str:
+    """使用pandas dataframe agent回答通讯录问题。
+
+    缓存的agent只复用LLM与提示词；每次调用都换上新的python工具，
+    其globals/locals只属于本次调用，避免不同会话或并发请求之间互相看到对方的变量。
+    """
+    pandas_agent = agent_cache.get(snapshot.path, snapshot.version, configuration.query_model)
+    if pandas_agent is None:
+        llm = load_chat_model(configuration.query_model)
+        pandas_agent = create_pandas_dataframe_agent(llm, snapshot.df,  allow_dangerous_code=True) # verbose=True,
+        agent_cache.put(snapshot.path, snapshot.version, configuration.query_model, pandas_agent)
+    # 浅拷贝：pandas 的写时复制保证 agent 执行的代码不会修改共享的 DataFrame
+    df = snapshot.df.copy(deep=False)
+    tools = [
+        tool.model_copy(update={"globals": {}, "locals": {"df": df}})
+        for tool in pandas_agent.tools
+    ]
+    response = await pandas_agent.model_copy(update={"tools": tools}).ainvoke(question)
+    return response.get("output")
+
+
 async def retrieve(
     state: State, *, config: RunnableConfig
-) -> dict[str, list[str]]:
+) -> dict[str, Any]:
     """从通讯录样本中检索文档.
 
+    默认先由LLM把问题抽取为结构化条件，再用预建索引确定性地查找记录；
+    duckdb模式下由LLM生成一条只读SQL，由DuckDB执行。
+    无法处理或未命中的问题，回退到pandas dataframe agent。
+    相同（规范化后）的问题直接返回缓存的检索结果，通讯录变化时缓存失效；
+    单轮问题已经完整回答过时，直接返回缓存的最终回答，不再调用LLM（任何检索方式都适用）。
+    结果无歧义时标记retrieval_certain，图将跳过think直接进入respond。
+
     参数:
         state (State): 包含查询和检索器的当前状态。
         config (RunnableConfig | None, 可选): 检索过程的配置。
 
     返回:
-        dict[str, list[str]]: 一个字典，包含单个键 "retrieved_books"，
-        对应一个包含检索结果的字符串列表。
+        dict[str, Any]: 一个字典，包含键 "retrieved_books"（检索结果的字符串列表），
+        以及快速路径相关的 "retrieval_certain"、"template_answer"、"llm_calls_saved"。
+    """
+    configuration = AddressBookAgentConfiguration.from_runnable_config(config)
+    question = state.queries[-1]
+    # 获取通讯录（进程内共享，文件变化时才重新解析 Excel）
+    snapshot = await aload_address_book(
+        configuration.address_book_path,
+        cache_dir=configuration.address_book_cache_dir,
+        categorical_columns=configuration.address_book_categorical_columns,
+    )
+
+    cache_key = _answer_cache_key(configuration, question)
+    if configuration.use_answer_cache:
+        cached = answer_cache.get(snapshot.path, snapshot.version, cache_key)
+        if cached is not None:
+            if cached.get("final_answer") and len(state.messages) == 1:
+                # 同一问题已经完整回答过：直接返回缓存的最终回答，think与respond都不调用LLM
+                return {
+                    "retrieved_books": [cached["answer"]],
+                    "retrieval_certain": True,
+                    "template_answer": cached["final_answer"],
+                    "llm_calls_saved": 2,
+                }
+            update = _retrieve_update(cached, configuration)
+            # 命中缓存至少省去一次抽取/生成SQL/agent的LLM调用
+            update["llm_calls_saved"] += 1
+            return update
+
+    answer, certain, template_answer = None, False, None
+    if configuration.address_book_backend == "index":
+        result = await _lookup_with_index(snapshot, question, configuration, config)
+        if result is not None:
+            answer = format_records(result.records)
+            certain = result.is_unambiguous()
+            template_answer = result.render_single_field_answer()
+    elif configuration.address_book_backend == "duckdb":
+        answer = await _query_with_sql(snapshot, question, configuration, config)
+    if answer is None:
+        answer = await _ask_pandas_agent(snapshot, question, configuration)
+
+    cached = {"answer": answer, "certain": certain, "template_answer": template_answer}
+    if configuration.use_answer_cache:
+        answer_cache.put(snapshot.path, snapshot.version, cache_key, cached)
+    return _retrieve_update(cached, configuration)
+
+
+def _answer_cache_key(
+    configuration: AddressBookAgentConfiguration, question: str
+) -> tuple[str, str, str]:
+    """检索结果缓存的键：(检索方式, 模型名, 规范化问题)。"""
+    return (
+        configuration.address_book_backend,
+        configuration.query_model,
+        normalize_question(question),
+    )
+
+
+async def _cache_final_answer(
+    state: State, answer: str, configuration: AddressBookAgentConfiguration
+) -> None:
+    """把单轮问题的最终回答写入检索结果缓存，相同问题再次出现时不再调用LLM。
+
+    多轮对话的回答依赖上下文，不缓存。
     """
-    # 1. 读取 Excel
-    df = pd.read_excel("/mnt/sdb/data/audio/文档样本/oa/通讯录样本.xlsx")
+    if not configuration.use_answer_cache or len(state.messages) != 1:
+        return
+    snapshot = await aload_address_book(
+        configuration.address_book_path,
+        cache_dir=configuration.address_book_cache_dir,
+        categorical_columns=configuration.address_book_categorical_columns,
+    )
+    key = _answer_cache_key(configuration, get_message_text(state.messages[0]))
+    cached = answer_cache.get(snapshot.path, snapshot.version, key) or {
+        "answer": "\n\n".join(state.retrieved_books),
+        "certain": False,
+        "template_answer": None,
+    }
+    answer_cache.put(
+        snapshot.path, snapshot.version, key, {**cached, "final_answer": answer}
+    )
+
 
-    # 2. 创建 Agent
-    llm = load_chat_model(AddressBookAgentConfiguration.from_runnable_config(config).query_model)
-    pandas_agent = create_pandas_dataframe_agent(llm, df,  allow_dangerous_code=True) # verbose=True,
+def _retrieve_update(
+    cached: dict[str, Any], configuration: AddressBookAgentConfiguration
+) -> dict[str, Any]:
+    """把检索结果转换为状态更新，并根据结果是否无歧义决定是否走快速路径。"""
+    certain = configuration.enable_fast_path and cached["certain"]
+    return {
+        "retrieved_books": [cached["answer"]],
+        "retrieval_certain": certain,
+        "template_answer": cached["template_answer"] if certain else None,
+        # 无歧义时跳过think，节省一次LLM调用
+        "llm_calls_saved": 1 if certain else 0,
+    }
 
-    # 3. 提问（自然语言）
-    response = await pandas_agent.ainvoke(state.queries[-1])
-    return {"retrieved_books": [response.get("output")]}
+
+def route_after_retrieve(state: State) -> Literal["think", "respond"]:
+    """检索结果无歧义时直接回答，否则进入think反思。"""
+    if state.retrieval_certain:
+        return "respond"
+    return "think"
 
 
 async def think(state: State, *, config: RunnableConfig) -> Command[Literal["respond", "generate_query"]]:
@@ -156,10 +337,17 @@ async def respond(
         对应一个包含生成响应的 BaseMessage 对象的列表。
 
     行为:
+        - 如果检索阶段已生成模板回答（或命中缓存的最终回答），直接返回，不调用语言模型。
+        - 单轮问题的最终回答写入检索结果缓存。
         - 使用配置中的模型和提示词生成响应。
         - 将当前消息、检索到的文档和系统时间作为输入。
         - 返回一个包含生成响应的 BaseMessage 对象的列表。
     """
+    if state.template_answer:
+        # 单字段查询结果无歧义，直接使用模板回答，跳过LLM调用
+        logger.info("通讯录查询节省LLM调用: %s", state.llm_calls_saved + 1)
+        return {"messages": [AIMessage(content=state.template_answer)], "llm_calls_saved": 1}
+
     configuration = AddressBookAgentConfiguration.from_runnable_config(config)
     # Feel free to customize the prompt, model, and other logic!
     prompt = ChatPromptTemplate.from_messages(
@@ -180,6 +368,8 @@ async def respond(
         config,
     )
     response = await model.ainvoke(message_value, config)
+    await _cache_final_answer(state, get_message_text(response), configuration)
+    logger.info("通讯录查询节省LLM调用: %s", state.llm_calls_saved)
     # We return a list, because this will get added to the existing list
     return {"messages": [response]}
 
@@ -193,7 +383,7 @@ builder.add_node(think)
 builder.add_node(respond)
 builder.add_edge("__start__", "generate_query")
 builder.add_edge("generate_query", "retrieve")
-builder.add_edge("retrieve", "think")
+builder.add_conditional_edges("retrieve", route_after_retrieve, ["think", "respond"])
 builder.add_edge("respond", END)
 
 # Finally, we compile it!
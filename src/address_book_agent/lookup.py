@@ -0,0 +1,289 @@
+"""通讯录的确定性检索引擎。
+
+在通讯录 DataFrame 之上预先构建索引，支持对姓名、部门、职务、电话、邮箱的
+精确匹配、前缀匹配和基于字符 n-gram 的模糊匹配；安装了 pypinyin 时，
+姓名还支持全拼与首字母（如 "zhangsan"、"zs"）检索。
+
+LLM 只负责把问题抽取为结构化的 AddressBookQuery，检索本身不再需要 LLM。
+无法用结构化条件表达的问题由调用方退回到 pandas agent。
+"""
+
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+
+import pandas as pd
+
+from address_book_agent.dataset import AddressBookSnapshot
+from address_book_agent.state import AddressBookQuery
+
+try:
+    from pypinyin import Style, lazy_pinyin
+except ImportError:  # pragma: no cover - 可选依赖
+    lazy_pinyin = None
+
+DEFAULT_FIELD_COLUMNS: dict[str, tuple[str, ...]] = {
+    "name": ("姓名", "名字", "员工姓名"),
+    "department": ("部门", "所属部门"),
+    "title": ("职务", "职位", "岗位"),
+    "phone": ("电话", "手机", "手机号", "办公电话", "联系电话"),
+    "email": ("邮箱", "电子邮箱", "邮件"),
+}
+"""检索字段与通讯录列名的对应关系，取第一个存在的列"""
+
+FUZZY_THRESHOLD = 0.5
+"""模糊匹配时，查询 n-gram 至少有这一比例出现在候选值中"""
+
+EXACT_MATCH_MODES = frozenset({"exact", "pinyin"})
+"""视为确定命中的匹配方式；前缀、拼音前缀和模糊命中可能指向别人，需交给 LLM 判断"""
+
+
+def _normalize(field_name: str, value: Any) -> str:
+    """把单元格的值规整为可比较的字符串。"""
+    if value is None or (isinstance(value, float) and pd.isna(value)):
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip().lower()
+    if field_name == "phone":
+        text = "".join(ch for ch in text if ch.isdigit())
+    return text
+
+
+def _ngrams(text: str, n: int = 2) -> set[str]:
+    """返回字符 n-gram，短于 n 的文本返回其本身。"""
+    if len(text) < n:
+        return {text} if text else set()
+    return {text[i : i + n] for i in range(len(text) - n + 1)}
+
+
+def _pinyin_keys(name: str) -> list[str]:
+    """返回姓名的全拼与首字母拼写，未安装 pypinyin 时返回空列表。"""
+    if lazy_pinyin is None or not name:
+        return []
+    full = "".join(lazy_pinyin(name)).lower()
+    initials = "".join(lazy_pinyin(name, style=Style.FIRST_LETTER)).lower()
+    return [key for key in dict.fromkeys([full, initials]) if key and key != name]
+
+
+class _FieldIndex:
+    """单个字段上的精确、前缀和 n-gram 索引。"""
+
+    def __init__(self, entries: Iterable[tuple[str, int]]) -> None:
+        self.exact: dict[str, set[int]] = {}
+        self.grams: dict[str, set[str]] = {}
+        for key, row in entries:
+            if not key:
+                continue
+            self.exact.setdefault(key, set()).add(row)
+        for key in self.exact:
+            for gram in _ngrams(key):
+                self.grams.setdefault(gram, set()).add(key)
+        self.sorted_keys = sorted(self.exact)
+
+    def match_exact(self, query: str) -> set[int]:
+        return set(self.exact.get(query, ()))
+
+    def match_prefix(self, query: str) -> set[int]:
+        rows: set[int] = set()
+        i = bisect_left(self.sorted_keys, query)
+        while i < len(self.sorted_keys) and self.sorted_keys[i].startswith(query):
+            rows |= self.exact[self.sorted_keys[i]]
+            i += 1
+        return rows
+
+    def match_fuzzy(self, query: str, threshold: float = FUZZY_THRESHOLD) -> set[int]:
+        query_grams = _ngrams(query)
+        if not query_grams:
+            return set()
+        hits: Counter[str] = Counter()
+        for gram in query_grams:
+            hits.update(self.grams.get(gram, ()))
+        rows: set[int] = set()
+        for key, count in hits.items():
+            if count / len(query_grams) >= threshold:
+                rows |= self.exact[key]
+        return rows
+
+
+@dataclass
+class LookupResult:
+    """一次结构化检索的结果。"""
+
+    records: list[dict[str, Any]] = field(default_factory=list)
+    """命中的通讯录记录（包含所请求的列）"""
+
+    match_modes: dict[str, str] = field(default_factory=dict)
+    """每个过滤条件最终采用的匹配方式：exact、prefix、pinyin、pinyin_prefix、fuzzy，规整后为空时为 empty"""
+
+    columns: list[str] = field(default_factory=list)
+    """记录中包含的列"""
+
+    requested_columns: list[str] = field(default_factory=list)
+    """用户明确要求获取的列"""
+
+    name_column: Optional[str] = None
+    """姓名所在的列"""
+
+    def is_unambiguous(self) -> bool:
+        """所有条件都精确命中且恰好命中一条记录，所请求的字段也都有值。
+
+        模糊或前缀匹配即使只命中一条，也可能是别人（如 "张三丰" 模糊命中 "张三"），不算无歧义。
+        """
+        if len(self.records) != 1:
+            return False
+        if not all(mode in EXACT_MATCH_MODES for mode in self.match_modes.values()):
+            return False
+        record = self.records[0]
+        return all(not pd.isna(record.get(column)) for column in self.requested_columns)
+
+    def render_single_field_answer(self) -> Optional[str]:
+        """单字段查询且结果无歧义时，直接用模板生成回答。"""
+        if not self.is_unambiguous() or len(self.requested_columns) != 1:
+            return None
+        if self.name_column is None or self.requested_columns[0] == self.name_column:
+            return None
+        record = self.records[0]
+        column = self.requested_columns[0]
+        value = record[column]
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+        return f"{record[self.name_column]}的{column}是{value}。"
+
+
+class AddressBookIndex:
+    """构建在某个版本通讯录上的检索索引。"""
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        field_columns: Optional[dict[str, tuple[str, ...]]] = None,
+    ) -> None:
+        """为 DataFrame 构建索引。
+
+        Args:
+            df (pd.DataFrame): 通讯录数据。
+            field_columns (Optional[dict[str, tuple[str, ...]]]): 字段到候选列名的映射。
+        """
+        self.df = df
+        self.columns: dict[str, str] = {}
+        for field_name, candidates in (field_columns or DEFAULT_FIELD_COLUMNS).items():
+            for column in candidates:
+                if column in df.columns:
+                    self.columns[field_name] = column
+                    break
+
+        self.indexes: dict[str, _FieldIndex] = {}
+        for field_name, column in self.columns.items():
+            values = [_normalize(field_name, v) for v in df[column].tolist()]
+            self.indexes[field_name] = _FieldIndex(
+                (value, row) for row, value in enumerate(values)
+            )
+            if field_name == "name":
+                self.indexes["name_pinyin"] = _FieldIndex(
+                    (key, row)
+                    for row, value in enumerate(values)
+                    for key in _pinyin_keys(value)
+                )
+
+    def _match_field(self, field_name: str, value: str, mode: str) -> tuple[set[int], str]:
+        """在单个字段上匹配，返回命中的行号与实际采用的匹配方式。"""
+        index = self.indexes[field_name]
+        query = _normalize(field_name, value)
+        if not query:
+            # 如不含数字的电话：空串会前缀匹配所有行，按未命中处理
+            return set(), "empty"
+        pinyin_index = self.indexes.get("name_pinyin") if field_name == "name" else None
+        use_pinyin = pinyin_index is not None and query.isascii() and query.isalpha()
+
+        if mode in ("exact", "auto"):
+            rows = index.match_exact(query)
+            if rows or mode == "exact":
+                return rows, "exact"
+        if mode in ("prefix", "auto"):
+            rows = index.match_prefix(query)
+            if rows or mode == "prefix":
+                return rows, "prefix"
+        if use_pinyin:
+            rows = pinyin_index.match_exact(query)
+            if rows:
+                return rows, "pinyin"
+            rows = pinyin_index.match_prefix(query)
+            if rows:
+                return rows, "pinyin_prefix"
+        return index.match_fuzzy(query), "fuzzy"
+
+    def can_answer(self, query: AddressBookQuery) -> bool:
+        """判断结构化查询能否由索引执行。"""
+        filters = query.filters()
+        return (
+            query.supported
+            and bool(filters)
+            and all(name in self.columns for name in filters)
+            and all(name in self.columns for name in query.fields)
+        )
+
+    def search(self, query: AddressBookQuery, limit: int = 20) -> LookupResult:
+        """执行结构化查询，各过滤条件之间取交集。
+
+        Args:
+            query (AddressBookQuery): 从问题中抽取出的结构化查询。
+            limit (int): 最多返回的记录数。
+
+        Returns:
+            LookupResult: 命中的记录及各条件的匹配方式。
+        """
+        rows: Optional[set[int]] = None
+        match_modes = {}
+        for field_name, value in query.filters().items():
+            matched, match_modes[field_name] = self._match_field(
+                field_name, value, query.match_mode
+            )
+            rows = matched if rows is None else rows & matched
+            if not rows:
+                break
+
+        if query.fields:
+            columns = [self.columns["name"]] if "name" in self.columns else []
+            columns += [self.columns[f] for f in query.fields if self.columns[f] not in columns]
+        else:
+            columns = list(self.df.columns)
+        records = (
+            self.df.iloc[sorted(rows or ())[:limit]][columns].to_dict(orient="records")
+        )
+        return LookupResult(
+            records=records,
+            match_modes=match_modes,
+            columns=columns,
+            requested_columns=[self.columns[f] for f in query.fields],
+            name_column=self.columns.get("name"),
+        )
+
+
+_INDEX_CACHE: dict[str, tuple[str, AddressBookIndex]] = {}
+
+
+def get_address_book_index(snapshot: AddressBookSnapshot) -> AddressBookIndex:
+    """返回某个通讯录版本的索引，同一版本只构建一次。"""
+    cached = _INDEX_CACHE.get(snapshot.path)
+    if cached and cached[0] == snapshot.version:
+        return cached[1]
+    index = AddressBookIndex(snapshot.df)
+    _INDEX_CACHE[snapshot.path] = (snapshot.version, index)
+    return index
+
+
+def format_records(records: list[dict[str, Any]]) -> str:
+    """把检索结果格式化为每行一条记录的文本。"""
+    if not records:
+        return "未找到匹配的通讯录记录"
+    lines = []
+    for record in records:
+        parts = []
+        for column, value in record.items():
+            if isinstance(value, float) and value.is_integer():
+                value = int(value)
+            parts.append(f"{column}: {'' if pd.isna(value) else value}")
+        lines.append(", ".join(parts))
+    return "\n".join(lines)
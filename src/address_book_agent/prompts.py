@@ -25,3 +25,20 @@ THINK_PROMPT = """
     3. 质量评估 - 我是否有足够的信息给出一个好的回答？
     4. 战略决策 - 我应该继续搜索还是给出回答？
     """
+
+LOOKUP_EXTRACT_PROMPT = """你负责把用户关于通讯录的问题转换为结构化的查询条件。
+
+- 只填写问题中明确出现的条件，例如姓名、部门、职务、电话、邮箱；
+- fields 填写用户想知道的字段，例如“张三的电话”对应 name=张三, fields=[phone]；
+- 如果问题需要统计、计数、排序、比较等无法通过查找记录回答的操作，supported 设为 False。
+"""
+
+SQL_SYSTEM_PROMPT = """你负责把用户关于通讯录的问题转换为一条 DuckDB SQL 查询。
+
+{schema}
+
+要求：
+- 只能生成一条 SELECT 语句，不能修改数据；
+- 模糊匹配姓名、部门等文本时使用 LIKE 或 contains()；
+- 统计类问题（如某部门有多少人）直接使用聚合函数返回结果。
+"""
@@ -0,0 +1,118 @@
+"""基于 DuckDB 的通讯录 text-to-SQL 引擎。
+
+每个版本的通讯录只导入一次到进程内的 DuckDB 表 address_book，表结构与
+category 列的取值样例也随之缓存，用于拼装提示词。LLM 只需生成一条只读的
+SELECT 语句，由 DuckDB 向量化执行；统计、计数类问题一次 LLM 调用即可得到结果。
+
+安全限制：
+    - 只接受单条 SELECT 语句；
+    - 连接关闭了外部文件访问（enable_external_access=false），SQL 无法读写文件。
+
+需要安装 duckdb。
+"""
+
+import asyncio
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+import pandas as pd
+
+from address_book_agent.dataset import AddressBookSnapshot
+
+TABLE_NAME = "address_book"
+
+MAX_SAMPLE_VALUES = 20
+"""每个 category 列在提示词中最多展示的取值个数"""
+
+
+@dataclass
+class SQLResult:
+    """一条 SQL 的执行结果。"""
+
+    sql: str
+    records: list[dict[str, Any]]
+    truncated: bool
+
+
+class AddressBookSQLEngine:
+    """持有一个加载了通讯录数据的 DuckDB 连接。"""
+
+    def __init__(self, df: pd.DataFrame) -> None:
+        """把通讯录导入 DuckDB，并预先生成表结构说明。
+
+        Args:
+            df (pd.DataFrame): 通讯录数据。
+        """
+        import duckdb
+
+        self._duckdb = duckdb
+        self._conn = duckdb.connect(":memory:")
+        self._conn.register("_address_book_df", df)
+        self._conn.execute(
+            f"CREATE TABLE {TABLE_NAME} AS SELECT * FROM _address_book_df"
+        )
+        self._conn.unregister("_address_book_df")
+        self._conn.execute("SET enable_external_access = false")
+        self._lock = threading.Lock()
+        self.schema = self._describe(df)
+
+    def _describe(self, df: pd.DataFrame) -> str:
+        """生成表结构、category 列取值和样例行的文字说明。"""
+        columns = self._conn.execute(f"DESCRIBE {TABLE_NAME}").fetchall()
+        lines = [f"表 {TABLE_NAME}（共 {len(df)} 行）的列："]
+        for name, column_type, *_ in columns:
+            if isinstance(df[name].dtype, pd.CategoricalDtype):
+                values = [str(v) for v in df[name].cat.categories[:MAX_SAMPLE_VALUES]]
+                lines.append(f"- {name}: VARCHAR，可选值: {', '.join(values)}")
+            else:
+                lines.append(f"- {name}: {column_type}")
+        lines.append("样例数据：")
+        lines.append(df.head(3).to_string(index=False))
+        return "\n".join(lines)
+
+    def validate(self, sql: str) -> str:
+        """校验 SQL 为单条只读查询，返回去掉结尾分号的语句。
+
+        Raises:
+            ValueError: 如果 SQL 不是单条 SELECT 语句。
+        """
+        statements = self._conn.extract_statements(sql)
+        if len(statements) != 1:
+            raise ValueError(f"只允许一条SQL语句，得到 {len(statements)} 条")
+        if statements[0].type != self._duckdb.StatementType.SELECT:
+            raise ValueError(f"只允许SELECT查询，得到 {statements[0].type.name}")
+        return statements[0].query.strip()
+
+    def execute(self, sql: str, limit: int = 50) -> SQLResult:
+        """执行只读 SQL，最多返回 limit 行。"""
+        sql = self.validate(sql)
+        with self._lock:
+            cursor = self._conn.cursor()
+        try:
+            cursor.execute(sql)
+            columns = [column[0] for column in cursor.description]
+            rows = cursor.fetchmany(limit + 1)
+        finally:
+            cursor.close()
+        records = [dict(zip(columns, row)) for row in rows[:limit]]
+        return SQLResult(sql=sql, records=records, truncated=len(rows) > limit)
+
+    async def aexecute(self, sql: str, limit: int = 50) -> SQLResult:
+        """execute 的异步版本，在线程池中执行。"""
+        return await asyncio.to_thread(self.execute, sql, limit)
+
+
+_ENGINE_CACHE: dict[str, tuple[str, AddressBookSQLEngine]] = {}
+_ENGINE_LOCK = threading.Lock()
+
+
+def get_sql_engine(snapshot: AddressBookSnapshot) -> AddressBookSQLEngine:
+    """返回某个通讯录版本的 SQL 引擎，同一版本只导入一次。"""
+    with _ENGINE_LOCK:
+        cached = _ENGINE_CACHE.get(snapshot.path)
+        if cached and cached[0] == snapshot.version:
+            return cached[1]
+        engine = AddressBookSQLEngine(snapshot.df)
+        _ENGINE_CACHE[snapshot.path] = (snapshot.version, engine)
+        return engine
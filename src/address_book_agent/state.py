@@ -26,6 +26,46 @@ class SearchQuery(BaseModel):
 
     query: str = Field(description="Search query")
 
+class AddressBookQuery(BaseModel):
+    """从用户问题中抽取的结构化通讯录查询条件。"""
+
+    name: Optional[str] = Field(default=None, description="要查找的人员姓名（中文或拼音）")
+    department: Optional[str] = Field(default=None, description="部门名称")
+    title: Optional[str] = Field(default=None, description="职务或岗位")
+    phone: Optional[str] = Field(default=None, description="电话号码或其中的一部分")
+    email: Optional[str] = Field(default=None, description="邮箱地址或其中的一部分")
+    match_mode: Literal["auto", "exact", "prefix", "fuzzy"] = Field(
+        default="auto",
+        description="匹配方式，不确定时使用auto（依次尝试精确、前缀、模糊匹配）",
+    )
+    fields: list[Literal["name", "department", "title", "phone", "email"]] = Field(
+        default_factory=list,
+        description="用户想要获取的字段，例如问电话则为['phone']，为空表示返回全部字段",
+    )
+    supported: bool = Field(
+        default=True,
+        description="问题能否仅通过上述条件查找记录来回答；统计、排序、聚合等问题为False",
+    )
+
+    def filters(self) -> dict[str, str]:
+        """返回非空的过滤条件。"""
+        return {
+            name: value
+            for name, value in (
+                ("name", self.name),
+                ("department", self.department),
+                ("title", self.title),
+                ("phone", self.phone),
+                ("email", self.email),
+            )
+            if value
+        }
+
+class AddressBookSQL(BaseModel):
+    """回答通讯录问题的只读SQL查询。"""
+
+    sql: str = Field(description="一条针对address_book表的DuckDB SELECT语句")
+
 class ThinkContent(BaseModel):
     """Schema for think content."""
     need_retrive: bool = Field(
@@ -55,6 +95,15 @@ class State:
 
     think_content: Optional[ThinkContent] = None
 
+    retrieval_certain: bool = False
+    """最近一次检索结果是否无歧义（恰好一条记录且所请求字段齐全），为True时跳过think"""
+
+    template_answer: Optional[str] = None
+    """单字段查询的模板回答或缓存的最终回答，存在时respond不再调用LLM"""
+
+    llm_calls_saved: Annotated[int, add] = 0
+    """本次查询通过快速路径节省的LLM调用次数"""
+
     # Feel free to add additional attributes to your state as needed.
     # Common examples include retrieved documents, extracted entities, API connections, etc.
 
@@ -29,3 +29,17 @@ class FileAgentConfiguration(BaseConfiguration):
             "description": "处理和优化查询的模型. 以下列格式提供: provider/model-name."
         },
     )
+
+    max_parallel_files: int = field(
+        default=8,
+        metadata={
+            "description": "批量读取多个文件时，同时解析的最大文件数"
+        },
+    )
+
+    max_session_files: int = field(
+        default=10,
+        metadata={
+            "description": "每个会话在store中最多保留的已解析文件数，超出后按最近使用顺序淘汰"
+        },
+    )
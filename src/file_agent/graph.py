@@ -7,35 +7,139 @@ from file_agent.configuration import FileAgentConfiguration
 from langgraph.graph import END, START, StateGraph
 from langchain_core.documents import Document
 from langchain_core.messages import HumanMessage, SystemMessage, AIMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
+from langgraph.types import StreamWriter
+from langgraph.store.base import BaseStore
+from typing import Any, Optional
+import asyncio
+import logging
 import os
-from shared.utils import load_txt, load_pdf, load_word, format_docs, load_chat_model
+import time
+from file_agent.memory import SessionDocumentMemory, file_content_hash, update_file_refs
+from shared.utils import format_docs, load_chat_model, load_document, supported_extensions
 
-async def read_file(state: FileAgentState) -> FileAgentState:
-    """读取文件内容,将其转换为Document对象，注意，目前仅仅支持单个文件，且文件不能太长"""
-    # print("STATE",state)
-    # 读取最后一条消息
-    if state.messages:
-        last_message = state.messages[-1]
-        file_path = last_message.additional_kwargs.get('file_path', None)
-        if file_path:
-            # 假设文件路径在消息内容中
-            try:
-                file_extension = os.path.splitext(file_path)[1].lower()
-                if file_extension == '.txt':
-                    file_ducuments = load_txt(file_path)
-                elif file_extension == '.pdf':
-                    file_documents = load_pdf(file_path)
-                elif file_extension == '.docx' or file_extension == '.doc':
-                    file_documents = load_word(file_path)
-                else:
-                    print(f"不支持的文件类型: {file_extension}")
-                    file_documents = []
-            except FileNotFoundError:
-                print(f"文件未找到: {file_path}")
-                file_documents = []
+logger = logging.getLogger(__name__)
+
+
+def _resolve_file_paths(additional_kwargs: dict[str, Any]) -> list[str]:
+    """从消息的additional_kwargs中解析出需要读取的文件列表
+
+    支持 file_path（单个文件或目录）与 file_paths（文件或目录的列表），
+    目录会被递归展开为其中已注册加载器的文件类型，结果去重且保持顺序。
+    """
+    raw_paths = []
+    if additional_kwargs.get('file_path'):
+        raw_paths.append(additional_kwargs['file_path'])
+    raw_paths.extend(additional_kwargs.get('file_paths') or [])
+
+    file_paths = []
+    for path in raw_paths:
+        if os.path.isdir(path):
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                for name in sorted(names):
+                    if os.path.splitext(name)[1].lower() in supported_extensions():
+                        file_paths.append(os.path.join(root, name))
         else:
-            file_documents = []
-    return {"documents": file_documents}
+            file_paths.append(path)
+    return list(dict.fromkeys(file_paths))
+
+
+async def _load_file_with_progress(
+    file_path: str,
+    semaphore: asyncio.Semaphore,
+    writer: StreamWriter,
+    memory: Optional[SessionDocumentMemory] = None,
+) -> tuple[list[Document], Optional[str]]:
+    """在线程池中解析单个文件，并通过custom流上报该文件的解析进度
+
+    如果会话记忆中已有相同内容的文件，则直接复用已解析的文档。
+    返回文档列表以及文件内容哈希（未启用会话记忆或读取失败时为None）。
+    """
+    async with semaphore:
+        writer({"file_agent": {"file": file_path, "status": "started"}})
+        start = time.perf_counter()
+        content_hash = None
+        try:
+            file_documents = None
+            if memory is not None:
+                content_hash = await asyncio.to_thread(file_content_hash, file_path)
+                file_documents = await memory.aget(content_hash)
+            if file_documents is not None:
+                status = "cached"
+            else:
+                file_documents = await asyncio.to_thread(load_document, file_path)
+                status = "done"
+        except ValueError as e:
+            logger.warning("%s", e)
+            file_documents, status, content_hash = [], "unsupported", None
+        except FileNotFoundError:
+            logger.warning("文件未找到: %s", file_path)
+            file_documents, status, content_hash = [], "not_found", None
+        except Exception as e:
+            # 单个文件解析失败不影响其他文件
+            logger.warning("文件解析失败: %s, %s", file_path, e)
+            file_documents, status, content_hash = [], "failed", None
+        # 统一使用原始路径作为来源，便于回答时标注出处
+        for doc in file_documents:
+            doc.metadata["source"] = file_path
+        if status == "done" and content_hash is not None:
+            await memory.aput(content_hash, file_path, file_documents)
+        writer(
+            {
+                "file_agent": {
+                    "file": file_path,
+                    "status": status,
+                    "num_documents": len(file_documents),
+                    "elapsed": round(time.perf_counter() - start, 3),
+                }
+            }
+        )
+    return file_documents, content_hash
+
+
+async def read_file(
+    state: FileAgentState, *, config: RunnableConfig, store: Optional[BaseStore] = None
+) -> dict[str, Any]:
+    """读取文件内容,将其转换为Document对象
+
+    支持单个文件、文件列表或目录，多个文件会并行解析，总耗时接近最慢的单个文件。
+    当图配置了store且有thread_id时，解析结果按内容哈希缓存在会话记忆中：
+    再次提到同一文件直接复用，不带文件追问时使用本会话最近的文件。
+    """
+    if not state.messages:
+        return {"documents": []}
+
+    configuration = FileAgentConfiguration.from_runnable_config(config)
+    memory = SessionDocumentMemory.from_runnable_config(store, config)
+    file_paths = _resolve_file_paths(state.messages[-1].additional_kwargs)
+    if not file_paths:
+        if memory is None or not state.file_refs:
+            return {"documents": []}
+        # 未指定文件时，复用本会话之前读取过的文件
+        return {"documents": await memory.aload(state.file_refs)}
+
+    semaphore = asyncio.Semaphore(max(1, configuration.max_parallel_files))
+    writer = get_stream_writer()
+    results = await asyncio.gather(
+        *(
+            _load_file_with_progress(path, semaphore, writer, memory)
+            for path in file_paths
+        )
+    )
+    file_documents = [doc for docs, _ in results for doc in docs]
+    if memory is None:
+        return {"documents": file_documents}
+
+    file_refs, evicted = update_file_refs(
+        state.file_refs,
+        [content_hash for _, content_hash in results if content_hash],
+        configuration.max_session_files,
+    )
+    await memory.aevict(evicted)
+    return {"documents": file_documents, "file_refs": file_refs}
+
 
 async def llm_call(state: FileAgentState) -> FileAgentState:
     """读取文件内容,将其转换为Document对象"""
@@ -50,7 +154,8 @@ async def llm_call(state: FileAgentState) -> FileAgentState:
         content = "请对文件主要内容进行概述"
 
     messages = [
-        SystemMessage(content=f"你是一个文件内容分析助手，根据文件内容回答问题。文件内容为{docs}"),
+        SystemMessage(content=f"你是一个文件内容分析助手，根据文件内容回答问题。"
+                              f"文件可能有多个，每个document的source属性为其来源文件，回答时请注明信息来自哪个文件。文件内容为{docs}"),
         *state.messages
     ]
     response = await model.ainvoke(messages)
@@ -66,7 +171,9 @@ builder.add_edge("llm_call", END)
 
 """
 这里采用了工作流的形式来实现文件agent
-注意：不加入短期记忆，每次都是单独的处理
+注意：对话消息不加入短期记忆；解析后的文件按内容哈希保存在store的会话命名空间中，
+checkpoint中只保留file_refs引用，同一会话内可复用
+注意：支持一次传入多个文件或目录(file_paths)，文件并行解析，进度通过custom流输出
 注意：该agent与主agent的state共享messages字段和docunments字段
 """
 graph = builder.compile()
@@ -0,0 +1,110 @@
+"""file_agent 的会话级文档记忆。
+
+解析后的文件内容按内容哈希（sha256）存放在 LangGraph store 中，命名空间按 thread 隔离；
+checkpoint 中只保存哈希引用（file_refs），不会内联文档内容。
+同一会话后续再次提到同一文件，或不带文件继续追问时，直接从 store 取回已解析的文档。
+
+淘汰策略：每个 thread 最多保留 max_session_files 个文件，按最近使用顺序（LRU）淘汰，
+被淘汰文件的文档会从 store 中删除。
+"""
+
+import asyncio
+import hashlib
+from typing import Any, Optional
+
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableConfig
+from langgraph.store.base import BaseStore
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_content_hash(file_path: str) -> str:
+    """计算文件内容的 sha256，用作文档在 store 中的引用。
+
+    Args:
+        file_path (str): 文件路径。
+
+    Returns:
+        str: 文件内容的十六进制 sha256 摘要。
+    """
+    sha256 = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b""):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def update_file_refs(
+    existing: list[str], used: list[str], max_files: int
+) -> tuple[list[str], list[str]]:
+    """按 LRU 规则更新会话的文件引用列表。
+
+    Args:
+        existing (list[str]): 会话中已有的引用，越靠后表示越近使用。
+        used (list[str]): 本轮使用到的引用。
+        max_files (int): 每个会话最多保留的文件数。
+
+    Returns:
+        tuple[list[str], list[str]]: (保留的引用, 被淘汰的引用)。
+    """
+    used = list(dict.fromkeys(used))
+    refs = [ref for ref in existing if ref not in used] + used
+    overflow = max(0, len(refs) - max(1, max_files))
+    return refs[overflow:], refs[:overflow]
+
+
+class SessionDocumentMemory:
+    """以 thread 为作用域、按内容哈希寻址的已解析文档存储。"""
+
+    def __init__(self, store: BaseStore, thread_id: str) -> None:
+        """初始化会话文档记忆。
+
+        Args:
+            store (BaseStore): LangGraph store，用于保存解析后的文档。
+            thread_id (str): 会话 id，决定文档所在的命名空间。
+        """
+        self.store = store
+        self.namespace = ("file_agent", thread_id, "documents")
+
+    @classmethod
+    def from_runnable_config(
+        cls, store: Optional[BaseStore], config: RunnableConfig
+    ) -> Optional["SessionDocumentMemory"]:
+        """根据运行配置创建会话文档记忆；没有 store 或 thread_id 时返回 None。"""
+        thread_id = (config.get("configurable") or {}).get("thread_id")
+        if store is None or not thread_id:
+            return None
+        return cls(store, str(thread_id))
+
+    async def aget(self, content_hash: str) -> Optional[list[Document]]:
+        """取回某个引用对应的文档，不存在时返回 None。"""
+        item = await self.store.aget(self.namespace, content_hash)
+        if item is None:
+            return None
+        return [Document(**doc) for doc in item.value["documents"]]
+
+    async def aput(
+        self, content_hash: str, file_path: str, documents: list[Document]
+    ) -> None:
+        """保存某个文件解析后的文档。"""
+        value: dict[str, Any] = {
+            "file_path": file_path,
+            "documents": [
+                {"page_content": doc.page_content, "metadata": doc.metadata}
+                for doc in documents
+            ],
+        }
+        # 文档原文不进入 store 的语义索引：不向量化，也不会出现在记忆检索结果中
+        await self.store.aput(self.namespace, content_hash, value, index=False)
+
+    async def aload(self, refs: list[str]) -> list[Document]:
+        """按引用顺序取回多个文件的文档，忽略已不存在的引用。"""
+        results = await asyncio.gather(*(self.aget(ref) for ref in refs))
+        return [doc for docs in results if docs for doc in docs]
+
+    async def aevict(self, refs: list[str]) -> None:
+        """从 store 中删除被淘汰引用对应的文档。"""
+        await asyncio.gather(
+            *(self.store.adelete(self.namespace, ref) for ref in refs)
+        )
@@ -24,3 +24,6 @@ class FileAgentState:
 
     documents: Annotated[list[Document], reduce_docs] = field(default_factory=list)
     """由检索器填充。这是一个代理可以参考的文档列表。"""
+
+    file_refs: list[str] = field(default_factory=list)
+    """本会话已解析文件的内容哈希引用（按最近使用排序），文档本身保存在store中。"""
@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
+from typing import Literal, Optional
 
 from shared.configuration import BaseConfiguration
 
@@ -25,3 +26,77 @@ class IndexConfiguration(BaseConfiguration):
             "description": "Path to a JSON file containing default documents to index."
         },
     )
+
+    ingest_mode: Literal["batch", "stream"] = field(
+        default="batch",
+        metadata={
+            "description": "索引 docs_file 的方式：batch 一次性读入后写入；stream 增量读取 JSONL/JSON 数组，分批向量化并批量写入，支持断点续传。"
+        },
+    )
+
+    ingest_batch_size: int = field(
+        default=64,
+        metadata={"description": "流式索引时每批向量化、写入的文档数。"},
+    )
+
+    ingest_embed_concurrency: int = field(
+        default=4,
+        metadata={"description": "流式索引时同时向量化的批次数上限。"},
+    )
+
+    ingest_queue_size: int = field(
+        default=8,
+        metadata={
+            "description": "流式索引时向量化与写入之间的队列长度，队列满时向量化等待写入（背压）。"
+        },
+    )
+
+    ingest_checkpoint_file: Optional[str] = field(
+        default=None,
+        metadata={
+            "description": "流式索引进度检查点文件，默认为 docs_file 同目录下的 <docs_file>.progress.json。"
+        },
+    )
+
+    chunking_enabled: bool = field(
+        default=False,
+        metadata={
+            "description": "是否在向量化前按句子边界把文档切分为块；块 id 由原文档 uuid 与块序号确定。已有索引开启后需要重新索引，原文档 id 不再存在。"
+        },
+    )
+
+    chunk_size_tokens: int = field(
+        default=400,
+        metadata={"description": "每个块的目标 token 数（中文按字计）。"},
+    )
+
+    chunk_overlap_tokens: int = field(
+        default=50,
+        metadata={"description": "相邻块之间重叠的 token 数。"},
+    )
+
+    min_chunk_tokens: int = field(
+        default=50,
+        metadata={"description": "尾块小于该 token 数时并入前一块。"},
+    )
+
+    chunk_window: int = field(
+        default=1,
+        metadata={
+            "description": "每个块的元数据中保存前后各多少个相邻块的文本，检索时用于扩展命中，0 表示不保存。"
+        },
+    )
+
+    incremental_index: bool = field(
+        default=False,
+        metadata={
+            "description": "是否按内容哈希清单增量索引：只写入新增或变化的文档，删除 docs_file 中已移除的文档。首次开启时清单为空，会按当前 docs_file 重新写入全部文档。"
+        },
+    )
+
+    index_manifest_file: Optional[str] = field(
+        default=None,
+        metadata={
+            "description": "增量索引清单文件，默认为 .cache/index_manifest/<retriever_provider>-<index_name>.json。"
+        },
+    )
@@ -0,0 +1,81 @@
+"""为声明的可过滤元数据字段建立索引。
+
+filterable_fields 中的字段需要在向量库中有合适的索引，检索时的预过滤才能生效：
+
+    - Elasticsearch: 为 metadata.<field> 添加显式映射（keyword、double、date、boolean），
+      索引不存在时先按向量库的检索策略创建；字段已被动态映射为其他类型时只记录警告；
+    - MongoDB Atlas: 在向量检索索引中把这些字段声明为 filter 字段；
+    - Pinecone: serverless 索引自动索引全部元数据，无需处理。
+
+同一进程内，每个索引、每组字段只处理一次。
+"""
+
+import asyncio
+import logging
+from typing import Any
+
+from langchain_core.vectorstores import VectorStore
+
+from index_graph.configuration import IndexConfiguration
+
+logger = logging.getLogger(__name__)
+
+_ES_FIELD_MAPPINGS: dict[str, dict[str, Any]] = {
+    "keyword": {"type": "keyword"},
+    "number": {"type": "double"},
+    "date": {"type": "date", "format": "epoch_second"},
+    "boolean": {"type": "boolean"},
+}
+
+_ensured: set[tuple[str, str, tuple[tuple[str, str], ...]]] = set()
+
+
+async def ensure_filterable_fields(
+    vectorstore: VectorStore, configuration: IndexConfiguration
+) -> None:
+    """确保 filterable_fields 中的字段在向量库中已建立可过滤的索引。"""
+    fields = configuration.filterable_fields
+    key = (
+        configuration.retriever_provider,
+        configuration.index_name,
+        tuple(sorted(fields.items())),
+    )
+    if not fields or key in _ensured:
+        return
+    match configuration.retriever_provider:
+        case "elastic" | "elastic-local":
+            await _ensure_elasticsearch(vectorstore, fields)
+        case "mongodb":
+            await _ensure_mongodb(vectorstore, fields)
+        case _:
+            pass
+    _ensured.add(key)
+
+
+async def _ensure_elasticsearch(vectorstore: Any, fields: dict[str, str]) -> None:
+    from elasticsearch import BadRequestError
+
+    store = vectorstore._store
+    await asyncio.to_thread(store._create_index_if_not_exists)
+    properties = {name: _ES_FIELD_MAPPINGS[t] for name, t in fields.items()}
+    try:
+        await asyncio.to_thread(
+            store.client.indices.put_mapping,
+            index=store.index,
+            properties={"metadata": {"properties": properties}},
+        )
+    except BadRequestError as e:
+        logger.warning("可过滤字段映射失败，字段可能已被动态映射为其他类型: %s", e)
+
+
+async def _ensure_mongodb(vectorstore: Any, fields: dict[str, str]) -> None:
+    if not hasattr(vectorstore, "create_vector_search_index"):
+        logger.warning("当前 langchain-mongodb 版本不支持创建向量检索索引，请在 Atlas 中手动声明 filter 字段")
+        return
+    dimensions = len(await vectorstore.embeddings.aembed_query("get num dimensions"))
+    await asyncio.to_thread(
+        vectorstore.create_vector_search_index,
+        dimensions=dimensions,
+        filters=list(fields),
+        update=True,
+    )
@@ -1,16 +1,28 @@
 """This "graph" simply exposes an endpoint for a user to upload docs to be indexed."""
 
 import json
+import logging
+import os
 from typing import Optional
 
+from langchain_core.documents import Document
 from langchain_core.runnables import RunnableConfig
+from langgraph.config import get_stream_writer
 from langgraph.graph import END, START, StateGraph
 
 from index_graph.configuration import IndexConfiguration
+from index_graph.filterable import ensure_filterable_fields
+from index_graph.ingest import IngestStats, iter_serialized_docs, stream_index
+from index_graph.manifest import STATE_SOURCE, IndexManifest, default_manifest_path
 from index_graph.state import IndexState
 from shared import retrieval
+from shared.chunking import ChunkStats, chunk_documents
+from shared.filters import normalize_documents
+from shared.query_cache import semantic_cache
 from shared.state import reduce_docs
 
+logger = logging.getLogger(__name__)
+
 
 async def index_docs(
     state: IndexState, *, config: Optional[RunnableConfig] = None
@@ -20,7 +32,17 @@ async def index_docs(
     此函数从状态中获取文档，确保文档包含用户 ID，
     将它们添加到检索器的索引中，然后发出信号从状态中删除这些文档。
 
-    如果状态中未提供文档，则会从 configuration.docs_file 指定的 JSON 文件中加载文档。
+    如果状态中未提供文档，则会从 configuration.docs_file 指定的 JSON 文件中加载文档；
+    ingest_mode 为 stream 时改为流式读取并分批写入。
+
+    开启 chunking_enabled 时，文档在向量化前按句子边界切分为块，增量清单以块为单位比较。
+
+    声明了 filterable_fields 时，写入前规范化这些字段的取值，并在向量库中为它们建立索引，
+    供检索时的 metadata_filter 预过滤使用。
+
+    开启 incremental_index 时，按内容哈希清单只写入新增或变化的文档，
+    并删除 docs_file 中已经移除的文档；文档以其 uuid 写入，重复索引不会产生重复数据。
+    索引内容变化后，该索引的语义查询缓存失效。
 
     参数:
         state (IndexState): 包含文档和检索器的当前状态。
@@ -30,18 +52,167 @@ async def index_docs(
         raise ValueError("Configuration required to run index_docs.")
 
     configuration = IndexConfiguration.from_runnable_config(config)
+    manifest = None
+    if configuration.incremental_index:
+        manifest = IndexManifest.load(
+            configuration.index_manifest_file
+            or default_manifest_path(
+                configuration.retriever_provider, configuration.index_name
+            )
+        )
+
     docs = state.docs
+    if not docs and configuration.ingest_mode == "stream":
+        try:
+            await _stream_index_docs_file(configuration, config, manifest)
+        finally:
+            # 索引内容已变化，之前缓存的检索结果不再可靠
+            semantic_cache.invalidate(
+                configuration.retriever_provider, configuration.index_name
+            )
+        return {"docs": "delete"}
+
+    source = STATE_SOURCE
     if not docs:
+        source = os.path.abspath(configuration.docs_file)
         with open(configuration.docs_file) as f:
             serialized_docs = json.load(f)
             docs = reduce_docs([], serialized_docs)
+    docs = normalize_documents(docs, configuration.filterable_fields)
+    if configuration.chunking_enabled:
+        chunk_stats = ChunkStats()
+        docs = _chunk(configuration, docs, chunk_stats)
+        logger.info("文档切分完成: %s", chunk_stats.as_dict())
 
     with retrieval.make_retriever(config) as retriever:
-        await retriever.aadd_documents(docs)
+        await ensure_filterable_fields(retriever.vectorstore, configuration)
+        if manifest is None:
+            await retriever.aadd_documents(docs, ids=[doc.metadata["uuid"] for doc in docs])
+            semantic_cache.invalidate(
+                configuration.retriever_provider, configuration.index_name
+            )
+            return {"docs": "delete"}
+
+        changed = manifest.changed(source, docs)
+        removed = manifest.removed(source, {doc.metadata["uuid"] for doc in docs})
+        if changed:
+            await retriever.aadd_documents(
+                changed, ids=[doc.metadata["uuid"] for doc in changed]
+            )
+            manifest.record(source, changed)
+        if removed:
+            await retriever.vectorstore.adelete(removed)
+            manifest.forget(source, removed)
+        manifest.save()
+        if changed or removed:
+            semantic_cache.invalidate(
+                configuration.retriever_provider, configuration.index_name
+            )
+    logger.info(
+        "增量索引完成: 写入 %d，未变化 %d，删除 %d",
+        len(changed),
+        len(docs) - len(changed),
+        len(removed),
+    )
 
     return {"docs": "delete"}
 
 
+def _chunk(
+    configuration: IndexConfiguration,
+    docs: list[Document],
+    stats: Optional[ChunkStats] = None,
+) -> list[Document]:
+    """按配置把文档切分为块。"""
+    return chunk_documents(
+        docs,
+        chunk_size=configuration.chunk_size_tokens,
+        chunk_overlap=configuration.chunk_overlap_tokens,
+        min_chunk_size=configuration.min_chunk_tokens,
+        window=configuration.chunk_window,
+        stats=stats,
+    )
+
+
+async def _stream_index_docs_file(
+    configuration: IndexConfiguration,
+    config: RunnableConfig,
+    manifest: Optional[IndexManifest] = None,
+) -> IngestStats:
+    """流式读取 docs_file，分批向量化后批量写入向量库，并通过custom流输出进度。
+
+    提供清单时，每批只写入新增或变化的文档；完整读完文件（非断点续传）后，
+    删除清单中本次没有出现的文档。
+    """
+    writer = get_stream_writer()
+    source = os.path.abspath(configuration.docs_file)
+    checkpoint_path = (
+        configuration.ingest_checkpoint_file
+        or f"{configuration.docs_file}.progress.json"
+    )
+    seen_ids: set[str] = set()
+    unchanged = 0
+    chunk_stats = ChunkStats()
+
+    def transform(docs: list[Document]) -> list[Document]:
+        nonlocal unchanged
+        docs = normalize_documents(docs, configuration.filterable_fields)
+        if configuration.chunking_enabled:
+            docs = _chunk(configuration, docs, chunk_stats)
+        if manifest is None:
+            return docs
+        seen_ids.update(doc.metadata["uuid"] for doc in docs)
+        changed = manifest.changed(source, docs)
+        unchanged += len(docs) - len(changed)
+        return changed
+
+    def on_progress(stats: IngestStats) -> None:
+        stats.extra["docs_unchanged"] = unchanged
+        if configuration.chunking_enabled:
+            stats.extra["chunk_stats"] = chunk_stats.as_dict()
+        writer({"index_graph": stats.as_dict()})
+
+    with retrieval.make_retriever(config) as retriever:
+        vectorstore = retriever.vectorstore
+        await ensure_filterable_fields(vectorstore, configuration)
+        try:
+            stats = await stream_index(
+                iter_serialized_docs(configuration.docs_file),
+                vectorstore,
+                vectorstore.embeddings,
+                batch_size=configuration.ingest_batch_size,
+                embed_concurrency=configuration.ingest_embed_concurrency,
+                queue_size=configuration.ingest_queue_size,
+                checkpoint_path=checkpoint_path,
+                source=source,
+                transform=transform,
+                on_batch=(lambda docs: manifest.record(source, docs))
+                if manifest is not None
+                else None,
+                on_progress=on_progress,
+            )
+        finally:
+            if manifest is not None:
+                manifest.save()
+
+        stats.extra["docs_unchanged"] = unchanged
+        if configuration.chunking_enabled:
+            stats.extra["chunk_stats"] = chunk_stats.as_dict()
+        if manifest is not None:
+            if stats.docs_skipped:
+                # 断点续传时无法得知已跳过部分包含哪些文档，删除留到下一次完整索引
+                logger.info("断点续传的索引不删除已移除的文档，将在下一次完整索引时处理")
+            else:
+                removed = manifest.removed(source, seen_ids)
+                if removed:
+                    await vectorstore.adelete(removed)
+                    manifest.forget(source, removed)
+                    manifest.save()
+                stats.extra["docs_removed"] = len(removed)
+    logger.info("流式索引完成: %s", stats.as_dict())
+    return stats
+
+
 # Define the graph
 builder = StateGraph(IndexState, config_schema=IndexConfiguration)
 builder.add_node(index_docs)
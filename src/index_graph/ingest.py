@@ -0,0 +1,342 @@
+"""流式批量索引。
+
+大文件不再一次性 json.load 到内存，而是按行读取 JSONL，或增量解析大型 JSON 数组，
+按固定大小分批后经过两级流水线写入向量库：
+
+    读取/分批 -> 向量化（有并发上限） -> 有界队列 -> 批量写入
+
+队列满时向量化阶段会阻塞等待写入（背压），内存占用只与批大小和队列长度有关。
+写入进度按“连续完成的文档数”记录在检查点文件中，中断后可以从断点继续。
+"""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Callable, Iterator, Optional, Union
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from shared.state import reduce_docs
+
+_READ_CHUNK_SIZE = 64 * 1024
+
+
+def _iter_json_array(f: Any) -> Iterator[Any]:
+    """增量解析 JSON 数组，逐个返回数组元素。"""
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    eof = False
+    started = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, eof
+        chunk = f.read(_READ_CHUNK_SIZE)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        if pos >= len(buffer):
+            if eof or not fill():
+                raise ValueError("JSON 数组没有正确结束")
+            continue
+        if not started:
+            if buffer[pos] != "[":
+                raise ValueError("文件不是 JSON 数组")
+            started = True
+            pos += 1
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof or not fill():
+                raise
+            continue
+        if end >= len(buffer) and not eof:
+            # 元素恰好在缓冲区末尾结束，可能被截断（如数字），读入更多内容后重新解析
+            if fill():
+                continue
+        yield item
+        pos = end
+
+
+def iter_serialized_docs(path: str) -> Iterator[Any]:
+    """逐个读取文档文件中的序列化文档。
+
+    支持 JSONL（每行一个文档，.jsonl/.ndjson 或首个字符不是 "["）与 JSON 数组。
+
+    Args:
+        path (str): 文档文件路径。
+
+    Yields:
+        Any: 单个序列化的文档（字符串或字典）。
+    """
+    with open(path, encoding="utf-8") as f:
+        is_jsonl = path.endswith((".jsonl", ".ndjson"))
+        if not is_jsonl:
+            head = f.read(_READ_CHUNK_SIZE).lstrip()
+            is_jsonl = not head.startswith("[")
+            f.seek(0)
+        if is_jsonl:
+            for line in f:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+        else:
+            yield from _iter_json_array(f)
+
+
+@dataclass
+class IngestStats:
+    """流式索引的统计信息。"""
+
+    docs_read: int = 0
+    docs_written: int = 0
+    docs_skipped: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+    extra: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def docs_per_sec(self) -> float:
+        """写入吞吐量（文档数/秒）。"""
+        return self.docs_written / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """以字典形式返回统计信息，便于日志或流式输出。"""
+        return {
+            "docs_read": self.docs_read,
+            "docs_written": self.docs_written,
+            "docs_skipped": self.docs_skipped,
+            "batches": self.batches,
+            "elapsed": round(self.elapsed, 3),
+            "docs_per_sec": round(self.docs_per_sec, 1),
+            **self.extra,
+        }
+
+
+class _Checkpoint:
+    """记录已连续写入的文档数；批次乱序完成时只推进到连续完成的位置。"""
+
+    def __init__(self, path: Optional[str], source: str) -> None:
+        self.path = path
+        self.source = source
+        self.committed = 0
+        self._pending: dict[int, int] = {}
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("source") == source:
+                self.committed = int(data.get("committed", 0))
+
+    def complete(self, start: int, size: int) -> None:
+        self._pending[start] = size
+        advanced = False
+        while self.committed in self._pending:
+            self.committed += self._pending.pop(self.committed)
+            advanced = True
+        if advanced:
+            self._save()
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"source": self.source, "committed": self.committed}, f)
+        os.replace(tmp_path, self.path)
+
+    def clear(self) -> None:
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+@dataclass
+class _Batch:
+    start: int
+    """批次第一个文档在文件中的序号"""
+    size: int
+    """批次在文件中占用的文档数（去重前）"""
+    docs: list[Document]
+    embeddings: Optional[list[list[float]]] = None
+
+
+async def _write_batch(vectorstore: VectorStore, batch: _Batch) -> None:
+    """使用向量库的批量接口写入一个批次。
+
+    向量库支持直接写入预先计算好的向量时（如 Elasticsearch 的 add_embeddings），
+    不再重复向量化；否则退回 aadd_documents，由向量库自行向量化。
+    """
+    ids = [doc.metadata["uuid"] for doc in batch.docs]
+    if batch.embeddings is not None and hasattr(vectorstore, "aadd_embeddings"):
+        await vectorstore.aadd_embeddings(
+            list(zip((doc.page_content for doc in batch.docs), batch.embeddings)),
+            metadatas=[doc.metadata for doc in batch.docs],
+            ids=ids,
+        )
+    elif batch.embeddings is not None and hasattr(vectorstore, "add_embeddings"):
+        await asyncio.to_thread(
+            vectorstore.add_embeddings,
+            list(zip((doc.page_content for doc in batch.docs), batch.embeddings)),
+            metadatas=[doc.metadata for doc in batch.docs],
+            ids=ids,
+        )
+    else:
+        await vectorstore.aadd_documents(batch.docs, ids=ids)
+
+
+def _supports_precomputed(vectorstore: VectorStore) -> bool:
+    return hasattr(vectorstore, "aadd_embeddings") or hasattr(
+        vectorstore, "add_embeddings"
+    )
+
+
+async def _iter_batches(
+    docs: Union[Iterator[Any], AsyncIterator[Any]], batch_size: int, skip: int
+) -> AsyncIterator[_Batch]:
+    """把序列化文档分批，跳过检查点之前已经写入的文档。"""
+    items: list[Any] = []
+    position = 0
+    start = skip
+
+    async def aiter() -> AsyncIterator[Any]:
+        if hasattr(docs, "__aiter__"):
+            async for item in docs:  # type: ignore[union-attr]
+                yield item
+        else:
+            for item in docs:  # type: ignore[union-attr]
+                yield item
+
+    async for item in aiter():
+        position += 1
+        if position <= skip:
+            continue
+        items.append(item)
+        if len(items) >= batch_size:
+            yield _Batch(start=start, size=len(items), docs=reduce_docs([], items))
+            start += len(items)
+            items = []
+    if items:
+        yield _Batch(start=start, size=len(items), docs=reduce_docs([], items))
+
+
+async def stream_index(
+    docs: Union[Iterator[Any], AsyncIterator[Any]],
+    vectorstore: VectorStore,
+    embedding_model: Optional[Embeddings] = None,
+    *,
+    batch_size: int = 64,
+    embed_concurrency: int = 4,
+    queue_size: int = 8,
+    checkpoint_path: Optional[str] = None,
+    source: str = "",
+    transform: Optional[Callable[[list[Document]], Any]] = None,
+    on_batch: Optional[Callable[[list[Document]], None]] = None,
+    on_progress: Optional[Callable[[IngestStats], None]] = None,
+) -> IngestStats:
+    """以流水线方式把文档批量写入向量库。
+
+    Args:
+        docs: 序列化文档的（异步）迭代器，例如 iter_serialized_docs 的返回值。
+        vectorstore (VectorStore): 目标向量库。
+        embedding_model (Optional[Embeddings]): 向量化模型；为 None 或向量库不支持写入预计算向量时，
+            由向量库在写入时自行向量化。
+        batch_size (int): 每批文档数。
+        embed_concurrency (int): 同时进行向量化的批次数上限。
+        queue_size (int): 向量化与写入之间的队列长度，队列满时向量化阶段等待（背压）。
+        checkpoint_path (Optional[str]): 进度检查点文件，为 None 时不记录进度。
+        source (str): 数据来源标识，检查点只在来源一致时生效。
+        transform: 可选的批次变换，接收批次文档，返回（或异步返回）要写入的文档列表。
+        on_batch: 每个批次写入成功后的回调，参数为该批次写入的文档。
+        on_progress: 每写完一批时的回调，参数为当前统计信息。
+
+    Returns:
+        IngestStats: 本次索引的统计信息。
+    """
+    started = time.perf_counter()
+    stats = IngestStats()
+    checkpoint = _Checkpoint(checkpoint_path, source)
+    stats.docs_skipped = checkpoint.committed
+    precompute = embedding_model is not None and _supports_precomputed(vectorstore)
+
+    queue: asyncio.Queue[Optional[_Batch]] = asyncio.Queue(maxsize=max(1, queue_size))
+    semaphore = asyncio.Semaphore(max(1, embed_concurrency))
+    errors: list[BaseException] = []
+
+    async def embed(batch: _Batch) -> None:
+        try:
+            if transform is not None:
+                transformed = transform(batch.docs)
+                if asyncio.iscoroutine(transformed):
+                    transformed = await transformed
+                batch.docs = transformed
+            if precompute and batch.docs:
+                batch.embeddings = await embedding_model.aembed_documents(
+                    [doc.page_content for doc in batch.docs]
+                )
+            # 队列满时在此阻塞，形成背压
+            await queue.put(batch)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            semaphore.release()
+
+    async def write() -> None:
+        while (batch := await queue.get()) is not None:
+            if errors:
+                # 出错后只消费队列，避免向量化阶段阻塞
+                continue
+            try:
+                if batch.docs:
+                    await _write_batch(vectorstore, batch)
+            except Exception as e:
+                errors.append(e)
+                continue
+            if on_batch is not None:
+                on_batch(batch.docs)
+            stats.docs_written += len(batch.docs)
+            stats.batches += 1
+            checkpoint.complete(batch.start, batch.size)
+            stats.elapsed = time.perf_counter() - started
+            if on_progress is not None:
+                on_progress(stats)
+
+    writer = asyncio.create_task(write())
+    embed_tasks: set[asyncio.Task[None]] = set()
+    try:
+        async for batch in _iter_batches(docs, batch_size, checkpoint.committed):
+            await semaphore.acquire()
+            if errors:
+                semaphore.release()
+                break
+            stats.docs_read += batch.size
+            task = asyncio.create_task(embed(batch))
+            embed_tasks.add(task)
+            task.add_done_callback(embed_tasks.discard)
+        await asyncio.gather(*embed_tasks)
+        await queue.put(None)
+        await writer
+    except BaseException:
+        for task in embed_tasks:
+            task.cancel()
+        writer.cancel()
+        raise
+
+    stats.elapsed = time.perf_counter() - started
+    if errors:
+        # 检查点保留在最后连续写入的位置，修复问题后可以继续
+        raise errors[0]
+    checkpoint.clear()
+    return stats
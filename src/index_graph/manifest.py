@@ -0,0 +1,103 @@
+"""增量索引清单。
+
+清单记录每个数据来源（docs_file 的绝对路径，或通过状态上传的 "state"）中
+文档 id 到内容哈希的映射，保存在本地 JSON 文件中，每个向量库索引一个文件。
+
+重新索引时：
+    - id 不存在或内容哈希变化的文档才需要向量化、写入；
+    - 内容哈希未变的文档直接跳过；
+    - 同一来源中清单里有、本次没有出现的文档，从向量库中删除。
+"""
+
+import hashlib
+import json
+import os
+from typing import Iterable, Optional
+
+from langchain_core.documents import Document
+
+STATE_SOURCE = "state"
+"""通过图状态上传的文档所属的来源，这类文档不会因为缺席而被删除"""
+
+_HASH_EXCLUDED_METADATA = ("uuid", "content_hash")
+
+
+def content_hash(doc: Document) -> str:
+    """计算文档内容与元数据的哈希，用于判断文档是否变化。"""
+    metadata = {
+        k: v for k, v in doc.metadata.items() if k not in _HASH_EXCLUDED_METADATA
+    }
+    payload = json.dumps(
+        {"page_content": doc.page_content, "metadata": metadata},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.md5(payload.encode()).hexdigest()
+
+
+def default_manifest_path(retriever_provider: str, index_name: str) -> str:
+    """返回某个向量库索引默认的清单文件路径。"""
+    return os.path.join(
+        ".cache", "index_manifest", f"{retriever_provider}-{index_name}.json"
+    )
+
+
+class IndexManifest:
+    """文档 id 到内容哈希的清单，按来源分组。"""
+
+    def __init__(self, path: Optional[str], sources: Optional[dict[str, dict[str, str]]] = None) -> None:
+        """初始化清单。
+
+        Args:
+            path (Optional[str]): 清单文件路径，为 None 时不落盘。
+            sources (Optional[dict[str, dict[str, str]]]): 来源 -> {文档 id: 内容哈希}。
+        """
+        self.path = path
+        self.sources = sources or {}
+
+    @classmethod
+    def load(cls, path: Optional[str]) -> "IndexManifest":
+        """从文件加载清单，文件不存在时返回空清单。"""
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return cls(path, json.load(f).get("sources", {}))
+        return cls(path)
+
+    def save(self) -> None:
+        """原子地写回清单文件。"""
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"sources": self.sources}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def changed(self, source: str, docs: Iterable[Document]) -> list[Document]:
+        """返回新增或内容变化的文档，并在元数据中写入 content_hash。"""
+        known = self.sources.get(source, {})
+        changed = []
+        for doc in docs:
+            doc.metadata["content_hash"] = content_hash(doc)
+            if known.get(doc.metadata["uuid"]) != doc.metadata["content_hash"]:
+                changed.append(doc)
+        return changed
+
+    def record(self, source: str, docs: Iterable[Document]) -> None:
+        """记录已经写入向量库的文档。"""
+        known = self.sources.setdefault(source, {})
+        for doc in docs:
+            known[doc.metadata["uuid"]] = doc.metadata.get("content_hash") or content_hash(doc)
+
+    def removed(self, source: str, seen_ids: set[str]) -> list[str]:
+        """返回清单中存在、但本次索引没有出现的文档 id。"""
+        if source == STATE_SOURCE:
+            return []
+        return [doc_id for doc_id in self.sources.get(source, {}) if doc_id not in seen_ids]
+
+    def forget(self, source: str, ids: Iterable[str]) -> None:
+        """从清单中移除已经从向量库删除的文档。"""
+        known = self.sources.get(source, {})
+        for doc_id in ids:
+            known.pop(doc_id, None)
@@ -0,0 +1,146 @@
+"""Per-run document budget for the researcher.
+
+Every step of a research plan retrieves documents for several queries, and without a
+budget all of them end up in the final prompt. Documents returned by finished steps are
+admitted into `SuperviserState.documents` here, in step order:
+
+    - exact duplicates (same id or same normalized text as an admitted document) are dropped;
+    - when `min_document_novelty` is set, documents whose novelty (1 - the highest cosine
+      similarity to an admitted document) is below it are dropped as near-duplicates;
+    - admission stops once `max_context_tokens` would be exceeded.
+
+Embedding-based novelty is measured when `min_document_novelty` is set or early
+termination needs it; otherwise every non-duplicate document counts as fully novel.
+
+Each step gets a report with its marginal novelty: the mean novelty of everything it
+retrieved, counting duplicates as zero.
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Any, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+from researcher_agent.configuration import ResearcherConfiguration
+from shared.chunking import estimate_tokens
+from shared.mmr import vector_cache
+from shared.multi_query import doc_key
+
+
+@dataclass
+class StepBudgetReport:
+    """What happened to the documents retrieved by one research step."""
+
+    step_index: int
+    step: str
+    retrieved: int = 0
+    kept: int = 0
+    duplicates: int = 0
+    low_novelty: int = 0
+    over_budget: int = 0
+    novelty: float = 0.0
+    """Mean novelty of the retrieved documents, duplicates counted as 0."""
+    tokens: int = 0
+    """Tokens of the admitted documents of this step."""
+
+    @property
+    def new_rate(self) -> float:
+        """Share of retrieved documents that were not exact duplicates."""
+        return 1 - self.duplicates / self.retrieved if self.retrieved else 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the report as a dict, with rounded novelty."""
+        return {
+            **asdict(self),
+            "novelty": round(self.novelty, 3),
+            "new_rate": round(self.new_rate, 3),
+        }
+
+
+def _normalized_text(doc: Document) -> str:
+    return " ".join(doc.page_content.split())
+
+
+async def _unit_vectors(
+    texts: list[str], configuration: ResearcherConfiguration
+) -> np.ndarray:
+    from shared.retrieval import make_text_encoder
+
+    vectors = await vector_cache.embed(
+        make_text_encoder(configuration.embedding_model),
+        configuration.embedding_model,
+        texts,
+    )
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+async def admit_documents(
+    kept: list[Document],
+    step_documents: list[tuple[int, str, list[Document]]],
+    configuration: ResearcherConfiguration,
+) -> tuple[list[Document], list[StepBudgetReport]]:
+    """Admit the documents of finished steps under the run's document budget.
+
+    Args:
+        kept (list[Document]): Documents admitted by earlier steps.
+        step_documents (list[tuple[int, str, list[Document]]]): (step index, step, documents) of the
+            steps that just finished, in any order; they are admitted by step index.
+        configuration (ResearcherConfiguration): Provides max_context_tokens, min_document_novelty
+            and the embedding model used to measure novelty.
+
+    Returns:
+        tuple[list[Document], list[StepBudgetReport]]: The newly admitted documents and one report per step.
+    """
+    step_documents = sorted(step_documents, key=lambda item: item[0])
+    candidates = [doc for _, _, docs in step_documents for doc in docs]
+    used_tokens = sum(estimate_tokens(doc.page_content) for doc in kept)
+    seen_keys = {doc_key(doc) for doc in kept}
+    seen_texts = {_normalized_text(doc) for doc in kept}
+
+    vectors: Optional[np.ndarray] = None
+    admitted_rows: list[int] = []
+    if (
+        configuration.min_document_novelty > 0 or configuration.early_termination
+    ) and candidates:
+        vectors = await _unit_vectors(
+            [doc.page_content for doc in kept + candidates], configuration
+        )
+        admitted_rows = list(range(len(kept)))
+
+    admitted: list[Document] = []
+    reports: list[StepBudgetReport] = []
+    row = len(kept)
+    for step_index, step, docs in step_documents:
+        report = StepBudgetReport(step_index=step_index, step=step, retrieved=len(docs))
+        novelty_sum = 0.0
+        for doc in docs:
+            key, text = doc_key(doc), _normalized_text(doc)
+            current = row
+            row += 1
+            if key in seen_keys or text in seen_texts:
+                report.duplicates += 1
+                continue
+            novelty = 1.0
+            if vectors is not None and admitted_rows:
+                novelty = 1.0 - float(np.max(vectors[admitted_rows] @ vectors[current]))
+            novelty_sum += novelty
+            if novelty < configuration.min_document_novelty:
+                report.low_novelty += 1
+                continue
+            tokens = estimate_tokens(doc.page_content)
+            if configuration.max_context_tokens and used_tokens + tokens > configuration.max_context_tokens:
+                report.over_budget += 1
+                continue
+            used_tokens += tokens
+            report.tokens += tokens
+            report.kept += 1
+            seen_keys.add(key)
+            seen_texts.add(text)
+            admitted.append(doc)
+            if vectors is not None:
+                admitted_rows.append(current)
+        report.novelty = novelty_sum / len(docs) if docs else 0.0
+        reports.append(report)
+    return admitted, reports
@@ -3,7 +3,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from typing import Annotated
+from typing import Annotated, Optional
 
 from researcher_agent import prompts
 from shared.configuration import BaseConfiguration
@@ -31,6 +31,112 @@ class ResearcherConfiguration(BaseConfiguration):
         },
     )
 
+    batch_retrieval: bool = field(
+        default=True,
+        metadata={
+            "description": "使用 Elasticsearch 时，是否把同一步骤的所有查询批量向量化并合并为一次 _msearch 请求，而不是每个查询单独检索。"
+        },
+    )
+
+    max_parallel_steps: int = field(
+        default=3,
+        metadata={
+            "description": "研究计划中同时执行的步骤数上限；互不依赖的步骤并发执行。"
+        },
+    )
+
+    max_context_tokens: int = field(
+        default=8000,
+        metadata={
+            "description": "一次研究中交给回答模型的文档总 token 数上限（估算），超出后不再收录新文档；0 表示不限制。"
+        },
+    )
+
+    min_document_novelty: float = field(
+        default=0.0,
+        metadata={
+            "description": "收录文档所需的最低新颖度（1 - 与已收录文档的最高余弦相似度），低于该值的近似重复文档被丢弃；0 表示不计算向量相似度，只去除完全重复的文档。"
+        },
+    )
+
+    speculative_retrieval: bool = field(
+        default=False,
+        metadata={
+            "description": "是否在生成研究计划的同时，直接用用户原问题检索，检索结果预先放入文档；各步骤生成的查询与原问题重合时不再重复检索。"
+        },
+    )
+
+    speculative_overlap: float = field(
+        default=0.8,
+        metadata={
+            "description": "步骤生成的查询与原问题的字符二元组 Jaccard 相似度达到该值时，视为已被预先检索覆盖。"
+        },
+    )
+
+    early_termination: bool = field(
+        default=False,
+        metadata={
+            "description": "是否在每批研究步骤完成后检测检索是否已饱和：新文档很少时，若已有文档足以覆盖问题则跳过剩余步骤，否则把剩余步骤合并为一步。"
+        },
+    )
+
+    saturation_novelty: float = field(
+        default=0.2,
+        metadata={
+            "description": "一批步骤检索到的文档平均新颖度低于该值时，认为剩余步骤带来的信息很少。"
+        },
+    )
+
+    saturation_coverage: float = field(
+        default=0.75,
+        metadata={
+            "description": "与问题最相近的几篇已收录文档的平均余弦相似度达到该值时，认为问题已被覆盖，可以跳过剩余步骤。"
+        },
+    )
+
+    progressive_report: bool = field(
+        default=False,
+        metadata={
+            "description": "是否在每个研究步骤完成后生成并流式输出该步骤的阶段性总结；最终回答合并这些总结，而不是重新阅读全部文档。"
+        },
+    )
+
+    plan_cache_enabled: bool = field(
+        default=False,
+        metadata={
+            "description": "是否缓存研究计划和每个步骤生成的查询：按归一化后的问题命中，提示词或模型变更后旧缓存自动失效，重复的问题可以跳过规划。"
+        },
+    )
+
+    plan_cache_path: str = field(
+        default=".cache/researcher/plan_cache.json",
+        metadata={"description": "研究计划缓存保存的本地 JSON 文件路径。"},
+    )
+
+    plan_cache_ttl: float = field(
+        default=86400.0,
+        metadata={"description": "研究计划缓存条目的有效期（秒）。"},
+    )
+
+    plan_cache_similarity: Optional[float] = field(
+        default=None,
+        metadata={
+            "description": "设置后，没有精确命中的问题可以复用与其向量余弦相似度不低于该值的已缓存问题的结果；为空时只按归一化后的问题精确匹配。"
+        },
+    )
+
+    plan_cache_max_entries: int = field(
+        default=1000,
+        metadata={"description": "研究计划缓存最多保留的条目数，超出时淘汰最早的条目。"},
+    )
+
+    mmr_top_k: int = field(
+        default=12,
+        metadata={
+            "description": "MMR 筛选后交给回答模型的文档数（各步骤、各查询合并后的文档）。"
+        },
+    )
+
     # prompts
     research_plan_system_prompt: str = field(
         default=prompts.RESEARCH_PLAN_SYSTEM_PROMPT,
@@ -46,6 +152,13 @@ class ResearcherConfiguration(BaseConfiguration):
         },
     )
 
+    partial_synthesis_system_prompt: str = field(
+        default=prompts.PARTIAL_SYNTHESIS_SYSTEM_PROMPT,
+        metadata={
+            "description": "The system prompt used in progressive mode to summarize the documents of one research step."
+        },
+    )
+
     response_system_prompt: str = field(
         default=prompts.RESPONSE_SYSTEM_PROMPT,
         metadata={"description": "The system prompt used for generating responses."},
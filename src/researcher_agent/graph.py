@@ -3,43 +3,159 @@
 This module defines the core structure and functionality of the researcher graph,
 which is responsible for generating search queries and retrieving relevant documents.
 """
+import logging
 from typing import Any, Literal, TypedDict, cast
 
+from langchain_core.documents import Document
 from langchain_core.runnables import RunnableConfig
 from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.config import get_stream_writer
 from langgraph.graph import END, START, StateGraph
+from langgraph.types import Send
 
+from researcher_agent.budget import StepBudgetReport, admit_documents
 from researcher_agent.configuration import ResearcherConfiguration
-from researcher_agent.state import SuperviserState
+from researcher_agent.plan_cache import acached, prompt_version
+from researcher_agent.saturation import check_saturation
+from researcher_agent.state import QueryState, StepState, SuperviserState
 from researcher_agent.sub_graph import graph as researcher_graph
-from shared.utils import load_chat_model, format_docs
+from researcher_agent.sub_graph import retrieve_documents
+from shared.mmr import mmr_documents
+from shared.utils import format_docs, get_message_text, load_chat_model
+
+logger = logging.getLogger(__name__)
+
+MAX_PLAN_STEPS = 20
+"""Longest research plan that is run; later steps are dropped."""
+
+RECURSION_LIMIT = 2 * MAX_PLAN_STEPS + 5
+"""Supersteps needed by a fully sequential plan of MAX_PLAN_STEPS steps.
+
+Planning, the first join and the response take one superstep each, and every wave takes
+two (`conduct_research`, then `schedule_research`), so LangGraph's default limit of 25
+would stop a linear plan of about a dozen steps.
+"""
+
+
+class PlanStep(TypedDict):
+    """One step of the research plan."""
+
+    step: str
+    depends_on: list[int]
+
+
+def _parse_plan(steps: list[Any]) -> tuple[list[str], list[list[int]]]:
+    """Split planned steps into their texts and 0-based dependency indexes.
+
+    Steps may come back as plain strings. Dependencies are 1-based step numbers and only
+    earlier steps are kept, so the plan is always a DAG. Steps beyond `MAX_PLAN_STEPS` are dropped.
+    """
+    texts: list[str] = []
+    dependencies: list[list[int]] = []
+    for i, item in enumerate(steps[:MAX_PLAN_STEPS]):
+        if isinstance(item, str):
+            item = {"step": item}
+        texts.append(item["step"])
+        dependencies.append(
+            sorted({n - 1 for n in item.get("depends_on") or [] if 1 <= n <= i})
+        )
+    return texts, dependencies
 
 
 async def create_research_plan(
     state: SuperviserState, *, config: RunnableConfig
-) -> dict[str, list[str] | str]:
+) -> dict[str, Any]:
     """Create a step-by-step research plan for answering a LangChain-related query.
 
+    Each step may depend on earlier steps; steps without pending dependencies are researched in parallel.
+    With `plan_cache_enabled`, a conversation that was already planned reuses its cached plan.
+
     Args:
         state (AgentState): The current state of the agent, including conversation history.
         config (RunnableConfig): Configuration with the model used to generate the plan.
 
     Returns:
-        dict[str, list[str]]: A dictionary with a 'steps' key containing the list of research steps.
+        dict[str, Any]: A dictionary with the 'steps' of the plan and their 'step_dependencies'.
     """
 
     class Plan(TypedDict):
         """Generate research plan."""
 
-        steps: list[str]
+        steps: list[PlanStep]
 
     configuration = ResearcherConfiguration.from_runnable_config(config)
-    model = load_chat_model(configuration.query_model).with_structured_output(Plan)
-    messages = [
-            {"role": "system", "content": configuration.research_plan_system_prompt}
-        ] + state.messages
-    response = cast(Plan, await model.ainvoke(messages))
-    return {"steps": response["steps"], "documents": "delete"}
+
+    async def plan() -> list[Any]:
+        model = load_chat_model(configuration.query_model).with_structured_output(Plan)
+        messages = [
+                {"role": "system", "content": configuration.research_plan_system_prompt}
+            ] + state.messages
+        response = cast(Plan, await model.ainvoke(messages))
+        return list(response["steps"])
+
+    conversation = "\n".join(get_message_text(message) for message in state.messages)
+    version = prompt_version(
+        configuration.research_plan_system_prompt, configuration.query_model
+    )
+    raw_steps = await acached("plan", conversation, version, configuration, plan)
+    steps, dependencies = _parse_plan(raw_steps)
+    return {
+        "steps": steps,
+        "step_dependencies": dependencies,
+        "completed_steps": "delete",
+        "step_syntheses": "delete",
+        "step_documents": "delete",
+        "document_budget": [],
+        "skipped_steps": [],
+        "documents": "delete",
+    }
+
+async def speculative_retrieve(
+    state: SuperviserState, *, config: RunnableConfig
+) -> dict[str, Any]:
+    """Retrieve documents for the raw question while the research plan is generated.
+
+    Runs in parallel with `create_research_plan`. The results seed `documents` before the
+    first step runs, and steps skip generated queries that overlap the raw question.
+    In progressive mode, the results are also summarized here (streamed as step -1), since
+    the final answer only reads the partial syntheses and steps do not retrieve them again.
+    Does nothing unless `speculative_retrieval` is enabled.
+
+    Args:
+        state (SuperviserState): The current state of the agent, including conversation history.
+        config (RunnableConfig): Configuration with the retriever.
+
+    Returns:
+        dict[str, Any]: The 'speculative_query', its 'speculative_documents' and, in progressive
+        mode, their 'speculative_synthesis' (all empty when disabled).
+    """
+    configuration = ResearcherConfiguration.from_runnable_config(config)
+    if not configuration.speculative_retrieval:
+        return {
+            "speculative_query": "",
+            "speculative_documents": [],
+            "speculative_synthesis": "",
+        }
+    question = get_message_text(state.messages[-1])
+    result = await retrieve_documents(QueryState(query=question), config=config)
+    summary = ""
+    if configuration.progressive_report and result["documents"]:
+        summary = await synthesize_step(question, result["documents"], configuration)
+        get_stream_writer()(
+            {
+                "researcher_step": {
+                    "step_index": -1,
+                    "step": question,
+                    "documents": len(result["documents"]),
+                    "summary": summary,
+                }
+            }
+        )
+    return {
+        "speculative_query": question,
+        "speculative_documents": result["documents"],
+        "speculative_synthesis": summary,
+    }
 
 # def propose_action(state: SuperviserState) -> SuperviserState:
 #     """ 提出一个需要人工审批的操作 """
@@ -69,44 +185,236 @@ async def create_research_plan(
 #     """ 修改被拒绝的操作 """
 #     return {"proposed_action_details": f"需要重新修改计划"}
 
-async def conduct_research(state: SuperviserState, *, config: RunnableConfig) -> dict[str, Any]:
-    """Execute the first step of the research plan.
-
-    This function takes the first step from the research plan and uses it to conduct research.
+async def conduct_research(state: StepState, *, config: RunnableConfig) -> dict[str, Any]:
+    """Execute one step of the research plan.
 
     Args:
-        state (AgentState): The current state of the agent, including the research plan steps.
+        state (StepState): The step to research and its index in the plan.
+        config (RunnableConfig): Configuration for the researcher subgraph and the partial synthesis.
 
     Returns:
-        dict[str, list[str]]: A dictionary with 'documents' containing the research results and
-                              'steps' containing the remaining research steps.
+        dict[str, Any]: A dictionary with 'step_documents' containing the research results, which
+                        `schedule_research` admits under the document budget, and 'completed_steps'
+                        containing the index of the finished step. In progressive mode,
+                        'step_syntheses' also holds the partial synthesis of the step.
 
     Behavior:
-        - Invokes the researcher_graph with the first step of the research plan.
-        - Updates the state with the retrieved documents and removes the completed step.
+        - Invokes the researcher_graph with the step of the research plan.
+        - Several steps run concurrently when `dispatch_steps` sends them in the same wave.
+        - In progressive mode, summarizes the step's documents right away and streams the
+          summary as a custom event, so the client sees findings before the plan finishes.
+    """
+    # 【关键】采用子图执行研究的一步，并且在状态中记录已经完成的步骤
+    result = await researcher_graph.ainvoke(
+        {"question": state.step, "covered_queries": state.covered_queries},
+        config=config,
+    )
+    update: dict[str, Any] = {
+        "step_documents": {state.step_index: result["documents"]},
+        "completed_steps": [state.step_index],
+    }
+    configuration = ResearcherConfiguration.from_runnable_config(config)
+    # 所有查询都已被预先检索覆盖的步骤没有文档，其内容已在预先检索的总结中
+    if configuration.progressive_report and result["documents"]:
+        summary = await synthesize_step(state.step, result["documents"], configuration)
+        get_stream_writer()(
+            {
+                "researcher_step": {
+                    "step_index": state.step_index,
+                    "step": state.step,
+                    "documents": len(result["documents"]),
+                    "summary": summary,
+                }
+            }
+        )
+        update["step_syntheses"] = {state.step_index: summary}
+    return update
+
+
+async def synthesize_step(
+    step: str, documents: list[Document], configuration: ResearcherConfiguration
+) -> str:
+    """Write a short partial synthesis of the documents retrieved for one research step.
+
+    Uses the query model, which is usually smaller and faster than the response model.
     """
-    # 【关键】采用子图执行研究的一步，并且在状态中移除已经完成的步骤
-    result = await researcher_graph.ainvoke({"question": state.steps[0]}, config=config)
-    return {"documents": result["documents"], "steps": state.steps[1:]}
+    documents = await mmr_documents(step, documents, configuration)
+    prompt = configuration.partial_synthesis_system_prompt.format(
+        step=step, context=format_docs(documents)
+    )
+    model = load_chat_model(configuration.query_model)
+    response = await model.ainvoke([{"role": "system", "content": prompt}])
+    return get_message_text(response)
+
+
+def _skipped(state: SuperviserState) -> set[int]:
+    return {s["step_index"] for s in state.skipped_steps}
+
+
+def ready_steps(state: SuperviserState) -> list[int]:
+    """Return the indexes of the unfinished, not skipped steps whose dependencies have all finished."""
+    done = set(state.completed_steps)
+    skipped = _skipped(state)
+    return [
+        i
+        for i in range(len(state.steps))
+        if i not in done
+        and i not in skipped
+        and all(
+            d in done
+            for d in (
+                state.step_dependencies[i] if i < len(state.step_dependencies) else []
+            )
+        )
+    ]
 
-def check_finished(state: SuperviserState) -> Literal["respond", "conduct_research"]:
-    """Determine if the research process is complete or if more research is needed.
 
-    This function checks if there are any remaining steps in the research plan:
-        - If there are, route back to the `conduct_research` node
-        - Otherwise, route to the `respond` node
+async def schedule_research(
+    state: SuperviserState, *, config: RunnableConfig
+) -> dict[str, Any]:
+    """Join the research steps of a wave before the next ones are dispatched.
+
+    Documents returned by the steps of the wave, and on the first call the results of the
+    speculative retrieval, are admitted into `documents` under the run's document budget (see `researcher_agent.budget`), and the per-step report is
+    appended to `document_budget`. With early termination enabled, the remaining steps are
+    then skipped or merged into one once retrieval is saturated (see `researcher_agent.saturation`),
+    and recorded in `skipped_steps` with the reason.
 
     Args:
-        state (SuperviserState): The current state of the agent, including the remaining research steps.
+        state (SuperviserState): The current state, including the documents of the finished steps.
+        config (RunnableConfig): Configuration with the document budget.
 
     Returns:
-        Literal["respond", "conduct_research"]: The next step to take based on whether research is complete.
+        dict[str, Any]: The admitted 'documents', the updated 'document_budget' report and, when
+        the plan is cut short, the updated 'steps', 'step_dependencies' and 'skipped_steps'.
     """
-    # 检查是否还有未完成的研究步骤，没有的话继续执行，完成的话进行respond
-    if len(state.steps or []) > 0:
-        return "conduct_research"
-    else:
+    step_documents = [
+        (i, state.steps[i] if i < len(state.steps) else "", docs)
+        for i, docs in state.step_documents.items()
+    ]
+    update: dict[str, Any] = {}
+    if state.speculative_documents:
+        # 预先检索的结果作为序号为 -1 的步骤最先收录
+        step_documents.append(
+            (-1, state.speculative_query, state.speculative_documents)
+        )
+        update["speculative_documents"] = []
+    if not step_documents:
+        return {}
+    configuration = ResearcherConfiguration.from_runnable_config(config)
+    admitted, reports = await admit_documents(
+        state.documents, step_documents, configuration
+    )
+    report = [r.as_dict() for r in reports]
+    logger.info("文档预算: %s", report)
+    update.update(
+        {
+            "documents": admitted,
+            "step_documents": "delete",
+            "document_budget": state.document_budget + report,
+        }
+    )
+    if configuration.early_termination:
+        update.update(
+            await _stop_if_saturated(
+                state, [*state.documents, *admitted], reports, configuration
+            )
+        )
+    return update
+
+
+async def _stop_if_saturated(
+    state: SuperviserState,
+    documents: list[Document],
+    reports: list[StepBudgetReport],
+    configuration: ResearcherConfiguration,
+) -> dict[str, Any]:
+    """Skip or merge the remaining steps when the last wave added little."""
+    done, skipped = set(state.completed_steps), _skipped(state)
+    remaining = [
+        i for i in range(len(state.steps)) if i not in done and i not in skipped
+    ]
+    decision = await check_saturation(
+        get_message_text(state.messages[-1]),
+        documents,
+        reports,
+        len(remaining),
+        configuration,
+    )
+    if decision.action == "continue":
+        return {}
+    logger.info(
+        "研究提前结束: %s %d 个步骤，%s", decision.action, len(remaining), decision.reason
+    )
+    if decision.action == "skip":
+        return {
+            "skipped_steps": state.skipped_steps
+            + [
+                {"step_index": i, "step": state.steps[i], "reason": decision.reason}
+                for i in remaining
+            ]
+        }
+
+    first = remaining[0]
+    steps = list(state.steps)
+    steps[first] = "; ".join(state.steps[i] for i in remaining)
+    dependencies = [list(d) for d in state.step_dependencies]
+    dependencies[first] = sorted(
+        {d for i in remaining for d in state.step_dependencies[i]} - set(remaining)
+    )
+    return {
+        "steps": steps,
+        "step_dependencies": dependencies,
+        "skipped_steps": state.skipped_steps
+        + [
+            {
+                "step_index": i,
+                "step": state.steps[i],
+                "reason": f"{decision.reason}; merged into step {first + 1}",
+            }
+            for i in remaining[1:]
+        ],
+    }
+
+
+def dispatch_steps(
+    state: SuperviserState, *, config: RunnableConfig
+) -> list[Send] | Literal["respond"]:
+    """Fan out the research steps that are ready to run.
+
+    All unfinished steps whose prerequisites are done are sent to `conduct_research` in the
+    same wave, at most `max_parallel_steps` at a time. When no step is left, route to `respond`.
+
+    Waves are LangGraph supersteps, so they are barriers: the next wave is dispatched only after
+    every step of the current one has finished, even if a later step only depends on a step that
+    finished early. This is what lets `schedule_research` admit documents and check saturation
+    once per wave. Each wave costs two supersteps, hence the graph's `RECURSION_LIMIT`.
+
+    Args:
+        state (SuperviserState): The current state of the agent, including the plan and the finished steps.
+        config (RunnableConfig): Configuration with the parallelism cap.
+
+    Returns:
+        list[Send] | Literal["respond"]: The steps to research next, or "respond" when research is complete.
+    """
+    configuration = ResearcherConfiguration.from_runnable_config(config)
+    ready = ready_steps(state)
+    if not ready:
         return "respond"
+    return [
+        Send(
+            "conduct_research",
+            StepState(
+                step_index=i,
+                step=state.steps[i],
+                covered_queries=[state.speculative_query]
+                if state.speculative_query
+                else [],
+            ),
+        )
+        for i in ready[: max(1, configuration.max_parallel_steps)]
+    ]
+
 
 async def respond(
     state: SuperviserState, *, config: RunnableConfig
@@ -114,6 +422,11 @@ async def respond(
     """Generate a final response to the user's query based on the conducted research.
 
     This function formulates a comprehensive answer using the conversation history and the documents retrieved by the researcher.
+    When MMR is enabled, near-duplicate documents merged from several steps and queries are
+    dropped first, keeping `mmr_top_k` diverse documents relevant to the latest user message.
+    In progressive mode, the partial syntheses of the steps, and of the speculative retrieval,
+    are merged instead, so the final prompt holds one short summary per step rather than
+    every retrieved document.
 
     Args:
         state (SuperviserState): The current state of the agent, including retrieved documents and conversation history.
@@ -124,7 +437,27 @@ async def respond(
     """
     configuration = ResearcherConfiguration.from_runnable_config(config)
     model = load_chat_model(configuration.response_model)
-    context = format_docs(state.documents)
+    if configuration.progressive_report and (
+        state.step_syntheses or state.speculative_synthesis
+    ):
+        documents = [
+            Document(page_content=summary, metadata={"step": state.steps[i]})
+            for i, summary in sorted(state.step_syntheses.items())
+            if 0 <= i < len(state.steps)
+        ]
+        if state.speculative_synthesis:
+            documents.insert(
+                0,
+                Document(
+                    page_content=state.speculative_synthesis,
+                    metadata={"step": state.speculative_query},
+                ),
+            )
+    else:
+        documents = await mmr_documents(
+            get_message_text(state.messages[-1]), state.documents, configuration
+        )
+    context = format_docs(documents)
     prompt = configuration.response_system_prompt.format(context=context)
     messages = [{"role": "system", "content": prompt}] + state.messages
     response = await model.ainvoke(messages)
@@ -134,16 +467,20 @@ async def respond(
 # Define the graph
 builder = StateGraph(SuperviserState)
 builder.add_node(create_research_plan)
+builder.add_node(speculative_retrieve)
+builder.add_node(schedule_research)
 builder.add_node(conduct_research)
 builder.add_node(respond)
 builder.add_edge(START, "create_research_plan")
-builder.add_edge("create_research_plan", "conduct_research")
+builder.add_edge(START, "speculative_retrieve")
+builder.add_edge(["create_research_plan", "speculative_retrieve"], "schedule_research")
 builder.add_conditional_edges(
-    "conduct_research",
-    check_finished,
-    path_map={"respond": "respond", "conduct_research": "conduct_research"},
+    "schedule_research",
+    dispatch_steps,  # type: ignore
+    path_map=["conduct_research", "respond"],
 )
+builder.add_edge("conduct_research", "schedule_research")
 builder.add_edge("respond", END)
 # Compile into a graph object that you can invoke and deploy.
-graph = builder.compile()
+graph = builder.compile().with_config(recursion_limit=RECURSION_LIMIT)
 graph.name = "ResearchAgent"
@@ -0,0 +1,334 @@
+"""Cache of research plans and generated queries.
+
+Equivalent questions produce the same plan, and the same research step produces the same
+queries, yet each costs a structured-output LLM call. Outputs are cached per kind
+("plan" or "queries") under:
+
+    - the normalized question (see `shared.utils.normalize_question`);
+    - a version hashed from the system prompt and the model, so editing a prompt or switching
+      models invalidates the old entries.
+
+When `plan_cache_similarity` is set, a question without an exact match may also reuse the
+entry of the most similar cached question of the same kind and version, if their embedding
+cosine similarity reaches the threshold. The question is only embedded after the exact
+lookup misses, so repeated questions never wait for the embedding model.
+
+Entries expire after `plan_cache_ttl` seconds and are stored in a local JSON file, with
+their question vectors in a float32 `.npz` sidecar, so they survive restarts. Writes are
+batched: a miss only updates memory, and the files are rewritten in a worker thread at most
+once per `flush_delay` seconds (and once more at interpreter exit), never on the event loop.
+"""
+
+import asyncio
+import atexit
+import hashlib
+import json
+import os
+import threading
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+import numpy as np
+
+from researcher_agent.configuration import ResearcherConfiguration
+from shared.utils import normalize_question
+
+CacheKey = tuple[str, str, str]
+"""(kind, version, normalized question)"""
+
+
+def prompt_version(*parts: str) -> str:
+    """Return a short hash of the prompt and model that produced a cached output."""
+    return hashlib.sha256("\x00".join(parts).encode()).hexdigest()[:16]
+
+
+def _entry_id(key: CacheKey) -> str:
+    return hashlib.sha1("\x00".join(key).encode()).hexdigest()
+
+
+class PlanCache:
+    """Thread-safe cache of LLM outputs keyed by normalized question, persisted to local files."""
+
+    def __init__(
+        self, path: Optional[str], max_entries: int = 1000, flush_delay: float = 1.0
+    ) -> None:
+        """Initialize the cache.
+
+        Args:
+            path (Optional[str]): JSON file the entries are stored in; vectors go to `<path>.vectors.npz`.
+                None keeps them in memory only.
+            max_entries (int): Maximum number of entries; the oldest are evicted first.
+            flush_delay (float): Seconds to wait after a write before persisting, so that
+                writes made in the meantime are saved together.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.flush_delay = flush_delay
+        self._entries: dict[CacheKey, dict[str, Any]] = {}
+        self._vectors: dict[CacheKey, np.ndarray] = {}
+        self._loaded = False
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self.hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        _instances.add(self)
+
+    @property
+    def vectors_path(self) -> Optional[str]:
+        """Sidecar file holding the question vectors."""
+        return f"{self.path}.vectors.npz" if self.path else None
+
+    def _load(self) -> None:
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            if not self.path or not os.path.exists(self.path):
+                return
+            with open(self.path) as f:
+                entries = json.load(f).get("entries", [])
+            vectors: dict[str, np.ndarray] = {}
+            if self.vectors_path and os.path.exists(self.vectors_path):
+                with np.load(self.vectors_path) as archive:
+                    vectors = {name: archive[name] for name in archive.files}
+            for entry in entries:
+                key = (entry["kind"], entry["version"], entry["question"])
+                self._entries[key] = entry
+                vector = vectors.get(_entry_id(key))
+                if vector is not None:
+                    self._vectors[key] = vector
+
+    async def aload(self) -> None:
+        """Read the cache files in a worker thread, once."""
+        if not self._loaded:
+            await asyncio.to_thread(self._load)
+
+    def get(
+        self, kind: str, version: str, question: str, *, ttl: float
+    ) -> Optional[Any]:
+        """Return the output cached for the normalized question, or None (counted as a miss)."""
+        self._load()
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get((kind, version, normalize_question(question)))
+            if entry is not None and now - entry["created"] <= ttl:
+                self.hits += 1
+                return entry["value"]
+            self.misses += 1
+            return None
+
+    def get_similar(
+        self,
+        kind: str,
+        version: str,
+        vector: Sequence[float],
+        *,
+        vector_model: str,
+        ttl: float,
+        threshold: float,
+    ) -> Optional[Any]:
+        """Return the output of the most similar unexpired question of the same kind and version.
+
+        Only questions embedded by the same `vector_model` are compared; the match must have a
+        cosine similarity of at least `threshold`.
+        """
+        self._load()
+        query = np.asarray(vector, dtype=np.float32)
+        now = time.time()
+        with self._lock:
+            keys = [
+                key
+                for key, entry in self._entries.items()
+                if key[0] == kind
+                and key[1] == version
+                and entry.get("vector_model") == vector_model
+                and key in self._vectors
+                and self._vectors[key].shape == query.shape
+                and now - entry["created"] <= ttl
+            ]
+            if not keys:
+                return None
+            matrix = np.stack([self._vectors[key] for key in keys])
+            norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1)
+            similarities = matrix @ query / np.where(norms == 0, 1, norms)
+            best = int(np.argmax(similarities))
+            if similarities[best] < threshold:
+                return None
+            self.similar_hits += 1
+            return self._entries[keys[best]]["value"]
+
+    def put(
+        self,
+        kind: str,
+        version: str,
+        question: str,
+        value: Any,
+        *,
+        vector: Optional[Sequence[float]] = None,
+        vector_model: Optional[str] = None,
+    ) -> None:
+        """Store an output in memory, evicting the oldest entries beyond max_entries.
+
+        The files are only rewritten by `save`, `aflush` or the flush scheduled by `schedule_flush`.
+        """
+        self._load()
+        key = (kind, version, normalize_question(question))
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = {
+                "kind": kind,
+                "version": version,
+                "question": key[2],
+                "value": value,
+                "created": time.time(),
+                "vector_model": vector_model if vector is not None else None,
+            }
+            self._vectors.pop(key, None)
+            if vector is not None:
+                self._vectors[key] = np.asarray(vector, dtype=np.float32)
+            while len(self._entries) > max(1, self.max_entries):
+                oldest = next(iter(self._entries))
+                del self._entries[oldest]
+                self._vectors.pop(oldest, None)
+            self._dirty = True
+
+    def save(self) -> None:
+        """Write the cache files if anything changed since the last save (blocking)."""
+        if not self.path:
+            return
+        with self._save_lock:
+            with self._lock:
+                if not self._dirty:
+                    return
+                entries = list(self._entries.values())
+                vectors = {_entry_id(key): vector for key, vector in self._vectors.items()}
+                self._dirty = False
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            tmp_path = f"{self.vectors_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                np.savez(f, **vectors)
+            os.replace(tmp_path, self.vectors_path)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"entries": entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+
+    async def aflush(self) -> None:
+        """Write pending changes in a worker thread."""
+        if self._dirty and self.path:
+            await asyncio.to_thread(self.save)
+
+    def schedule_flush(self) -> None:
+        """Persist pending changes after `flush_delay`, unless a flush is already scheduled."""
+        loop = asyncio.get_running_loop()
+        task = self._flush_task
+        if not self.path or (task and not task.done() and task.get_loop() is loop):
+            return
+
+        async def flush_later() -> None:
+            await asyncio.sleep(self.flush_delay)
+            await self.aflush()
+
+        self._flush_task = loop.create_task(flush_later())
+
+    def metrics(self) -> dict[str, Any]:
+        """Return hit and miss counters.
+
+        `misses` counts exact-key misses; `similar_hits` counts those served by a similar question.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.similar_hits) / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+
+_instances: "weakref.WeakSet[PlanCache]" = weakref.WeakSet()
+_caches: dict[Optional[str], PlanCache] = {}
+_caches_lock = threading.Lock()
+
+
+@atexit.register
+def _save_all() -> None:
+    """Persist writes whose scheduled flush did not run before the interpreter exits."""
+    for cache in list(_instances):
+        cache.save()
+
+
+def get_plan_cache(path: Optional[str], max_entries: int = 1000) -> PlanCache:
+    """Return the process-wide cache stored at `path`."""
+    with _caches_lock:
+        cache = _caches.get(path)
+        if cache is None:
+            cache = _caches[path] = PlanCache(path, max_entries)
+        cache.max_entries = max_entries
+        return cache
+
+
+async def acached(
+    kind: str,
+    question: str,
+    version: str,
+    configuration: ResearcherConfiguration,
+    produce: Callable[[], Awaitable[Any]],
+) -> Any:
+    """Return the cached output for the question, or call `produce` and cache its result.
+
+    The exact normalized question is looked up first; only on a miss, and only when
+    `plan_cache_similarity` is set, is the question embedded to look for a similar one.
+
+    Args:
+        kind (str): What is cached, e.g. "plan" or "queries".
+        question (str): The question or research step the output was generated for.
+        version (str): `prompt_version` of the prompt and model used by `produce`.
+        configuration (ResearcherConfiguration): Cache settings and the embedding model.
+        produce (Callable[[], Awaitable[Any]]): Generates the output on a miss; it must be JSON-serializable.
+
+    Returns:
+        Any: The cached or freshly generated output.
+    """
+    if not configuration.plan_cache_enabled:
+        return await produce()
+    cache = get_plan_cache(
+        configuration.plan_cache_path, configuration.plan_cache_max_entries
+    )
+    await cache.aload()
+    ttl = configuration.plan_cache_ttl
+    cached = cache.get(kind, version, question, ttl=ttl)
+    if cached is not None:
+        return cached
+
+    vector = None
+    if configuration.plan_cache_similarity is not None:
+        from shared.retrieval import make_text_encoder
+
+        embeddings = make_text_encoder(configuration.embedding_model)
+        vector = await embeddings.aembed_query(normalize_question(question))
+        cached = cache.get_similar(
+            kind,
+            version,
+            vector,
+            vector_model=configuration.embedding_model,
+            ttl=ttl,
+            threshold=configuration.plan_cache_similarity,
+        )
+        if cached is not None:
+            return cached
+    value = await produce()
+    cache.put(
+        kind,
+        version,
+        question,
+        value,
+        vector=vector,
+        vector_model=configuration.embedding_model,
+    )
+    cache.schedule_flush()
+    return value
@@ -77,7 +77,10 @@ You have access to the following documentation sources:
 - Integration docs
 - How-to guides
 
-You do not need to specify where you want to research for all steps of the plan, but it's sometimes helpful."""
+You do not need to specify where you want to research for all steps of the plan, but it's sometimes helpful.
+
+Steps are researched in parallel. For each step, list in `depends_on` the numbers (starting at 1) of the earlier steps \
+that must be researched before it; leave it empty when the step can be researched on its own."""
 
 RESPONSE_SYSTEM_PROMPT = """\
 You are an expert programmer and problem-solver, tasked with answering any question \
@@ -116,6 +119,19 @@ bank, not part of the conversation with the user.
 
 # Researcher graph
 
+PARTIAL_SYNTHESIS_SYSTEM_PROMPT = """\
+You are summarizing the findings of one step of a research plan. The step is:
+
+{step}
+
+Using only the search results in the `context` block below, write a few concise bullet points \
+with the facts that are relevant to this step. Keep the citations of the results you use, \
+using the [${{number}}] notation. If nothing in the context is relevant, say so in one sentence.
+
+<context>
+    {context}
+<context/>"""
+
 GENERATE_QUERIES_SYSTEM_PROMPT = """\
 Generate 3 search queries to search for to answer the user's question. \
 These search queries should be diverse in nature - do not generate \
@@ -0,0 +1,103 @@
+"""Early termination of research plans once retrieval is saturated.
+
+After each wave of steps, the researcher checks whether the remaining steps are likely to
+add anything:
+
+    - novelty: the marginal novelty of the wave that just finished (from the document budget
+      report), i.e. how much of what it retrieved was new;
+    - coverage: how close the admitted documents are to the question in embedding space,
+      the mean cosine similarity of the `coverage_top_k` closest documents.
+
+When the wave's novelty falls below `saturation_novelty`, the remaining steps are skipped if
+coverage has reached `saturation_coverage`, and otherwise merged into a single step, so they
+cost one subgraph run instead of several. A wave that retrieved nothing carries no signal
+about saturation, so the plan continues.
+"""
+
+from dataclasses import dataclass
+from typing import Literal, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+
+from researcher_agent.budget import StepBudgetReport
+from researcher_agent.configuration import ResearcherConfiguration
+from shared.mmr import vector_cache
+
+
+@dataclass
+class SaturationDecision:
+    """What to do with the remaining steps of the plan."""
+
+    action: Literal["continue", "skip", "merge"]
+    novelty: Optional[float]
+    coverage: float
+
+    @property
+    def reason(self) -> str:
+        """Human-readable reason recorded for skipped or merged steps."""
+        return f"saturated: novelty {self.novelty:.2f}, coverage {self.coverage:.2f}"
+
+
+def wave_novelty(reports: Sequence[StepBudgetReport]) -> Optional[float]:
+    """Return the marginal novelty of a wave, weighted by the documents each step retrieved.
+
+    Returns None when the wave retrieved no documents, since there is nothing to measure.
+    """
+    retrieved = sum(r.retrieved for r in reports)
+    if not retrieved:
+        return None
+    return sum(r.novelty * r.retrieved for r in reports) / retrieved
+
+
+async def question_coverage(
+    question: str,
+    documents: list[Document],
+    configuration: ResearcherConfiguration,
+    top_k: int = 3,
+) -> float:
+    """Return the mean cosine similarity between the question and its `top_k` closest documents."""
+    if not documents:
+        return 0.0
+    from shared.retrieval import make_text_encoder
+
+    embeddings = make_text_encoder(configuration.embedding_model)
+    query = np.asarray(await embeddings.aembed_query(question), dtype=np.float32)
+    vectors = await vector_cache.embed(
+        embeddings,
+        configuration.embedding_model,
+        [doc.page_content for doc in documents],
+    )
+    norms = np.linalg.norm(vectors, axis=1) * (np.linalg.norm(query) or 1)
+    similarities = vectors @ query / np.where(norms == 0, 1, norms)
+    return float(np.mean(np.sort(similarities)[-top_k:]))
+
+
+async def check_saturation(
+    question: str,
+    documents: list[Document],
+    reports: Sequence[StepBudgetReport],
+    remaining: int,
+    configuration: ResearcherConfiguration,
+) -> SaturationDecision:
+    """Decide whether the remaining steps should run, be skipped, or be merged.
+
+    Args:
+        question (str): The user's question.
+        documents (list[Document]): All documents admitted so far.
+        reports (Sequence[StepBudgetReport]): Budget reports of the wave that just finished.
+        remaining (int): Number of steps that have neither run nor been skipped.
+        configuration (ResearcherConfiguration): Provides the saturation thresholds.
+
+    Returns:
+        SaturationDecision: "continue", "skip" or "merge", with the measured novelty and coverage.
+    """
+    novelty = wave_novelty(reports)
+    if not remaining or novelty is None or novelty >= configuration.saturation_novelty:
+        return SaturationDecision("continue", novelty, 0.0)
+    coverage = await question_coverage(question, documents, configuration)
+    if coverage >= configuration.saturation_coverage:
+        return SaturationDecision("skip", novelty, coverage)
+    if remaining > 1:
+        return SaturationDecision("merge", novelty, coverage)
+    return SaturationDecision("continue", novelty, coverage)
@@ -4,7 +4,7 @@ This module defines the state structures used in the researcher graph.
 """
 
 from dataclasses import dataclass, field
-from typing import Annotated
+from typing import Annotated, Any, Literal, TypeVar, Union
 from langchain_core.messages import AnyMessage
 from langchain_core.documents import Document
 from langgraph.graph import add_messages
@@ -18,6 +18,37 @@ class QueryState:
     query: str
 
 
+@dataclass(kw_only=True)
+class StepState:
+    """Private state for the conduct_research node: one step of the research plan."""
+
+    step_index: int
+    step: str
+    covered_queries: list[str] = field(default_factory=list)
+    """Queries already retrieved speculatively; the step does not retrieve them again."""
+
+
+def reduce_completed_steps(
+    existing: list[int], new: Union[list[int], Literal["delete"]]
+) -> list[int]:
+    """Add newly completed step indexes; "delete" clears them for a new plan."""
+    if new == "delete":
+        return []
+    return sorted(set(existing or []) | set(new))
+
+
+V = TypeVar("V")
+
+
+def reduce_by_step(
+    existing: dict[int, V], new: Union[dict[int, V], Literal["delete"]]
+) -> dict[int, V]:
+    """Merge per-step values keyed by step index; "delete" clears them."""
+    if new == "delete":
+        return {}
+    return {**(existing or {}), **new}
+
+
 @dataclass(kw_only=True)
 class ResearcherState:
     """State of the researcher graph / agent."""
@@ -26,6 +57,8 @@ class ResearcherState:
     """A step in the research plan generated by the retriever agent."""
     queries: list[str] = field(default_factory=list)
     """A list of search queries based on the question that the researcher generates."""
+    covered_queries: list[str] = field(default_factory=list)
+    """Queries whose results are already known; overlapping generated queries are dropped."""
     documents: Annotated[list[Document], reduce_docs] = field(default_factory=list)
     """Populated by the retriever. This is a list of documents that the agent can reference."""
 
@@ -39,6 +72,30 @@ class SuperviserState:
 
     steps: list[str] = field(default_factory=list)
     """A list of steps in the research plan."""
+    step_dependencies: list[list[int]] = field(default_factory=list)
+    """For each step, the indexes of the earlier steps it depends on."""
+    completed_steps: Annotated[list[int], reduce_completed_steps] = field(
+        default_factory=list
+    )
+    """Indexes of the steps that have been researched."""
+    step_syntheses: Annotated[dict[int, str], reduce_by_step] = field(
+        default_factory=dict
+    )
+    """In progressive mode, the partial synthesis written for each finished step."""
+    step_documents: Annotated[dict[int, list[Document]], reduce_by_step] = field(
+        default_factory=dict
+    )
+    """Documents of finished steps waiting to be admitted under the document budget."""
+    document_budget: list[dict[str, Any]] = field(default_factory=list)
+    """Per-step report of which retrieved documents were kept or dropped, and why."""
+    skipped_steps: list[dict[str, Any]] = field(default_factory=list)
+    """Steps skipped or merged by early termination, with the reason."""
+    speculative_query: str = ""
+    """The raw question retrieved speculatively while the plan was generated."""
+    speculative_documents: list[Document] = field(default_factory=list)
+    """Results of the speculative retrieval, waiting to seed `documents`."""
+    speculative_synthesis: str = ""
+    """In progressive mode, the partial synthesis of the speculative retrieval results."""
     documents: Annotated[list[Document], reduce_docs] = field(default_factory=list)
     """Populated by the retriever. This is a list of documents that the agent can reference."""
 
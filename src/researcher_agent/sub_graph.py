@@ -4,6 +4,7 @@ This module defines the core structure and functionality of the researcher graph
 which is responsible for generating search queries and retrieving relevant documents.
 """
 
+import asyncio
 from typing import TypedDict, cast
 
 from langchain_core.documents import Document
@@ -12,17 +13,35 @@ from langgraph.graph import END, START, StateGraph
 from langgraph.types import Send
 
 from researcher_agent.configuration import ResearcherConfiguration
+from researcher_agent.plan_cache import acached, prompt_version
 from researcher_agent.state import QueryState, ResearcherState
 from shared import retrieval
+from shared.chunking import expand_neighbors
+from shared.multi_query import amulti_search
+from shared.rerank import rerank_documents
 from shared.utils import load_chat_model
 
 
+def _bigrams(text: str) -> set[str]:
+    chars = "".join(ch for ch in text.casefold() if ch.isalnum())
+    return {chars[i : i + 2] for i in range(len(chars) - 1)} or {chars}
+
+
+def query_overlap(a: str, b: str) -> float:
+    """Return the Jaccard similarity of the character bigrams of two queries."""
+    x, y = _bigrams(a), _bigrams(b)
+    return len(x & y) / len(x | y)
+
+
 async def generate_queries(
     state: ResearcherState, *, config: RunnableConfig
 ) -> dict[str, list[str]]:
     """Generate search queries based on the question (a step in the research plan).
 
     This function uses a language model to generate diverse search queries to help answer the question.
+    Queries that overlap a query in `covered_queries` (e.g. the raw question retrieved
+    speculatively while the plan was generated) are dropped, since their results are already known.
+    With `plan_cache_enabled`, the generated queries are cached per step before that filter.
 
     Args:
         state (ResearcherState): The current state of the researcher, including the user's question.
@@ -36,13 +55,29 @@ async def generate_queries(
         queries: list[str]
 
     configuration = ResearcherConfiguration.from_runnable_config(config)
-    model = load_chat_model(configuration.query_model).with_structured_output(Response)
-    messages = [
-        {"role": "system", "content": configuration.generate_queries_system_prompt},
-        {"role": "human", "content": state.question},
+
+    async def generate() -> list[str]:
+        model = load_chat_model(configuration.query_model).with_structured_output(Response)
+        messages = [
+            {"role": "system", "content": configuration.generate_queries_system_prompt},
+            {"role": "human", "content": state.question},
+        ]
+        response = cast(Response, await model.ainvoke(messages))
+        return list(response["queries"])
+
+    version = prompt_version(
+        configuration.generate_queries_system_prompt, configuration.query_model
+    )
+    generated = await acached("queries", state.question, version, configuration, generate)
+    queries = [
+        query
+        for query in generated
+        if not any(
+            query_overlap(query, covered) >= configuration.speculative_overlap
+            for covered in state.covered_queries
+        )
     ]
-    response = cast(Response, await model.ainvoke(messages))
-    return {"queries": response["queries"]}
+    return {"queries": queries}
 
 
 async def retrieve_documents(
@@ -51,6 +86,9 @@ async def retrieve_documents(
     """Retrieve documents based on a given query.
 
     This function uses a retriever to fetch relevant documents for a given query.
+    When a rerank model is configured, the over-fetched candidates are reranked and
+    only the top ones are kept. Hits on chunked documents are expanded to their
+    neighbouring chunks when enabled.
 
     Args:
         state (QueryState): The current state containing the query string.
@@ -59,26 +97,79 @@ async def retrieve_documents(
     Returns:
         dict[str, list[Document]]: A dictionary with a 'documents' key containing the list of retrieved documents.
     """
+    configuration = ResearcherConfiguration.from_runnable_config(config)
     with retrieval.make_retriever(config) as retriever:
         response = await retriever.ainvoke(state.query, config)
+        response = await rerank_documents(state.query, response, configuration)
+        if configuration.expand_chunk_neighbors:
+            response = expand_neighbors(response)
         return {"documents": response}
 
 
-def retrieve_in_parallel(state: ResearcherState) -> list[Send]:
+async def retrieve_documents_batch(
+    state: ResearcherState, *, config: RunnableConfig
+) -> dict[str, list[Document]]:
+    """Retrieve documents for all generated queries with a single retriever.
+
+    All queries are embedded in one call; on Elasticsearch they are then sent as one
+    `_msearch` request. Results are scattered back per query, so reranking still uses
+    the query that retrieved each candidate.
+
+    Args:
+        state (ResearcherState): The current state containing the generated queries.
+        config (RunnableConfig): Configuration with the retriever used to fetch documents.
+
+    Returns:
+        dict[str, list[Document]]: A dictionary with a 'documents' key containing the documents of all queries.
+    """
+    configuration = ResearcherConfiguration.from_runnable_config(config)
+    with retrieval.make_retriever(config) as retriever:
+        results = await amulti_search(retriever, state.queries)
+    results = await asyncio.gather(
+        *(
+            rerank_documents(query, docs, configuration)
+            for query, docs in zip(state.queries, results)
+        )
+    )
+    documents = []
+    for docs in results:
+        if configuration.expand_chunk_neighbors:
+            docs = expand_neighbors(docs)
+        documents.extend(docs)
+    return {"documents": documents}
+
+
+def retrieve_in_parallel(
+    state: ResearcherState, *, config: RunnableConfig
+) -> list[Send] | str:
     """Create parallel retrieval tasks for each generated query.
 
     This function prepares parallel document retrieval tasks for each query in the researcher's state.
 
     Args:
         state (ResearcherState): The current state of the researcher, including the generated queries.
+        config (RunnableConfig): Configuration with the retriever provider.
 
     Returns:
-        Literal["retrieve_documents"]: A list of Send objects, each representing a document retrieval task.
+        list[Send] | str: A list of Send objects, each representing a document retrieval task,
+        "retrieve_documents_batch" when the queries are retrieved in one batch, or END when
+        every query was already covered.
 
     Behavior:
-        - Creates a Send object for each query in the state.
-        - Each Send object targets the "retrieve_documents" node with the corresponding query.
+        - On the Elasticsearch providers with batch_retrieval enabled and several queries,
+          routes to "retrieve_documents_batch" (one embedding call and one `_msearch`).
+        - Otherwise creates a Send object for each query in the state, targeting the
+          "retrieve_documents" node with the corresponding query.
     """
+    if not state.queries:
+        return END
+    configuration = ResearcherConfiguration.from_runnable_config(config)
+    if (
+        configuration.batch_retrieval
+        and configuration.retriever_provider in ("elastic", "elastic-local")
+        and len(state.queries) > 1
+    ):
+        return "retrieve_documents_batch"
     return [
         Send("retrieve_documents", QueryState(query=query)) for query in state.queries
     ]
@@ -88,13 +179,15 @@ def retrieve_in_parallel(state: ResearcherState) -> list[Send]:
 builder = StateGraph(ResearcherState)
 builder.add_node(generate_queries)
 builder.add_node(retrieve_documents)
+builder.add_node(retrieve_documents_batch)
 builder.add_edge(START, "generate_queries")
 builder.add_conditional_edges(
     "generate_queries",
     retrieve_in_parallel,  # type: ignore
-    path_map=["retrieve_documents"],
+    path_map=["retrieve_documents", "retrieve_documents_batch", END],
 )
 builder.add_edge("retrieve_documents", END)
+builder.add_edge("retrieve_documents_batch", END)
 # Compile into a graph object that you can invoke and deploy.
 graph = builder.compile()
 graph.name = "ResearcherSubGraph"
@@ -44,3 +44,15 @@ class Configuration(BaseConfiguration):
             "description": "The language model used for processing and refining queries. Should be in the form: provider/model-name."
         },
     )
+
+    num_query_variants: int = field(
+        default=1,
+        metadata={
+            "description": "每轮生成并并发检索的查询变体数（包含用户原问题），结果用 RRF 融合；为 1 时只检索一个查询，首轮提问不额外调用 LLM。"
+        },
+    )
+
+    rrf_k: int = field(
+        default=60,
+        metadata={"description": "倒数排名融合（RRF）的平滑常数。"},
+    )
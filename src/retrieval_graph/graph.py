@@ -19,6 +19,10 @@ from langgraph.graph import StateGraph, START, END
 from langgraph.types import interrupt, Command
 
 from shared import retrieval
+from shared.chunking import expand_neighbors
+from shared.mmr import mmr_documents
+from shared.multi_query import amulti_search, reciprocal_rank_fusion
+from shared.rerank import rerank_documents
 from retrieval_graph.configuration import Configuration
 from retrieval_graph.state import InputState, State
 from shared.utils import format_docs, get_message_text, load_chat_model
@@ -32,65 +36,86 @@ class SearchQuery(BaseModel):
     query: str
 
 
+class SearchQueries(BaseModel):
+    """Search the indexed documents for several variants of the question."""
+
+    queries: list[str]
+
+
 async def generate_query(
     state: State, *, config: RunnableConfig
 ) -> dict[str, list[str]]:
     """基于当前状态和配置生成搜索查询。
 
-    此函数分析状态中的消息并生成合适的搜索查询。对于第一条消息，它直接使用用户输入。
-    对于后续消息，它使用语言模型生成优化后的查询。
+    此函数分析状态中的消息并生成合适的搜索查询。num_query_variants 大于 1 时，
+    通过一次结构化输出调用生成多个查询变体，供 retrieve 并发检索。
 
     参数:
         state (State): 包含消息和其他信息的当前状态。
         config (RunnableConfig | None, optional): 查询生成过程的配置。
 
     返回:
-        dict[str, list[str]]: 一个字典，包含键 'queries'，其值为生成的查询列表。
+        dict[str, list[str]]: 一个字典，包含键 'queries'（追加到历史的主查询）
+        与 'current_queries'（本轮要检索的全部查询变体）。
 
     行为:
-        - 如果只有一条消息（首次用户输入），则直接使用该消息作为查询。
+        - 如果只有一条消息（首次用户输入）且只需要一个查询，则直接使用该消息作为查询。
+        - 首次用户输入需要多个查询时，用户原问题总是作为第一个查询，其余由语言模型生成。
         - 对于后续消息，使用语言模型生成优化后的查询。
         - 该函数使用配置来设置查询生成的提示词和模型。
     """
+    configuration = Configuration.from_runnable_config(config)
     messages = state.messages
-    if len(messages) == 1:
+    num_queries = max(1, configuration.num_query_variants)
+    if len(messages) == 1 and num_queries == 1:
         # It's the first user question. We will use the input directly to search.
         human_input = get_message_text(messages[-1])
-        return {"queries": [human_input]}
-    else:
-        configuration = Configuration.from_runnable_config(config)
-        # Feel free to customize the prompt, model, and other logic!
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                ("system", configuration.query_system_prompt),
-                ("placeholder", "{messages}"),
-            ]
-        )
+        return {"queries": [human_input], "current_queries": [human_input]}
+
+    # Feel free to customize the prompt, model, and other logic!
+    prompt = ChatPromptTemplate.from_messages(
+        [
+            ("system", configuration.query_system_prompt),
+            ("placeholder", "{messages}"),
+        ]
+    )
+    message_value = await prompt.ainvoke(
+        {
+            "messages": state.messages,
+            "queries": "\n- ".join(state.queries),
+            "num_queries": num_queries,
+            "system_time": datetime.now(tz=timezone.utc).isoformat(),
+        },
+        config,
+    )
+    if num_queries == 1:
         model = load_chat_model(configuration.query_model).with_structured_output(
             SearchQuery
         )
-
-        message_value = await prompt.ainvoke(
-            {
-                "messages": state.messages,
-                "queries": "\n- ".join(state.queries),
-                "system_time": datetime.now(tz=timezone.utc).isoformat(),
-            },
-            config,
-        )
         generated = cast(SearchQuery, await model.ainvoke(message_value, config))
-        return {
-            "queries": [generated.query],
-        }
+        return {"queries": [generated.query], "current_queries": [generated.query]}
+
+    model = load_chat_model(configuration.query_model).with_structured_output(
+        SearchQueries
+    )
+    generated_queries = cast(SearchQueries, await model.ainvoke(message_value, config))
+    queries = [q.strip() for q in generated_queries.queries if q.strip()]
+    if len(messages) == 1:
+        queries.insert(0, get_message_text(messages[-1]))
+    queries = list(dict.fromkeys(queries))[:num_queries]
+    return {"queries": queries[:1], "current_queries": queries}
 
 
 async def retrieve(
     state: State, *, config: RunnableConfig
 ) -> dict[str, list[Document]]:
-    """基于状态中的最新查询检索文档。
+    """基于状态中本轮的查询变体检索文档。
 
-    此函数接收当前状态和配置，使用状态中的最新查询，通过RAG检索器检索相关文档，
-    并返回检索到的文档。
+    所有查询变体批量向量化后并发检索，结果用 RRF 融合并去重。
+    未配置重排序时，只保留与单次检索相同数量（search_kwargs 中的 k，默认 4）的文档；
+    配置了 rerank_model 时，用第一个查询对融合后的候选文档重排序；
+    开启 mmr_enabled 时，再用 MMR 从候选文档中选出 mmr_top_k 个互不重复的文档。
+    命中切分后的块时，按配置扩展为相邻块的文本。
 
     参数:
         state (State): 包含查询和检索器的当前状态。
@@ -100,10 +125,24 @@ async def retrieve(
         dict[str, list[Document]]: 一个字典，包含单个键 "retrieved_docs"，
         其值为检索到的 Document 对象列表。
     """
-    print(f"retrieve state: {state} ************************************")
+    configuration = Configuration.from_runnable_config(config)
+    queries = state.current_queries or state.queries[-1:]
     with retrieval.make_retriever(config) as retriever:
-        response = await retriever.ainvoke(state.queries[-1], config)
-        return {"retrieved_docs": response}
+        results = await amulti_search(
+            retriever,
+            queries,
+            configuration.embedding_model if configuration.mmr_enabled else None,
+        )
+        embeddings = retriever.vectorstore.embeddings
+    response = reciprocal_rank_fusion(results, k=configuration.rrf_k)
+    if configuration.rerank_model:
+        response = await rerank_documents(queries[0], response, configuration)
+    elif not configuration.mmr_enabled:
+        response = response[: configuration.search_kwargs.get("k", 4)]
+    response = await mmr_documents(queries[0], response, configuration, embeddings)
+    if configuration.expand_chunk_neighbors:
+        response = expand_neighbors(response)
+    return {"retrieved_docs": response}
 
 
 async def respond(
@@ -5,7 +5,8 @@ RESPONSE_SYSTEM_PROMPT = """You are a helpful AI assistant. Answer the user's qu
 {retrieved_docs}
 
 System time: {system_time}"""
-QUERY_SYSTEM_PROMPT = """Generate search queries to retrieve documents that may help answer the user's question. Previously, you made the following queries:
+QUERY_SYSTEM_PROMPT = """Generate search queries to retrieve documents that may help answer the user's question. \
+Generate up to {num_queries} queries that cover different phrasings or interpretations of the latest question. Previously, you made the following queries:
     
 <previous_queries/>
 {queries}
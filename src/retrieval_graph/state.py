@@ -10,7 +10,8 @@ Classes:
     ConversationState: Represents the state of the ongoing conversation.
 
 Functions:
-    reduce_docs: Processes and reduces document inputs into a sequence of Documents.
+    reduce_docs: Processes and reduces document inputs into a sequence of Documents
+        (shared with the other graphs; ids are derived from the document content).
     reduce_retriever: Updates the retriever in the state.
     reduce_messages: Manages the addition of new messages to the conversation state.
     reduce_retrieved_docs: Handles the updating of retrieved documents in the state.
@@ -19,55 +20,16 @@ The module also includes type definitions and utility functions to support
 these state management operations.
 """
 
-import uuid
 from dataclasses import dataclass, field
-from typing import Annotated, Any, Literal, Optional, Sequence, Union
+from typing import Annotated, Sequence
 
 from langchain_core.documents import Document
 from langchain_core.messages import AnyMessage
 from langgraph.graph import add_messages
 
-############################  Doc Indexing State  #############################
-
-
-def reduce_docs(
-    existing: Optional[Sequence[Document]],
-    new: Union[
-        Sequence[Document],
-        Sequence[dict[str, Any]],
-        Sequence[str],
-        str,
-        Literal["delete"],
-    ],
-) -> Sequence[Document]:
-    """Reduce and process documents based on the input type.
-
-    This function handles various input types and converts them into a sequence of Document objects.
-    It can delete existing documents, create new ones from strings or dictionaries, or return the existing documents.
+from shared.state import reduce_docs
 
-    Args:
-        existing (Optional[Sequence[Document]]): The existing docs in the state, if any.
-        new (Union[Sequence[Document], Sequence[dict[str, Any]], Sequence[str], str, Literal["delete"]]):
-            The new input to process. Can be a sequence of Documents, dictionaries, strings, a single string,
-            or the literal "delete".
-    """
-    if new == "delete":
-        return []
-    if isinstance(new, str):
-        return [Document(page_content=new, metadata={"id": str(uuid.uuid4())})]
-    if isinstance(new, list):
-        coerced = []
-        for item in new:
-            if isinstance(item, str):
-                coerced.append(
-                    Document(page_content=item, metadata={"id": str(uuid.uuid4())})
-                )
-            elif isinstance(item, dict):
-                coerced.append(Document(**item))
-            else:
-                coerced.append(item)
-        return coerced
-    return existing or []
+############################  Doc Indexing State  #############################
 
 
 # The index state defines the simple IO for the single-node index graph
@@ -154,6 +116,9 @@ class State(InputState):
     queries: Annotated[list[str], add_queries] = field(default_factory=list)
     """A list of search queries that the agent has generated."""
 
+    current_queries: list[str] = field(default_factory=list)
+    """The query variants generated for the latest user message, searched together by `retrieve`."""
+
     retrieved_docs: list[Document] = field(default_factory=list)
     """Populated by the retriever. This is a list of documents that the agent can reference."""
 
@@ -0,0 +1,205 @@
+"""文档切分与相邻块扩展。
+
+索引时，长文档按句子边界（兼容中文标点）切分为目标大小的块，块之间保留一定重叠，
+过小的尾块并入前一块。每个块的元数据包含：
+
+    - parent_id: 原文档的 uuid；
+    - chunk_index / chunk_count: 块在原文档中的序号与块总数；
+    - window: 该块与前后相邻块拼接的文本（不含重叠部分的重复）；
+    - window_chunks: window 覆盖的首尾块序号。
+
+检索时 expand_neighbors 直接用 window 替换命中块的内容，
+无需再次查询向量库即可把命中扩展到相邻块。
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from typing import Iterable, Optional
+
+from langchain_core.documents import Document
+
+from shared.state import _generate_uuid
+
+_SENTENCE_BOUNDARY = re.compile(r"[。！？!?；;…]+[”’」』)）]*\s*|\.\s+|\n{2,}")
+_CJK = re.compile(r"[㐀-䶿一-鿿　-〿＀-￯]")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估计文本的 token 数：中日韩字符按一个 token，其余字符按四个字符一个 token。"""
+    cjk = len(_CJK.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def split_sentences(text: str) -> list[str]:
+    """按中英文句末标点和空行切分句子，保留原有的标点与空白。"""
+    sentences = []
+    start = 0
+    for match in _SENTENCE_BOUNDARY.finditer(text):
+        if text[start : match.end()].strip():
+            sentences.append(text[start : match.end()])
+        start = match.end()
+    if text[start:].strip():
+        sentences.append(text[start:])
+    return sentences
+
+
+def _split_long_sentence(sentence: str, max_tokens: int) -> list[str]:
+    """把超过块大小的单个句子按字符长度硬切分。"""
+    tokens = estimate_tokens(sentence)
+    if tokens <= max_tokens:
+        return [sentence]
+    pieces = math.ceil(tokens / max_tokens)
+    size = math.ceil(len(sentence) / pieces)
+    return [sentence[i : i + size] for i in range(0, len(sentence), size)]
+
+
+def _chunk_spans(
+    token_counts: list[int], chunk_size: int, chunk_overlap: int, min_chunk_size: int
+) -> list[tuple[int, int]]:
+    """按句子 token 数计算每个块覆盖的句子区间 [start, end)。"""
+    spans: list[tuple[int, int]] = []
+    start = 0
+    while start < len(token_counts):
+        end, total = start, 0
+        while end < len(token_counts) and (end == start or total + token_counts[end] <= chunk_size):
+            total += token_counts[end]
+            end += 1
+        spans.append((start, end))
+        if end >= len(token_counts):
+            break
+        # 下一个块从末尾回退若干句开始，形成重叠，且至少前进一句
+        next_start, overlap = end, 0
+        while next_start - 1 > start and overlap + token_counts[next_start - 1] <= chunk_overlap:
+            next_start -= 1
+            overlap += token_counts[next_start]
+        start = next_start
+
+    if len(spans) > 1:
+        last_start, last_end = spans[-1]
+        if sum(token_counts[last_start:last_end]) < min_chunk_size:
+            spans[-2] = (spans[-2][0], last_end)
+            spans.pop()
+    return spans
+
+
+@dataclass
+class ChunkStats:
+    """一次切分的统计信息。"""
+
+    parents: int = 0
+    chunks: int = 0
+    min_tokens: int = 0
+    max_tokens: int = 0
+    total_tokens: int = 0
+    small_parents: int = 0
+    """本身就小于 min_chunk_size 的原文档数"""
+
+    def add(self, parent_tokens: int, chunk_tokens: Iterable[int], min_chunk_size: int) -> None:
+        """累加一个原文档的切分结果。"""
+        self.parents += 1
+        if parent_tokens < min_chunk_size:
+            self.small_parents += 1
+        for tokens in chunk_tokens:
+            self.min_tokens = tokens if self.chunks == 0 else min(self.min_tokens, tokens)
+            self.max_tokens = max(self.max_tokens, tokens)
+            self.total_tokens += tokens
+            self.chunks += 1
+
+    def as_dict(self) -> dict[str, float]:
+        """以字典形式返回统计信息。"""
+        return {
+            "parents": self.parents,
+            "chunks": self.chunks,
+            "min_tokens": self.min_tokens,
+            "max_tokens": self.max_tokens,
+            "avg_tokens": round(self.total_tokens / self.chunks, 1) if self.chunks else 0,
+            "small_parents": self.small_parents,
+        }
+
+
+def chunk_documents(
+    docs: Iterable[Document],
+    *,
+    chunk_size: int = 400,
+    chunk_overlap: int = 50,
+    min_chunk_size: int = 50,
+    window: int = 1,
+    stats: Optional[ChunkStats] = None,
+) -> list[Document]:
+    """把文档切分为块。
+
+    Args:
+        docs (Iterable[Document]): 待切分的文档，元数据中需要有 uuid。
+        chunk_size (int): 每块的目标 token 数。
+        chunk_overlap (int): 相邻块之间重叠的 token 数。
+        min_chunk_size (int): 尾块小于该 token 数时并入前一块。
+        window (int): 元数据 window 中包含前后各多少个相邻块，0 表示不生成 window。
+        stats (Optional[ChunkStats]): 传入时累加切分统计信息。
+
+    Returns:
+        list[Document]: 切分后的块，id 由原文档 uuid 与块序号确定，重复切分结果一致；
+            只有一个块的短文档原样返回。
+    """
+    chunks = []
+    for doc in docs:
+        parent_id = doc.metadata["uuid"]
+        sentences = [
+            piece
+            for sentence in split_sentences(doc.page_content)
+            for piece in _split_long_sentence(sentence, chunk_size)
+        ] or [doc.page_content]
+        token_counts = [estimate_tokens(sentence) for sentence in sentences]
+        spans = _chunk_spans(token_counts, chunk_size, chunk_overlap, min_chunk_size)
+        if stats is not None:
+            stats.add(
+                sum(token_counts),
+                (sum(token_counts[s:e]) for s, e in spans),
+                min_chunk_size,
+            )
+
+        if len(spans) == 1:
+            # 不需要切分的短文档原样保留，id 不变
+            chunks.append(doc)
+            continue
+        for i, (start, end) in enumerate(spans):
+            metadata = {
+                **doc.metadata,
+                "uuid": _generate_uuid(f"{parent_id}:{i}"),
+                "parent_id": parent_id,
+                "chunk_index": i,
+                "chunk_count": len(spans),
+            }
+            if window > 0:
+                first, last = max(0, i - window), min(len(spans) - 1, i + window)
+                metadata["window"] = "".join(sentences[spans[first][0] : spans[last][1]])
+                metadata["window_chunks"] = [first, last]
+            chunks.append(
+                Document(page_content="".join(sentences[start:end]), metadata=metadata)
+            )
+    return chunks
+
+
+def expand_neighbors(docs: list[Document]) -> list[Document]:
+    """把命中的块扩展为其相邻块拼接的文本，并去掉被已有扩展覆盖的命中。
+
+    没有 window 元数据的文档保持不变。排序保持原检索顺序。
+    """
+    expanded = []
+    covered: dict[str, set[int]] = {}
+    for doc in docs:
+        window = doc.metadata.get("window")
+        if not window:
+            expanded.append(doc)
+            continue
+        parent_id = doc.metadata.get("parent_id")
+        index = doc.metadata.get("chunk_index")
+        if index in covered.get(parent_id, set()):
+            continue
+        first, last = doc.metadata.get("window_chunks") or (index, index)
+        covered.setdefault(parent_id, set()).update(range(first, last + 1))
+        metadata = {
+            k: v for k, v in doc.metadata.items() if k not in ("window", "window_chunks")
+        }
+        expanded.append(Document(page_content=window, metadata=metadata))
+    return expanded
@@ -53,6 +53,104 @@ class BaseConfiguration:
         },
     )
 
+    metadata_filter: Optional[dict[str, Any]] = field(
+        default=None,
+        metadata={
+            "description": "检索时的元数据过滤条件，如 {\"source\": \"a.pdf\", \"date\": {\"gte\": \"2024-01-01\"}}，编译为向量库原生的预过滤。"
+        },
+    )
+
+    filterable_fields: dict[str, Literal["keyword", "number", "date", "boolean"]] = field(
+        default_factory=dict,
+        metadata={
+            "description": "可过滤的元数据字段及其类型，如 {\"source\": \"keyword\", \"date\": \"date\"}。index_graph 写入时为这些字段建立索引并规范化取值。"
+        },
+    )
+
+    elastic_async: bool = field(
+        default=False,
+        metadata={
+            "description": "使用 Elasticsearch 时，异步检索与写入是否通过共享的 AsyncElasticsearch 连接池执行（需要 aiohttp），否则在线程池中调用同步客户端。开启后需在事件循环结束前调用 shared.elastic.aclose_clients 关闭连接池。"
+        },
+    )
+
+    elastic_connections_per_node: int = field(
+        default=32,
+        metadata={
+            "description": "Elasticsearch 客户端连接池中每个节点的连接数上限，决定同时进行的请求数。"
+        },
+    )
+
+    expand_chunk_neighbors: bool = field(
+        default=True,
+        metadata={
+            "description": "检索命中切分后的块时，是否用索引时保存的相邻块文本扩展命中内容（不需要再次查询向量库）。"
+        },
+    )
+
+    rerank_model: Optional[str] = field(
+        default=None,
+        metadata={
+            "description": "检索结果重排序模型，格式为 provider/model-name（fastembed 或 sentence-transformers 的交叉编码器），为空时不重排序。"
+        },
+    )
+
+    rerank_candidates: int = field(
+        default=20,
+        metadata={"description": "开启重排序时，向量检索多取的候选文档数。"},
+    )
+
+    rerank_top_n: int = field(
+        default=4,
+        metadata={"description": "重排序后保留的文档数。"},
+    )
+
+    rerank_batch_size: int = field(
+        default=16,
+        metadata={"description": "重排序时每批打分的段落数。"},
+    )
+
+    mmr_enabled: bool = field(
+        default=False,
+        metadata={
+            "description": "是否对检索结果做最大边际相关性（MMR）多样性筛选，去掉近似重复的段落。"
+        },
+    )
+
+    mmr_lambda: float = field(
+        default=0.5,
+        metadata={
+            "description": "MMR 中相关性的权重，取值 0 到 1，越小越偏向多样性。"
+        },
+    )
+
+    mmr_top_k: int = field(
+        default=4,
+        metadata={"description": "MMR 筛选后保留的文档数。"},
+    )
+
+    semantic_cache_enabled: bool = field(
+        default=False,
+        metadata={
+            "description": "是否开启检索的语义缓存：与之前的查询足够相似时直接返回其检索结果，不再访问向量库。"
+        },
+    )
+
+    semantic_cache_threshold: float = field(
+        default=0.95,
+        metadata={"description": "语义缓存命中所需的查询向量余弦相似度下限。"},
+    )
+
+    semantic_cache_ttl: float = field(
+        default=600.0,
+        metadata={"description": "语义缓存条目的有效期（秒）。"},
+    )
+
+    semantic_cache_max_entries: int = field(
+        default=512,
+        metadata={"description": "每个索引、每组检索参数最多缓存的查询数。"},
+    )
+
     @classmethod
     def from_runnable_config(
         cls: Type[T], config: Optional[RunnableConfig] = None
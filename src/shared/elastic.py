@@ -0,0 +1,286 @@
+"""Elasticsearch 连接池与原生异步向量库。
+
+langchain_elasticsearch 的 ElasticsearchStore 只有同步实现，其 ainvoke、aadd_documents
+都在线程池中执行，并发受线程池大小限制；并且每次创建都会新建客户端并同步调用一次 info()。
+
+本模块：
+    - 按连接参数在进程内复用同步客户端（Elasticsearch），避免每次请求重新建立连接；
+      客户端创建时不发送请求，连接问题在第一次检索或写入时暴露；
+    - 按事件循环复用异步客户端（AsyncElasticsearch，基于 aiohttp 的连接池），
+      由使用方在事件循环结束前（如服务关闭或 asyncio.run 的主协程末尾）调用 aclose_clients 关闭；
+    - AsyncElasticsearchStore 在 ElasticsearchStore 的基础上，用 elasticsearch 官方的
+      AsyncVectorStore 实现真正异步的 kNN 检索、批量写入与删除，查询体与同步版本一致。
+
+只在 retriever_provider 为 elastic/elastic-local 时按需导入。
+"""
+
+import asyncio
+import importlib.util
+import threading
+import weakref
+from typing import Any, Iterable, Optional
+
+from elasticsearch import AsyncElasticsearch, Elasticsearch
+from elasticsearch.helpers import vectorstore as es_vectorstore
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_elasticsearch import ElasticsearchStore
+from langchain_elasticsearch.vectorstores import _hits_to_docs_scores
+
+ConnectionKey = tuple[Any, ...]
+
+_sync_clients: dict[ConnectionKey, Elasticsearch] = {}
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[ConnectionKey, AsyncElasticsearch]]" = (
+    weakref.WeakKeyDictionary()
+)
+_lock = threading.Lock()
+
+
+def async_transport_available() -> bool:
+    """异步客户端依赖 aiohttp（elasticsearch[async]），未安装时只能使用同步客户端。"""
+    return importlib.util.find_spec("aiohttp") is not None
+
+
+def connection_params(
+    url: str,
+    *,
+    api_key: Optional[str] = None,
+    username: Optional[str] = None,
+    password: Optional[str] = None,
+    params: Optional[dict[str, Any]] = None,
+) -> dict[str, Any]:
+    """构造同步、异步客户端共用的连接参数（地址、认证与 TLS 设置）。"""
+    connection: dict[str, Any] = {"hosts": [url]}
+    if api_key:
+        connection["api_key"] = api_key
+    elif username and password:
+        connection["basic_auth"] = (username, password)
+    connection.update(params or {})
+    return connection
+
+
+def _connection_key(connection: dict[str, Any]) -> ConnectionKey:
+    return tuple(
+        sorted(
+            (k, tuple(v) if isinstance(v, list) else v) for k, v in connection.items()
+        )
+    )
+
+
+def get_sync_client(connection: dict[str, Any]) -> Elasticsearch:
+    """返回共享的同步客户端。
+
+    创建客户端不发送任何请求（不调用 info()），可以在事件循环中直接调用而不阻塞。
+    """
+    key = _connection_key(connection)
+    with _lock:
+        client = _sync_clients.get(key)
+        if client is None:
+            client = _sync_clients[key] = Elasticsearch(**connection)
+        return client
+
+
+def get_async_client(connection: dict[str, Any]) -> AsyncElasticsearch:
+    """返回当前事件循环共享的异步客户端。
+
+    aiohttp 的连接池绑定在创建它的事件循环上，因此每个事件循环各有一个客户端。
+    使用方负责在该事件循环结束前调用 aclose_clients 关闭它们。
+    """
+    loop = asyncio.get_running_loop()
+    key = _connection_key(connection)
+    with _lock:
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(key)
+        if client is None:
+            client = clients[key] = AsyncElasticsearch(**connection)
+        return client
+
+
+async def aclose_clients() -> None:
+    """关闭当前事件循环的全部异步客户端，之后的请求会重新创建客户端。
+
+    应在事件循环结束前调用，例如服务关闭时，或 asyncio.run 的主协程末尾。
+    """
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.get(loop, {})
+        pending = list(clients.values())
+        clients.clear()
+    for client in pending:
+        await client.close()
+
+
+def remember_hit_vectors(vectorstore: Any, hits: list[dict[str, Any]]) -> None:
+    """把命中中存储的向量写入 MMR 的向量缓存；向量库未开启 vector_cache_model 时不做任何事。"""
+    model = getattr(vectorstore, "vector_cache_model", None)
+    if not model:
+        return
+    from shared.mmr import vector_cache
+
+    text_field, vector_field = vectorstore.query_field, vectorstore.vector_query_field
+    pairs = [
+        (hit["_source"][text_field], hit["_source"][vector_field])
+        for hit in hits
+        if hit.get("_source", {}).get(text_field) is not None
+        and hit["_source"].get(vector_field)
+    ]
+    if pairs:
+        vector_cache.put(model, [text for text, _ in pairs], [vector for _, vector in pairs])
+
+
+def _to_async_strategy(strategy: Any) -> Any:
+    """把同步检索策略转换为对应的异步策略，参数保持不变。"""
+    async_cls = getattr(es_vectorstore, f"Async{type(strategy).__name__}")
+    async_strategy = async_cls.__new__(async_cls)
+    async_strategy.__dict__.update(strategy.__dict__)
+    return async_strategy
+
+
+class _AsyncEmbeddingAdapter(es_vectorstore.AsyncEmbeddingService):
+    def __init__(self, embedding: Embeddings) -> None:
+        self.embedding = embedding
+
+    async def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return await self.embedding.aembed_documents(texts)
+
+    async def embed_query(self, query: str) -> list[float]:
+        return await self.embedding.aembed_query(query)
+
+
+class AsyncElasticsearchStore(ElasticsearchStore):
+    """带原生异步实现的 ElasticsearchStore。
+
+    同步方法沿用 ElasticsearchStore（使用共享的同步客户端）；异步的检索、写入、删除
+    与 _msearch 直接通过共享的 AsyncElasticsearch 发送，不再占用线程池。
+    """
+
+    def __init__(
+        self,
+        *,
+        connection: dict[str, Any],
+        vector_cache_model: Optional[str] = None,
+        **kwargs: Any,
+    ) -> None:
+        """初始化向量库。
+
+        Args:
+            connection (dict[str, Any]): connection_params 构造的连接参数。
+            vector_cache_model (Optional[str]): 设置后，异步检索随命中一起取回存储的向量，
+                并以该嵌入模型名写入 shared.mmr.vector_cache，供 MMR 直接使用。
+            **kwargs: 传给 ElasticsearchStore 的其他参数，如 index_name、embedding。
+        """
+        super().__init__(es_connection=get_sync_client(connection), **kwargs)
+        self._connection = connection
+        self.vector_cache_model = vector_cache_model
+
+    def _async_store(self) -> es_vectorstore.AsyncVectorStore:
+        return es_vectorstore.AsyncVectorStore(
+            client=get_async_client(self._connection),
+            index=self._store.index,
+            retrieval_strategy=_to_async_strategy(self._store.retrieval_strategy),
+            embedding_service=_AsyncEmbeddingAdapter(self.embedding)
+            if self.embedding
+            else None,
+            text_field=self.query_field,
+            vector_field=self.vector_query_field,
+        )
+
+    def _source_fields(self) -> Optional[list[str]]:
+        return [self.vector_query_field] if self.vector_cache_model else None
+
+    def _to_docs(self, hits: list[dict[str, Any]]) -> list[Document]:
+        remember_hit_vectors(self, hits)
+        return [
+            doc
+            for doc, _ in _hits_to_docs_scores(hits=hits, content_field=self.query_field)
+        ]
+
+    async def asimilarity_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 50,
+        filter: Optional[list[dict]] = None,
+        **kwargs: Any,
+    ) -> list[Document]:
+        """异步 kNN 检索。"""
+        hits = await self._async_store().search(
+            query=query,
+            k=k,
+            num_candidates=fetch_k,
+            fields=self._source_fields(),
+            filter=filter,
+        )
+        return self._to_docs(hits)
+
+    async def asimilarity_search_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 4,
+        fetch_k: int = 50,
+        filter: Optional[list[dict]] = None,
+        **kwargs: Any,
+    ) -> list[Document]:
+        """用已经算好的查询向量做异步 kNN 检索。"""
+        hits = await self._async_store().search(
+            query=None,
+            query_vector=embedding,
+            k=k,
+            num_candidates=fetch_k,
+            fields=self._source_fields(),
+            filter=filter,
+        )
+        return self._to_docs(hits)
+
+    async def aadd_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[list[dict]] = None,
+        ids: Optional[list[str]] = None,
+        refresh_indices: bool = True,
+        create_index_if_not_exists: bool = True,
+        bulk_kwargs: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        """异步向量化并批量写入文本。"""
+        return await self._async_store().add_texts(
+            texts=list(texts),
+            metadatas=metadatas,
+            ids=ids,
+            refresh_indices=refresh_indices,
+            create_index_if_not_exists=create_index_if_not_exists,
+            bulk_kwargs=bulk_kwargs,
+        )
+
+    async def aadd_embeddings(
+        self,
+        text_embeddings: Iterable[tuple[str, list[float]]],
+        metadatas: Optional[list[dict]] = None,
+        ids: Optional[list[str]] = None,
+        refresh_indices: bool = True,
+        create_index_if_not_exists: bool = True,
+        bulk_kwargs: Optional[dict] = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        """异步批量写入预先计算好向量的文本。"""
+        pairs = list(text_embeddings)
+        return await self._async_store().add_texts(
+            texts=[text for text, _ in pairs],
+            metadatas=metadatas,
+            vectors=[vector for _, vector in pairs],
+            ids=ids,
+            refresh_indices=refresh_indices,
+            create_index_if_not_exists=create_index_if_not_exists,
+            bulk_kwargs=bulk_kwargs,
+        )
+
+    async def adelete(
+        self, ids: Optional[list[str]] = None, refresh_indices: bool = True, **kwargs: Any
+    ) -> bool:
+        """异步按 id 删除文档。"""
+        return await self._async_store().delete(ids=ids, refresh_indices=refresh_indices)
+
+    async def amsearch(self, searches: list[dict[str, Any]]) -> dict[str, Any]:
+        """异步发送一次 _msearch 请求。"""
+        response = await get_async_client(self._connection).msearch(searches=searches)
+        return response.body
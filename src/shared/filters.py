@@ -0,0 +1,234 @@
+"""检索的元数据过滤。
+
+MetadataFilter 用字段条件描述对文档元数据的限制（来源、日期、用户、文档类型等），
+并编译为各向量库原生的预过滤条件，在向量检索时直接过滤，不再多取结果后在 Python 中筛选：
+
+    - Elasticsearch: kNN 查询中 bool filter 的子句列表；
+    - Pinecone: 元数据过滤表达式（$eq、$in、$gte 等）；
+    - MongoDB Atlas: $vectorSearch 的 pre_filter（MQL 表达式）。
+
+可过滤字段及其类型由 filterable_fields 声明（keyword、number、date、boolean），
+index_graph 写入时按声明规范化元数据的取值并建立索引；date 字段统一保存为 Unix 时间戳（秒），
+查询时日期可以写成 ISO 字符串。
+
+条件的简写形式与 MongoDB 一致，多个条件之间为“且”：
+
+    {"source": "handbook.pdf", "doc_type": {"in": ["policy", "faq"]}, "date": {"gte": "2024-01-01"}}
+"""
+
+from datetime import date, datetime, timezone
+from typing import Any, Literal, Optional, Union
+
+from langchain_core.documents import Document
+from pydantic import BaseModel, model_validator
+
+FieldType = Literal["keyword", "number", "date", "boolean"]
+FilterOp = Literal["eq", "ne", "in", "nin", "gt", "gte", "lt", "lte"]
+
+_RANGE_OPS = ("gt", "gte", "lt", "lte")
+
+
+class Condition(BaseModel):
+    """对单个元数据字段的条件。"""
+
+    field: str
+    op: FilterOp = "eq"
+    value: Any
+
+    @model_validator(mode="after")
+    def _check_value(self) -> "Condition":
+        if self.op in ("in", "nin") and not isinstance(self.value, (list, tuple)):
+            raise ValueError(f"{self.op} 条件的取值必须是列表: {self.field}")
+        return self
+
+
+class MetadataFilter(BaseModel):
+    """元数据过滤条件，所有条件同时满足时文档才会被检索到。"""
+
+    conditions: list[Condition] = []
+
+    @classmethod
+    def parse(
+        cls, spec: Union["MetadataFilter", dict[str, Any], list[Any], None]
+    ) -> "MetadataFilter":
+        """从配置中的过滤条件创建 MetadataFilter。
+
+        Args:
+            spec: MetadataFilter、条件列表、{"conditions": [...]}，或 {字段: 取值 | {运算符: 取值}} 的简写。
+
+        Returns:
+            MetadataFilter: 过滤条件。
+
+        Raises:
+            ValueError: 如果条件的格式或运算符无效。
+        """
+        if spec is None:
+            return cls()
+        if isinstance(spec, MetadataFilter):
+            return spec
+        if isinstance(spec, list):
+            return cls(conditions=spec)
+        if "conditions" in spec:
+            return cls.model_validate(spec)
+        conditions = []
+        for name, value in spec.items():
+            if isinstance(value, dict):
+                conditions += [
+                    {"field": name, "op": op, "value": v} for op, v in value.items()
+                ]
+            else:
+                conditions.append({"field": name, "op": "eq", "value": value})
+        return cls(conditions=conditions)
+
+
+def coerce_value(value: Any, field_type: Optional[FieldType]) -> Any:
+    """按字段类型规范化取值，date 转为 Unix 时间戳（秒）。"""
+    if value is None or field_type is None:
+        return value
+    if isinstance(value, (list, tuple)):
+        return [coerce_value(v, field_type) for v in value]
+    match field_type:
+        case "keyword":
+            return str(value)
+        case "number":
+            return float(value)
+        case "boolean":
+            return value if isinstance(value, bool) else str(value).lower() == "true"
+        case "date":
+            if isinstance(value, (int, float)):
+                return int(value)
+            if isinstance(value, str):
+                value = datetime.fromisoformat(value)
+            if isinstance(value, date) and not isinstance(value, datetime):
+                value = datetime(value.year, value.month, value.day)
+            if value.tzinfo is None:
+                value = value.replace(tzinfo=timezone.utc)
+            return int(value.timestamp())
+    raise ValueError(f"Unsupported filterable field type: {field_type}")
+
+
+def normalize_metadata(
+    metadata: dict[str, Any], fields: dict[str, FieldType]
+) -> dict[str, Any]:
+    """按 filterable_fields 规范化元数据中可过滤字段的取值，其他字段保持不变。"""
+    normalized = dict(metadata)
+    for name, field_type in fields.items():
+        if normalized.get(name) is not None:
+            normalized[name] = coerce_value(normalized[name], field_type)
+    return normalized
+
+
+def normalize_documents(
+    docs: list[Document], fields: dict[str, FieldType]
+) -> list[Document]:
+    """返回元数据按 filterable_fields 规范化后的文档副本。"""
+    if not fields:
+        return docs
+    return [
+        Document(
+            id=doc.id,
+            page_content=doc.page_content,
+            metadata=normalize_metadata(doc.metadata, fields),
+        )
+        for doc in docs
+    ]
+
+
+def _coerced(
+    condition: Condition, fields: dict[str, FieldType]
+) -> tuple[str, str, Any]:
+    return (
+        condition.field,
+        condition.op,
+        coerce_value(condition.value, fields.get(condition.field)),
+    )
+
+
+def to_elasticsearch(
+    metadata_filter: MetadataFilter, fields: dict[str, FieldType]
+) -> list[dict[str, Any]]:
+    """编译为 Elasticsearch bool filter 的子句列表，可直接作为 kNN 检索的 filter。
+
+    声明过的字段按显式映射查询 metadata.<field>；未声明的字符串字段使用动态映射生成的
+    metadata.<field>.keyword 子字段。
+    """
+    clauses: list[dict[str, Any]] = []
+    for condition in metadata_filter.conditions:
+        name, op, value = _coerced(condition, fields)
+        path = f"metadata.{name}"
+        sample = value[0] if isinstance(value, list) and value else value
+        if name not in fields and isinstance(sample, str) and op not in _RANGE_OPS:
+            path += ".keyword"
+        match op:
+            case "eq":
+                clauses.append({"term": {path: value}})
+            case "ne":
+                clauses.append({"bool": {"must_not": [{"term": {path: value}}]}})
+            case "in":
+                clauses.append({"terms": {path: value}})
+            case "nin":
+                clauses.append({"bool": {"must_not": [{"terms": {path: value}}]}})
+            case _:
+                clauses.append({"range": {path: {op: value}}})
+    return clauses
+
+
+def _to_mql(
+    metadata_filter: MetadataFilter, fields: dict[str, FieldType]
+) -> dict[str, Any]:
+    clauses = [
+        {name: {f"${op}": value}}
+        for name, op, value in (_coerced(c, fields) for c in metadata_filter.conditions)
+    ]
+    if len(clauses) == 1:
+        return clauses[0]
+    return {"$and": clauses} if clauses else {}
+
+
+def to_pinecone(
+    metadata_filter: MetadataFilter, fields: dict[str, FieldType]
+) -> dict[str, Any]:
+    """编译为 Pinecone 的元数据过滤表达式。"""
+    return _to_mql(metadata_filter, fields)
+
+
+def to_mongodb(
+    metadata_filter: MetadataFilter, fields: dict[str, FieldType]
+) -> dict[str, Any]:
+    """编译为 MongoDB Atlas $vectorSearch 的 pre_filter，字段需在向量索引中声明为 filter。"""
+    return _to_mql(metadata_filter, fields)
+
+
+def apply_filter(
+    search_kwargs: dict[str, Any],
+    retriever_provider: str,
+    metadata_filter: Union[MetadataFilter, dict[str, Any], list[Any], None],
+    fields: dict[str, FieldType],
+) -> dict[str, Any]:
+    """把元数据过滤条件编译为 retriever_provider 的原生预过滤，合并进 search_kwargs。
+
+    search_kwargs 中已有的过滤条件会保留，与新条件同时生效。
+
+    Raises:
+        ValueError: 如果检索器提供者不支持元数据过滤。
+    """
+    parsed = MetadataFilter.parse(metadata_filter)
+    if not parsed.conditions:
+        return search_kwargs
+    match retriever_provider:
+        case "elastic" | "elastic-local":
+            existing = search_kwargs.get("filter") or []
+            if isinstance(existing, dict):
+                existing = [existing]
+            return {**search_kwargs, "filter": existing + to_elasticsearch(parsed, fields)}
+        case "pinecone" | "mongodb":
+            key = "filter" if retriever_provider == "pinecone" else "pre_filter"
+            compiled = _to_mql(parsed, fields)
+            if search_kwargs.get(key):
+                compiled = {"$and": [search_kwargs[key], compiled]}
+            return {**search_kwargs, key: compiled}
+        case _:
+            raise ValueError(
+                f"Metadata filters are not supported for retriever_provider: {retriever_provider}"
+            )
+
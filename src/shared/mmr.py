@@ -0,0 +1,206 @@
+"""检索结果的最大边际相关性（MMR）多样性筛选。
+
+多个查询的检索结果合并后，常有大量内容几乎相同的段落，占满提示词却不增加信息。
+MMR 每次选择 lambda * 与查询的相似度 - (1 - lambda) * 与已选文档的最大相似度 最高的文档，
+在保持相关性的同时去掉近似重复的段落。
+
+实现只做矩阵运算：文档向量归一化一次，每选一个文档只需一次矩阵-向量乘法更新
+“与已选文档的最大相似度”。
+
+文档向量优先使用向量库中已经存储的向量：开启 mmr_enabled 时，AsyncElasticsearchStore
+（单查询检索与 _msearch 批量检索）随命中一起取回向量字段，并按 (嵌入模型, 文本) 写入
+进程内的 vector_cache，MMR 直接读取，不再向量化。
+向量库无法返回向量时（同步 ElasticsearchStore、Pinecone、MongoDB、语义缓存命中等），
+退回为对未缓存的文本调用一次 aembed_documents 批量向量化，结果同样写入缓存，
+同一文档在多个步骤、多轮对话中只向量化一次。
+
+查询向量同样复用：调用方可以直接传入检索时已经算出的查询向量；amulti_search 批量向量化
+查询后也会把向量写入 vector_cache，MMR 命中时不再调用 aembed_query。
+"""
+
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from shared.configuration import BaseConfiguration
+
+logger = logging.getLogger(__name__)
+
+_QUERY_MODEL_SUFFIX = "\x00query"
+"""查询向量与文档向量分开缓存，避免同一文本的两种向量互相覆盖。"""
+
+
+def _normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def maximal_marginal_relevance(
+    query_vector: Sequence[float] | np.ndarray,
+    doc_vectors: Sequence[Sequence[float]] | np.ndarray,
+    *,
+    k: int,
+    lambda_mult: float = 0.5,
+) -> list[int]:
+    """用 MMR 从候选文档中选出 k 个，返回按选择顺序排列的下标。
+
+    Args:
+        query_vector (Sequence[float] | np.ndarray): 查询向量。
+        doc_vectors (Sequence[Sequence[float]] | np.ndarray): 候选文档向量，每行一个文档。
+        k (int): 选出的文档数。
+        lambda_mult (float): 相关性权重，1 时只看相关性，0 时只看多样性。
+
+    Returns:
+        list[int]: 选中文档在 doc_vectors 中的下标。
+    """
+    docs = _normalize_rows(np.asarray(doc_vectors, dtype=np.float32))
+    k = min(k, len(docs))
+    if k <= 0:
+        return []
+    query = _normalize_rows(np.asarray(query_vector, dtype=np.float32))
+    relevance = docs @ query
+
+    first = int(np.argmax(relevance))
+    selected = [first]
+    chosen = np.zeros(len(docs), dtype=bool)
+    chosen[first] = True
+    max_similarity = docs @ docs[first]
+    while len(selected) < k:
+        scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[chosen] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        chosen[best] = True
+        np.maximum(max_similarity, docs @ docs[best], out=max_similarity)
+    return selected
+
+
+class _VectorCache:
+    """按 (嵌入模型, 文本摘要) 缓存文档向量的 LRU，线程安全。"""
+
+    def __init__(self, max_entries: int = 8192) -> None:
+        self.max_entries = max_entries
+        self._vectors: OrderedDict[tuple[str, bytes], np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model: str, text: str) -> tuple[str, bytes]:
+        return model, hashlib.blake2b(text.encode(), digest_size=16).digest()
+
+    async def embed(
+        self, embeddings: Embeddings, model: str, texts: list[str]
+    ) -> np.ndarray:
+        """返回文本的向量矩阵，未缓存（也未由向量库写入）的文本一次性批量向量化。"""
+        keys = [self._key(model, text) for text in texts]
+        with self._lock:
+            found = {key: self._vectors[key] for key in keys if key in self._vectors}
+            for key in found:
+                self._vectors.move_to_end(key)
+        missing = list(dict.fromkeys(key for key in keys if key not in found))
+        if missing:
+            text_of = dict(zip(keys, texts))
+            vectors = await embeddings.aembed_documents([text_of[key] for key in missing])
+            computed = dict(zip(missing, np.asarray(vectors, dtype=np.float32)))
+            found.update(computed)
+            with self._lock:
+                self._vectors.update(computed)
+                while len(self._vectors) > self.max_entries:
+                    self._vectors.popitem(last=False)
+        return np.stack([found[key] for key in keys])
+
+    def put(
+        self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]
+    ) -> None:
+        """写入向量库已经存储的文本向量，之后 embed 不再为这些文本调用嵌入模型。"""
+        computed = {
+            self._key(model, text): np.asarray(vector, dtype=np.float32)
+            for text, vector in zip(texts, vectors)
+        }
+        with self._lock:
+            self._vectors.update(computed)
+            for key in computed:
+                self._vectors.move_to_end(key)
+            while len(self._vectors) > self.max_entries:
+                self._vectors.popitem(last=False)
+
+    def put_queries(
+        self, model: str, queries: Sequence[str], vectors: Sequence[Sequence[float]]
+    ) -> None:
+        """写入检索时已经算出的查询向量。"""
+        self.put(model + _QUERY_MODEL_SUFFIX, queries, vectors)
+
+    def get_query(self, model: str, query: str) -> Optional[np.ndarray]:
+        """返回缓存的查询向量，未缓存时返回None。"""
+        key = self._key(model + _QUERY_MODEL_SUFFIX, query)
+        with self._lock:
+            vector = self._vectors.get(key)
+            if vector is not None:
+                self._vectors.move_to_end(key)
+            return vector
+
+    def clear(self) -> None:
+        """清空缓存。"""
+        with self._lock:
+            self._vectors.clear()
+
+
+vector_cache = _VectorCache()
+
+
+async def mmr_documents(
+    query: str,
+    docs: list[Document],
+    configuration: BaseConfiguration,
+    embeddings: Optional[Embeddings] = None,
+    query_vector: Optional[Sequence[float]] = None,
+) -> list[Document]:
+    """按配置对检索结果做 MMR 多样性筛选；未开启 mmr_enabled 时原样返回。
+
+    可以接在任何检索器（包括 RRF 融合与重排序）之后，返回的文档保持 MMR 的选择顺序。
+    候选文档的向量取自 vector_cache：向量库随命中写入的存储向量直接使用，
+    其余文本才会调用 embeddings 重新向量化。查询向量依次取自 query_vector 参数、
+    vector_cache，都没有时才调用 aembed_query，结果写入缓存。
+
+    Args:
+        query (str): 用于计算相关性的查询。
+        docs (list[Document]): 候选文档，按相关性从高到低排列。
+        configuration (BaseConfiguration): 提供 mmr_enabled、mmr_lambda、mmr_top_k 与嵌入模型。
+        embeddings (Optional[Embeddings]): 检索器已经创建的文本编码器，为空时按 embedding_model 创建。
+        query_vector (Optional[Sequence[float]]): 检索时已经算出的查询向量。
+
+    Returns:
+        list[Document]: 选中的 mmr_top_k 个文档。
+    """
+    if not configuration.mmr_enabled or len(docs) <= 1:
+        return docs
+    if embeddings is None:
+        from shared.retrieval import make_text_encoder
+
+        embeddings = make_text_encoder(configuration.embedding_model)
+    model = configuration.embedding_model
+    texts = [doc.page_content for doc in docs]
+    if query_vector is None:
+        query_vector = vector_cache.get_query(model, query)
+    if query_vector is None:
+        query_vector, doc_vectors = await asyncio.gather(
+            embeddings.aembed_query(query),
+            vector_cache.embed(embeddings, model, texts),
+        )
+        vector_cache.put_queries(model, [query], [query_vector])
+    else:
+        doc_vectors = await vector_cache.embed(embeddings, model, texts)
+    selected = maximal_marginal_relevance(
+        query_vector,
+        doc_vectors,
+        k=configuration.mmr_top_k,
+        lambda_mult=configuration.mmr_lambda,
+    )
+    logger.info("MMR 多样性筛选: %d -> %d", len(docs), len(selected))
+    return [docs[i] for i in selected]
@@ -0,0 +1,167 @@
+"""多查询并发检索与倒数排名融合（RRF）。
+
+同一个问题的多个查询变体一次性批量向量化，再并发地按向量检索，
+各查询的结果用 RRF 融合、按文档 id 去重，整体耗时接近单次检索。
+Elasticsearch 向量库把所有查询合并为一次 _msearch 请求。
+"""
+
+import asyncio
+from typing import Any, Optional, Sequence
+
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStoreRetriever
+
+from shared.mmr import vector_cache
+from shared.query_cache import SemanticCacheRetriever
+
+
+def doc_key(doc: Document) -> str:
+    """返回用于去重的文档 id：优先 metadata 中的 uuid，其次 Document.id，最后是内容本身。"""
+    return doc.metadata.get("uuid") or doc.id or doc.page_content
+
+
+async def amulti_search(
+    retriever: VectorStoreRetriever,
+    queries: Sequence[str],
+    vector_cache_model: Optional[str] = None,
+) -> list[list[Document]]:
+    """并发执行多个查询，返回与 queries 一一对应的检索结果。
+
+    普通相似度检索时，所有查询只调用一次 aembed_documents 批量向量化；
+    Elasticsearch 向量库随后只发送一次 _msearch 请求，其他向量库共用同一个客户端并发按向量检索。
+    向量库不支持按向量检索、使用其他 search_type 或开启了语义缓存时，退回并发调用检索器。
+    给出 vector_cache_model 时，查询向量按该嵌入模型写入 shared.mmr.vector_cache，供 MMR 复用。
+    """
+    if len(queries) <= 1 or retriever.search_type != "similarity" or isinstance(
+        retriever, SemanticCacheRetriever
+    ):
+        return list(await asyncio.gather(*(retriever.ainvoke(q) for q in queries)))
+
+    vectorstore = retriever.vectorstore
+    embeddings = await vectorstore.embeddings.aembed_documents(list(queries))
+    if vector_cache_model:
+        vector_cache.put_queries(vector_cache_model, queries, embeddings)
+    if _is_elasticsearch(vectorstore) and hasattr(vectorstore, "amsearch"):
+        searches = _build_msearch(
+            vectorstore, queries, embeddings, retriever.search_kwargs
+        )
+        return _parse_msearch(vectorstore, await vectorstore.amsearch(searches))
+    if _is_elasticsearch(vectorstore):
+        return await asyncio.to_thread(
+            _msearch_elasticsearch,
+            vectorstore,
+            queries,
+            embeddings,
+            retriever.search_kwargs,
+        )
+    try:
+        return list(
+            await asyncio.gather(
+                *(
+                    vectorstore.asimilarity_search_by_vector(
+                        embedding, **retriever.search_kwargs
+                    )
+                    for embedding in embeddings
+                )
+            )
+        )
+    except NotImplementedError:
+        return list(await asyncio.gather(*(retriever.ainvoke(q) for q in queries)))
+
+
+def _is_elasticsearch(vectorstore: Any) -> bool:
+    """判断向量库是否为 ElasticsearchStore（或其子类），不导入该可选依赖。"""
+    return any(
+        cls.__module__.startswith("langchain_elasticsearch")
+        for cls in type(vectorstore).__mro__
+    ) and hasattr(vectorstore, "_store")
+
+
+def _build_msearch(
+    vectorstore: Any,
+    queries: Sequence[str],
+    embeddings: Sequence[list[float]],
+    search_kwargs: dict[str, Any],
+) -> list[dict[str, Any]]:
+    """构造 _msearch 请求体，查询体由向量库当前的检索策略生成，与 similarity_search 一致。"""
+    store = vectorstore._store
+    k = search_kwargs.get("k", 4)
+    includes = ["metadata", store.text_field]
+    if getattr(vectorstore, "vector_cache_model", None):
+        # 取回存储的向量供 MMR 使用，见 shared.elastic.remember_hit_vectors
+        includes.append(store.vector_field)
+    searches: list[dict[str, Any]] = []
+    for query, embedding in zip(queries, embeddings):
+        body = store.retrieval_strategy.es_query(
+            query=query,
+            query_vector=embedding,
+            text_field=store.text_field,
+            vector_field=store.vector_field,
+            k=k,
+            num_candidates=search_kwargs.get("fetch_k", 50),
+            filter=search_kwargs.get("filter") or [],
+        )
+        searches.append({"index": store.index})
+        searches.append({**body, "size": k, "_source": {"includes": includes}})
+    return searches
+
+
+def _parse_msearch(vectorstore: Any, response: Any) -> list[list[Document]]:
+    """把 _msearch 的响应按查询顺序拆分为文档列表。"""
+    text_field = vectorstore._store.text_field
+    results = []
+    for item in response["responses"]:
+        if "error" in item:
+            raise ValueError(f"Elasticsearch msearch 查询失败: {item['error']}")
+        if getattr(vectorstore, "vector_cache_model", None):
+            from shared.elastic import remember_hit_vectors
+
+            remember_hit_vectors(vectorstore, item["hits"]["hits"])
+        results.append(
+            [
+                Document(
+                    id=hit["_id"],
+                    page_content=hit["_source"].get(text_field, ""),
+                    metadata=hit["_source"].get("metadata", {}),
+                )
+                for hit in item["hits"]["hits"]
+            ]
+        )
+    return results
+
+
+def _msearch_elasticsearch(
+    vectorstore: Any,
+    queries: Sequence[str],
+    embeddings: Sequence[list[float]],
+    search_kwargs: dict[str, Any],
+) -> list[list[Document]]:
+    """用同步客户端发送一次 _msearch 请求执行多个向量检索，结果按查询顺序拆分。"""
+    searches = _build_msearch(vectorstore, queries, embeddings, search_kwargs)
+    return _parse_msearch(
+        vectorstore, vectorstore._store.client.msearch(searches=searches)
+    )
+
+
+def reciprocal_rank_fusion(
+    results: Sequence[Sequence[Document]], k: int = 60
+) -> list[Document]:
+    """用倒数排名融合合并多个检索结果，并按文档 id 去重。
+
+    每个文档的得分为其在各结果中 1 / (k + 排名) 之和，排名从 1 开始。
+
+    Args:
+        results (Sequence[Sequence[Document]]): 各查询的检索结果，按相关性从高到低排列。
+        k (int): 平滑常数，越大则排名靠后的文档权重衰减越慢。
+
+    Returns:
+        list[Document]: 按融合得分从高到低排列的文档。
+    """
+    scores: dict[str, float] = {}
+    docs: dict[str, Document] = {}
+    for ranked in results:
+        for rank, doc in enumerate(ranked, start=1):
+            key = doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=lambda key: -scores[key])]
@@ -0,0 +1,275 @@
+"""检索结果的语义缓存。
+
+很多用户会问几乎相同的问题。开启 semantic_cache_enabled 后，make_retriever 返回的检索器
+会先把查询向量化，在同一索引下之前的查询中查找余弦相似度不低于阈值的一条，
+命中时直接返回其检索结果，不再访问向量库；未命中时用这次的查询向量检索，避免重复向量化。
+
+缓存条目按 (retriever_provider, index_name) 分组，并区分嵌入模型与 search_kwargs；
+条目超过 TTL 后失效，index_graph 写入或删除某个索引的文档后，该索引的缓存整体失效。
+缓存保存在进程内存中。
+"""
+
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import numpy as np
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStoreRetriever
+
+logger = logging.getLogger(__name__)
+
+IndexKey = tuple[str, str]
+"""(retriever_provider, index_name)"""
+
+
+@dataclass
+class _Entries:
+    """同一索引、同一检索参数下缓存的查询。"""
+
+    vectors: np.ndarray = field(default_factory=lambda: np.empty((0, 0), dtype=np.float32))
+    queries: list[str] = field(default_factory=list)
+    docs: list[list[Document]] = field(default_factory=list)
+    created: list[float] = field(default_factory=list)
+
+    def drop(self, keep: list[int]) -> None:
+        self.vectors = self.vectors[keep]
+        self.queries = [self.queries[i] for i in keep]
+        self.docs = [self.docs[i] for i in keep]
+        self.created = [self.created[i] for i in keep]
+
+
+def _normalize(vector: list[float]) -> np.ndarray:
+    array = np.asarray(vector, dtype=np.float32)
+    norm = float(np.linalg.norm(array))
+    return array / norm if norm else array
+
+
+class SemanticQueryCache:
+    """按索引隔离的语义查询缓存，线程安全。"""
+
+    def __init__(self) -> None:
+        self._indexes: dict[IndexKey, dict[str, _Entries]] = {}
+        self._generations: dict[IndexKey, int] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.invalidations = 0
+
+    def generation(self, index: IndexKey) -> int:
+        """返回索引当前的失效代数，每次失效加一。"""
+        return self._generations.get(index, 0)
+
+    def lookup(
+        self,
+        index: IndexKey,
+        variant: str,
+        vector: np.ndarray,
+        *,
+        threshold: float,
+        ttl: float,
+    ) -> Optional[list[Document]]:
+        """查找与查询向量足够相似且未过期的缓存结果，未命中时返回 None。"""
+        now = time.monotonic()
+        with self._lock:
+            entries = self._indexes.get(index, {}).get(variant)
+            if entries is None or not entries.queries or entries.vectors.shape[1] != vector.shape[0]:
+                self.misses += 1
+                return None
+            similarities = entries.vectors @ vector
+            for i in np.argsort(-similarities):
+                if similarities[i] < threshold:
+                    break
+                if now - entries.created[i] <= ttl:
+                    self.hits += 1
+                    return list(entries.docs[i])
+                self.expired += 1
+            self.misses += 1
+            return None
+
+    def put(
+        self,
+        index: IndexKey,
+        variant: str,
+        query: str,
+        vector: np.ndarray,
+        docs: list[Document],
+        *,
+        generation: int,
+        ttl: float,
+        max_entries: int,
+    ) -> None:
+        """写入一条缓存，同时清理过期条目，超出容量时淘汰最早的条目。
+
+        generation 为检索开始前的失效代数；检索期间索引被写入过时，结果可能已经过时，不写入缓存。
+        """
+        if max_entries <= 0:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if self._generations.get(index, 0) != generation:
+                return
+            entries = self._indexes.setdefault(index, {}).setdefault(variant, _Entries())
+            if entries.queries and entries.vectors.shape[1] != vector.shape[0]:
+                entries = self._indexes[index][variant] = _Entries()
+            keep = [i for i, created in enumerate(entries.created) if now - created <= ttl]
+            keep = keep[len(keep) - max_entries + 1 :] if len(keep) >= max_entries else keep
+            if len(keep) != len(entries.queries):
+                entries.drop(keep)
+            entries.vectors = (
+                vector[None, :]
+                if not entries.queries
+                else np.vstack([entries.vectors, vector[None, :]])
+            )
+            entries.queries.append(query)
+            entries.docs.append(list(docs))
+            entries.created.append(now)
+
+    def invalidate(self, retriever_provider: str, index_name: str) -> None:
+        """丢弃某个索引的全部缓存，在该索引的文档写入或删除后调用。"""
+        index = (retriever_provider, index_name)
+        with self._lock:
+            self._generations[index] = self._generations.get(index, 0) + 1
+            if self._indexes.pop(index, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        """清空缓存与统计信息。"""
+        with self._lock:
+            self._indexes.clear()
+            self.hits = self.misses = self.expired = self.invalidations = 0
+
+    def metrics(self) -> dict[str, Any]:
+        """返回命中率等统计信息。"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "entries": sum(
+                    len(entries.queries)
+                    for variants in self._indexes.values()
+                    for entries in variants.values()
+                ),
+            }
+
+
+semantic_cache = SemanticQueryCache()
+"""进程内共享的语义查询缓存"""
+
+
+class SemanticCacheRetriever(VectorStoreRetriever):
+    """在向量库检索之前查询语义缓存的检索器。
+
+    只缓存检索读取；写入（aadd_documents 等）直接作用于向量库，
+    写入后由调用方调用 semantic_cache.invalidate 使缓存失效。
+    """
+
+    cache: Any = None
+    index: IndexKey = ("", "")
+    embedding_model: str = ""
+    threshold: float = 0.95
+    ttl: float = 600.0
+    max_entries: int = 512
+
+    def _variant(self, kwargs: dict[str, Any]) -> str:
+        return json.dumps(
+            [self.embedding_model, self.search_type, kwargs],
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun, **kwargs: Any
+    ) -> list[Document]:
+        if self.vectorstore.embeddings is None:
+            return super()._get_relevant_documents(query, run_manager=run_manager, **kwargs)
+        kwargs_ = self.search_kwargs | kwargs
+        variant = self._variant(kwargs_)
+        generation = self.cache.generation(self.index)
+        embedding = self.vectorstore.embeddings.embed_query(query)
+        vector = _normalize(embedding)
+        cached = self.cache.lookup(
+            self.index, variant, vector, threshold=self.threshold, ttl=self.ttl
+        )
+        if cached is not None:
+            logger.info("语义缓存命中: %s", self.cache.metrics())
+            return cached
+        docs = None
+        if self.search_type == "similarity":
+            try:
+                docs = self.vectorstore.similarity_search_by_vector(embedding, **kwargs_)
+            except NotImplementedError:
+                pass
+        if docs is None:
+            docs = super()._get_relevant_documents(query, run_manager=run_manager, **kwargs)
+        self.cache.put(
+            self.index,
+            variant,
+            query,
+            vector,
+            docs,
+            generation=generation,
+            ttl=self.ttl,
+            max_entries=self.max_entries,
+        )
+        return docs
+
+    async def _aget_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: AsyncCallbackManagerForRetrieverRun,
+        **kwargs: Any,
+    ) -> list[Document]:
+        if self.vectorstore.embeddings is None:
+            return await super()._aget_relevant_documents(
+                query, run_manager=run_manager, **kwargs
+            )
+        kwargs_ = self.search_kwargs | kwargs
+        variant = self._variant(kwargs_)
+        generation = self.cache.generation(self.index)
+        embedding = await self.vectorstore.embeddings.aembed_query(query)
+        vector = _normalize(embedding)
+        cached = self.cache.lookup(
+            self.index, variant, vector, threshold=self.threshold, ttl=self.ttl
+        )
+        if cached is not None:
+            logger.info("语义缓存命中: %s", self.cache.metrics())
+            return cached
+        docs = None
+        if self.search_type == "similarity":
+            # 复用已经算好的查询向量，避免向量库再次向量化
+            try:
+                docs = await self.vectorstore.asimilarity_search_by_vector(
+                    embedding, **kwargs_
+                )
+            except NotImplementedError:
+                pass
+        if docs is None:
+            docs = await super()._aget_relevant_documents(
+                query, run_manager=run_manager, **kwargs
+            )
+        self.cache.put(
+            self.index,
+            variant,
+            query,
+            vector,
+            docs,
+            generation=generation,
+            ttl=self.ttl,
+            max_entries=self.max_entries,
+        )
+        return docs
@@ -0,0 +1,170 @@
+"""检索结果重排序。
+
+向量检索先多取一些候选（rerank_candidates），再用在 CPU 上运行的小型交叉编码器
+对 (查询, 段落) 成对打分，只保留得分最高的 rerank_top_n 个文档交给回答模型，
+用更少但更相关的文档缩短提示词。
+
+重排序模型的格式与嵌入模型一致，为 "provider/model_name"：
+
+    - fastembed/<model>: fastembed 的 ONNX 交叉编码器，如 "fastembed/Xenova/ms-marco-MiniLM-L-6-v2"；
+    - sentence-transformers/<model>: sentence-transformers 的 CrossEncoder，使用 ONNX 后端，
+      如 "sentence-transformers/cross-encoder/ms-marco-MiniLM-L-6-v2"。
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Optional, Protocol, Sequence
+
+from langchain_core.documents import Document
+
+from shared.configuration import BaseConfiguration
+
+logger = logging.getLogger(__name__)
+
+
+class Reranker(Protocol):
+    """对 (查询, 段落) 对打分的重排序模型。"""
+
+    def score(self, query: str, passages: Sequence[str]) -> list[float]:
+        """返回每个段落与查询的相关性得分，得分越高越相关。"""
+        ...
+
+
+class _FastEmbedReranker:
+    def __init__(self, model: str) -> None:
+        from fastembed.rerank.cross_encoder import TextCrossEncoder
+
+        self.model = TextCrossEncoder(model_name=model)
+
+    def score(self, query: str, passages: Sequence[str]) -> list[float]:
+        return [
+            float(s)
+            for s in self.model.rerank(query, list(passages), batch_size=len(passages))
+        ]
+
+
+class _SentenceTransformersReranker:
+    def __init__(self, model: str) -> None:
+        from sentence_transformers import CrossEncoder
+
+        self.model = CrossEncoder(model, device="cpu", backend="onnx")
+
+    def score(self, query: str, passages: Sequence[str]) -> list[float]:
+        scores = self.model.predict(
+            [(query, passage) for passage in passages], batch_size=len(passages)
+        )
+        return [float(s) for s in scores]
+
+
+@lru_cache(maxsize=4)
+def make_reranker(model: str) -> Reranker:
+    """创建重排序模型，同一模型在进程内只加载一次。
+
+    Args:
+        model (str): 模型名称，格式为 "provider/model_name"。
+
+    Returns:
+        Reranker: 重排序模型实例。
+
+    Raises:
+        ValueError: 如果模型名称的格式错误或不支持的模型提供者。
+    """
+    provider, model = model.split("/", maxsplit=1)
+    match provider:
+        case "fastembed":
+            return _FastEmbedReranker(model)
+        case "sentence-transformers":
+            return _SentenceTransformersReranker(model)
+        case _:
+            raise ValueError(f"Unsupported rerank provider: {provider}")
+
+
+@dataclass
+class RerankStats:
+    """一次重排序的统计信息。"""
+
+    candidates: int = 0
+    kept: int = 0
+    batch_latencies_ms: list[float] = field(default_factory=list)
+
+    def as_dict(self) -> dict[str, object]:
+        """以字典形式返回统计信息。"""
+        return {
+            "candidates": self.candidates,
+            "kept": self.kept,
+            "batches": len(self.batch_latencies_ms),
+            "batch_latencies_ms": self.batch_latencies_ms,
+            "total_ms": round(sum(self.batch_latencies_ms), 1),
+        }
+
+
+async def rerank(
+    query: str,
+    docs: list[Document],
+    reranker: Reranker,
+    *,
+    top_n: int,
+    batch_size: int = 16,
+    stats: Optional[RerankStats] = None,
+) -> list[Document]:
+    """分批为候选文档打分，返回得分最高的 top_n 个文档。
+
+    打分在线程中执行，不阻塞事件循环；得分写入返回文档的 metadata["rerank_score"]。
+
+    Args:
+        query (str): 检索查询。
+        docs (list[Document]): 候选文档。
+        reranker (Reranker): 重排序模型。
+        top_n (int): 保留的文档数。
+        batch_size (int): 每批打分的段落数。
+        stats (Optional[RerankStats]): 传入时记录候选数、保留数和每批耗时。
+
+    Returns:
+        list[Document]: 按得分从高到低排列的文档。
+    """
+    scores: list[float] = []
+    latencies = []
+    for start in range(0, len(docs), max(1, batch_size)):
+        passages = [doc.page_content for doc in docs[start : start + batch_size]]
+        started = time.perf_counter()
+        scores += await asyncio.to_thread(reranker.score, query, passages)
+        latencies.append(round((time.perf_counter() - started) * 1000, 1))
+
+    ranked = sorted(zip(scores, range(len(docs))), key=lambda x: (-x[0], x[1]))
+    kept = [
+        Document(
+            id=docs[i].id,
+            page_content=docs[i].page_content,
+            metadata={**docs[i].metadata, "rerank_score": score},
+        )
+        for score, i in ranked[:top_n]
+    ]
+    if stats is not None:
+        stats.candidates += len(docs)
+        stats.kept += len(kept)
+        stats.batch_latencies_ms += latencies
+    return kept
+
+
+async def rerank_documents(
+    query: str, docs: list[Document], configuration: BaseConfiguration
+) -> list[Document]:
+    """按配置对检索结果重排序；未配置 rerank_model 时原样返回。"""
+    if not configuration.rerank_model or not docs:
+        return docs
+    stats = RerankStats()
+    # 首次加载模型较慢，放到线程中避免阻塞事件循环
+    reranker = await asyncio.to_thread(make_reranker, configuration.rerank_model)
+    reranked = await rerank(
+        query,
+        docs,
+        reranker,
+        top_n=configuration.rerank_top_n,
+        batch_size=configuration.rerank_batch_size,
+        stats=stats,
+    )
+    logger.info("重排序完成: %s", stats.as_dict())
+    return reranked
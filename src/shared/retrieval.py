@@ -13,6 +13,8 @@ from langchain_core.runnables import RunnableConfig
 from langchain_core.vectorstores import VectorStoreRetriever
 
 from shared.configuration import BaseConfiguration
+from shared.filters import apply_filter
+from shared.query_cache import SemanticCacheRetriever, semantic_cache
 
 ## Encoder constructors
 
@@ -60,7 +62,9 @@ def make_elastic_retriever(
     """创建 Elasticsearch 检索器。
 
     该函数根据配置的 Elasticsearch 索引和检索器提供者，创建一个 Elasticsearch 检索器。
-    支持本地 Elasticsearch 实例和 Elastic Cloud 实例。
+    支持本地 Elasticsearch 实例和 Elastic Cloud 实例。客户端按连接参数在进程内复用；
+    开启 elastic_async 且安装了 aiohttp 时，异步检索与写入使用共享的 AsyncElasticsearch；
+    此时若开启 mmr_enabled，检索还会取回存储的向量供 MMR 使用。
 
     Args:
         configuration (BaseConfiguration): 配置对象，包含索引名称、检索器提供者和搜索参数。
@@ -72,17 +76,22 @@ def make_elastic_retriever(
     Raises:
         ValueError: 如果配置的检索器提供者不是 "elastic-local" 或 "elastic"。
     """
-    from langchain_elasticsearch import ElasticsearchStore
+    from shared.elastic import (
+        AsyncElasticsearchStore,
+        async_transport_available,
+        connection_params,
+        get_sync_client,
+    )
 
     connection_options = {}
     if configuration.retriever_provider == "elastic-local":
         connection_options = {
-            "es_user": os.environ["ELASTICSEARCH_USER"],
-            "es_password": os.environ["ELASTICSEARCH_PASSWORD"],
+            "username": os.environ["ELASTICSEARCH_USER"],
+            "password": os.environ["ELASTICSEARCH_PASSWORD"],
         }
 
     else:
-        connection_options = {"es_api_key": os.environ["ELASTICSEARCH_API_KEY"]}
+        connection_options = {"api_key": os.environ["ELASTICSEARCH_API_KEY"]}
 
     
     # Properly handle SSL certificate verification
@@ -91,19 +100,35 @@ def make_elastic_retriever(
     es_params = {
         "verify_certs": verify_certs,
         "ssl_show_warn": not verify_certs,
+        "connections_per_node": configuration.elastic_connections_per_node,
     }
     
     # If using custom CA certificate, add the path
     if verify_certs and "ELASTICSEARCH_CA_CERTS" in os.environ:
         es_params["ca_certs"] = os.environ["ELASTICSEARCH_CA_CERTS"]
 
-    vstore = ElasticsearchStore(
-        **connection_options,  # type: ignore
-        es_url=os.environ["ELASTICSEARCH_URL"],
-        index_name=configuration.index_name,
-        embedding=embedding_model,
-        es_params=es_params, # 新增
+    connection = connection_params(
+        os.environ["ELASTICSEARCH_URL"], **connection_options, params=es_params
     )
+    if configuration.elastic_async and async_transport_available():
+        # 异步检索、写入通过共享的 AsyncElasticsearch 连接池执行
+        vstore = AsyncElasticsearchStore(
+            connection=connection,
+            index_name=configuration.index_name,
+            embedding=embedding_model,
+            # MMR 直接使用命中中存储的向量，不再重新向量化候选文档
+            vector_cache_model=configuration.embedding_model
+            if configuration.mmr_enabled
+            else None,
+        )
+    else:
+        from langchain_elasticsearch import ElasticsearchStore
+
+        vstore = ElasticsearchStore(
+            es_connection=get_sync_client(connection),
+            index_name=configuration.index_name,
+            embedding=embedding_model,
+        )
 
     yield vstore.as_retriever(search_kwargs=configuration.search_kwargs)
 
@@ -169,6 +194,9 @@ def make_retriever(
     """创建检索器。
 
     该函数根据当前配置，创建一个检索器。支持 Elasticsearch、Pinecone 和 MongoDB Atlas 检索器。
+    配置了 rerank_model 时，检索器返回 rerank_candidates 个候选文档，供之后重排序；
+    开启 semantic_cache_enabled 时，返回的检索器会先查询语义缓存。
+    配置了 metadata_filter 时，过滤条件编译为向量库原生的预过滤并合并进 search_kwargs。
 
     Args:
         config (RunnableConfig): 运行配置对象，包含当前的索引名称、检索器提供者和搜索参数。
@@ -180,6 +208,44 @@ def make_retriever(
         ValueError: 如果配置的检索器提供者不是 "elastic", "elastic-local", "pinecone" 或 "mongodb"。
     """
     configuration = BaseConfiguration.from_runnable_config(config)
+    if configuration.metadata_filter:
+        configuration.search_kwargs = apply_filter(
+            configuration.search_kwargs,
+            configuration.retriever_provider,
+            configuration.metadata_filter,
+            configuration.filterable_fields,
+        )
+    if configuration.rerank_model:
+        # 重排序前多取候选文档
+        configuration.search_kwargs = {
+            **configuration.search_kwargs,
+            "k": max(
+                configuration.rerank_candidates,
+                configuration.search_kwargs.get("k", 0),
+            ),
+        }
+    with _make_vectorstore_retriever(configuration) as retriever:
+        if not configuration.semantic_cache_enabled:
+            yield retriever
+            return
+        yield SemanticCacheRetriever(
+            vectorstore=retriever.vectorstore,
+            search_type=retriever.search_type,
+            search_kwargs=retriever.search_kwargs,
+            cache=semantic_cache,
+            index=(configuration.retriever_provider, configuration.index_name),
+            embedding_model=configuration.embedding_model,
+            threshold=configuration.semantic_cache_threshold,
+            ttl=configuration.semantic_cache_ttl,
+            max_entries=configuration.semantic_cache_max_entries,
+        )
+
+
+@contextmanager
+def _make_vectorstore_retriever(
+    configuration: BaseConfiguration,
+) -> Generator[VectorStoreRetriever, None, None]:
+    """根据 retriever_provider 创建对应向量库的检索器。"""
     embedding_model = make_text_encoder(configuration.embedding_model)
     match configuration.retriever_provider:
         case "elastic" | "elastic-local":
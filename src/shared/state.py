@@ -2,7 +2,7 @@
 
 import hashlib
 import uuid
-from typing import Any, Literal, Optional, Union
+from typing import Any, Iterable, Literal, Optional, Union
 
 from langchain_core.documents import Document
 
@@ -21,6 +21,69 @@ def _generate_uuid(page_content: str) -> str:
     return str(uuid.UUID(md5_hash))
 
 
+class DocumentList(list[Document]):
+    """带 id 索引的文档列表，作为 reduce_docs 的返回值在状态中流转。
+
+    索引记录每个 uuid 在列表中的位置，去重判断为 O(1)。归约时新列表与旧列表共享同一个索引，
+    只追加新文档的条目：较短的旧列表只认位置在自身长度以内的条目，因此不受影响。
+    从非最新的旧列表再次归约（状态分叉）时，为分叉出的列表重建一份独立的索引。
+
+    注意：每次归约仍会把旧列表浅拷贝到新列表（复制 n 个引用），这一步是 O(n) 的；
+    省掉的是逐个文档计算去重键的 O(n) 工作，拷贝本身的耗时见 benchmarks/bench_reduce_docs.py。
+    """
+
+    __slots__ = ("_positions", "_tip")
+
+    def __init__(self, docs: Iterable[Document] = ()) -> None:
+        super().__init__(docs)
+        self._positions: dict[str, int] = {}
+        for i, doc in enumerate(self):
+            self._positions.setdefault(doc.metadata.get("uuid", ""), i)
+        # 共享索引当前覆盖的列表长度
+        self._tip = [len(self)]
+
+    def contains_id(self, doc_id: str) -> bool:
+        """判断列表中是否已有该 uuid 的文档。"""
+        pos = self._positions.get(doc_id)
+        return pos is not None and pos < len(self)
+
+    def extended(self, docs: list[Document]) -> "DocumentList":
+        """返回追加了（已去重的）新文档的新列表，原列表不变。
+
+        新列表是旧列表的浅拷贝，复制引用的开销与已有文档数成正比。
+        """
+        if len(self) != self._tip[0]:
+            return DocumentList([*self, *docs])
+        result = DocumentList.__new__(DocumentList)
+        list.__init__(result, self)
+        result._positions, result._tip = self._positions, self._tip
+        for doc in docs:
+            self._positions.setdefault(doc.metadata["uuid"], len(result))
+            list.append(result, doc)
+        self._tip[0] = len(result)
+        return result
+
+    def __reduce__(self) -> tuple:
+        return (DocumentList, (list(self),))
+
+
+def _coerce_doc(item: Union[Document, dict[str, Any], str]) -> Document:
+    """把字符串、字典或缺少 uuid 的文档转换为带 uuid 的 Document，不修改、不深拷贝输入。"""
+    if isinstance(item, str):
+        return Document(page_content=item, metadata={"uuid": _generate_uuid(item)})
+    if isinstance(item, dict):
+        metadata = item.get("metadata", {})
+        item_id = metadata.get("uuid") or _generate_uuid(item.get("page_content", ""))
+        return Document(**{**item, "metadata": {**metadata, "uuid": item_id}})
+    if item.metadata.get("uuid"):
+        return item
+    return Document(
+        id=item.id,
+        page_content=item.page_content,
+        metadata={**item.metadata, "uuid": _generate_uuid(item.page_content)},
+    )
+
+
 def reduce_docs(
     existing: Optional[list[Document]],
     new: Union[
@@ -37,6 +100,9 @@ def reduce_docs(
     它可以删除现有文档，从字符串或字典创建新文档，或返回现有文档。
     它还会根据文档 ID 将现有文档与新文档合并。
 
+    返回值为 DocumentList：已有文档的 id 索引在多次归约之间复用，
+    每次归约的去重开销只与新文档数量有关；缺少 uuid 的文档浅拷贝元数据后补上 uuid。
+
     Args:
         existing (Optional[Sequence[Document]]): 状态中已存在的文档（如果有）。
         new (Union[Sequence[Document], Sequence[dict[str, Any]], Sequence[str], str, Literal["delete"]]):
@@ -44,46 +110,26 @@ def reduce_docs(
             或字面量 "delete"。
     """
     if new == "delete":
-        return []
+        return DocumentList()
 
-    existing_list = list(existing) if existing else []
+    if isinstance(existing, DocumentList):
+        existing_list = existing
+    else:
+        # 从检查点恢复的状态是普通列表，只需在第一次归约时建立索引
+        existing_list = DocumentList(existing or ())
     if isinstance(new, str):
-        return existing_list + [
-            Document(page_content=new, metadata={"uuid": _generate_uuid(new)})
-        ]
+        new = [new]
+    if not isinstance(new, list):
+        return existing_list
 
     new_list = []
-    if isinstance(new, list):
-        existing_ids = set(doc.metadata.get("uuid") for doc in existing_list)
-        for item in new:
-            if isinstance(item, str):
-                item_id = _generate_uuid(item)
-                new_list.append(Document(page_content=item, metadata={"uuid": item_id}))
-                existing_ids.add(item_id)
-
-            elif isinstance(item, dict):
-                metadata = item.get("metadata", {})
-                item_id = metadata.get("uuid") or _generate_uuid(
-                    item.get("page_content", "")
-                )
-
-                if item_id not in existing_ids:
-                    new_list.append(
-                        Document(**{**item, "metadata": {**metadata, "uuid": item_id}})
-                    )
-                    existing_ids.add(item_id)
-
-            elif isinstance(item, Document):
-                item_id = item.metadata.get("uuid", "")
-                if not item_id:
-                    item_id = _generate_uuid(item.page_content)
-                    new_item = item.copy(deep=True)
-                    new_item.metadata["uuid"] = item_id
-                else:
-                    new_item = item
-
-                if item_id not in existing_ids:
-                    new_list.append(new_item)
-                    existing_ids.add(item_id)
-
-    return existing_list + new_list
+    new_ids = set()
+    for item in new:
+        doc = _coerce_doc(item)
+        item_id = doc.metadata["uuid"]
+        if item_id not in new_ids and not existing_list.contains_id(item_id):
+            new_list.append(doc)
+            new_ids.add(item_id)
+    if not new_list:
+        return existing_list
+    return existing_list.extended(new_list)
@@ -3,18 +3,21 @@
 Functions:
     format_docs: Convert documents to an xml-formatted string.
     load_chat_model: Load a chat model from a model name.
+    register_loader: Register a document loader for one or more file extensions.
+    load_document: Load a file with the loader registered for its extension.
+    normalize_question: Normalize a question for use as a cache key.
 """
 
-from typing import Optional
+import importlib
+import os
+import re
+import unicodedata
+from typing import Any, Optional
 
 from langchain.chat_models import init_chat_model
 from langchain_core.documents import Document
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import AnyMessage
-from langchain_community.document_loaders import (UnstructuredExcelLoader, UnstructuredWordDocumentLoader,
-                                                  UnstructuredPDFLoader, UnstructuredImageLoader,
-                                                  UnstructuredPowerPointLoader, UnstructuredCSVLoader,
-                                                  UnstructuredMarkdownLoader, TextLoader)
 
 
 def _format_doc(doc: Document) -> str:
@@ -82,41 +85,122 @@ def load_chat_model(fully_specified_name: str) -> BaseChatModel:
     return init_chat_model(model, model_provider=provider)
 
 
+_DEFAULT_LOADER_MODULE = "langchain_community.document_loaders"
+
+_LOADER_REGISTRY: dict[str, tuple[str, str, dict[str, Any]]] = {}
+"""扩展名 -> (模块路径, 加载器类名, 默认参数)，加载器类在首次使用时才导入"""
+
+_LOADER_CLASSES: dict[tuple[str, str], Any] = {}
+"""已导入的加载器类缓存"""
+
+
+def register_loader(
+    extensions: str | list[str],
+    loader_name: str,
+    module: str = _DEFAULT_LOADER_MODULE,
+    **default_kwargs: Any,
+) -> None:
+    """为一个或多个文件扩展名注册文档加载器。
+
+    注册时只记录加载器所在的模块与类名，不会导入任何依赖；
+    第一次加载该类型的文件时才会真正导入对应的后端。
+
+    Args:
+        extensions (str | list[str]): 文件扩展名，例如 ".pdf" 或 [".doc", ".docx"]。
+        loader_name (str): 加载器类名，例如 "UnstructuredPDFLoader"。
+        module (str): 加载器所在的模块路径。
+        **default_kwargs: 构造加载器时使用的默认参数。
+    """
+    if isinstance(extensions, str):
+        extensions = [extensions]
+    for extension in extensions:
+        _LOADER_REGISTRY[extension.lower()] = (module, loader_name, default_kwargs)
+
+
+def supported_extensions() -> tuple[str, ...]:
+    """返回当前已注册加载器的所有文件扩展名。"""
+    return tuple(_LOADER_REGISTRY)
+
+
+def _get_loader_class(module: str, loader_name: str) -> Any:
+    """按需导入加载器类，并缓存导入结果。"""
+    key = (module, loader_name)
+    if key not in _LOADER_CLASSES:
+        _LOADER_CLASSES[key] = getattr(importlib.import_module(module), loader_name)
+    return _LOADER_CLASSES[key]
+
+
+def load_document(file_path: str, **kwargs: Any) -> list[Document]:
+    """根据文件扩展名选择已注册的加载器读取文件。
+
+    Args:
+        file_path (str): 文件路径。
+        **kwargs: 覆盖注册时默认参数的加载器参数。
+
+    Returns:
+        list[Document]: 加载得到的文档列表。
+
+    Raises:
+        ValueError: 如果该文件类型没有注册加载器。
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    return _load_registered(extension, file_path, **kwargs)
+
+
+def _load_registered(extension: str, file_path: str, **kwargs: Any) -> list[Document]:
+    """使用为指定扩展名注册的加载器读取文件。"""
+    if extension not in _LOADER_REGISTRY:
+        raise ValueError(f"不支持的文件类型: {extension}")
+    module, loader_name, default_kwargs = _LOADER_REGISTRY[extension]
+    loader_cls = _get_loader_class(module, loader_name)
+    loader = loader_cls(file_path, **{**default_kwargs, **kwargs})
+    return loader.load()
+
+
+# mode: 加载模式 'single', 'elements', 'paged'
+# strategy: pdf加载策略 'auto', 'fast', 'ocr_only'【会把pdf转为图片进行Ocr】
+# ocr_languages: 语言 None, "eng+chi_sim"
+register_loader(".txt", "TextLoader", encoding=None, autodetect_encoding=True)
+register_loader(
+    ".pdf",
+    "UnstructuredPDFLoader",
+    mode="single",
+    strategy="auto",
+    ocr_languages="eng+chi_sim",
+)
+register_loader([".doc", ".docx"], "UnstructuredWordDocumentLoader", mode="single")
+register_loader([".xls", ".xlsx"], "UnstructuredExcelLoader", mode="single")
+register_loader([".ppt", ".pptx"], "UnstructuredPowerPointLoader", mode="single")
+register_loader(".csv", "UnstructuredCSVLoader", mode="single")
+register_loader([".md", ".markdown"], "UnstructuredMarkdownLoader", mode="single")
+register_loader(
+    [".png", ".jpg", ".jpeg", ".bmp", ".tiff"], "UnstructuredImageLoader", mode="single"
+)
+
+
 def load_word(file_path, **kwargs):
     """
     加载Word文件
-    mode: 加载模式 'single', 'elements', 'paged'
     param file_path: 文件路径
     param kwargs: 其他参数
     """
-    loader = UnstructuredWordDocumentLoader(file_path, mode='single', **kwargs)
-    documents = loader.load()
-    return documents
+    return _load_registered(".docx", file_path, **kwargs)
 
 def load_pdf(file_path, **kwargs):
     """
     加载pdf文件
-    mode: 加载模式 'single', 'elements', 'paged'
-    strategy: 加载策略  'auto', 'fast', 'ocr_only'【会把pdf转为图片进行Ocr】,
-    ocr_languages: 语言 None, "eng+chi_sim"
     param file_path: 文件路径
     param kwargs: 其他参数
     """
-    loader = UnstructuredPDFLoader(file_path, mode='single', strategy='auto', ocr_languages="eng+chi_sim",
-                                        **kwargs)
-    documents = loader.load()
-    return documents
+    return _load_registered(".pdf", file_path, **kwargs)
 
 def load_txt(file_path, **kwargs):
     """
     加载txt文件
-    txt_encoding: None, 'utf-8'
     param file_path: 文件路径
     param kwargs: 其他参数
     """
-    loader = TextLoader(file_path, encoding=None, autodetect_encoding=True)
-    documents = loader.load()
-    return documents
+    return _load_registered(".txt", file_path, **kwargs)
 
 def get_message_text(msg: AnyMessage) -> str:
     """从消息对象中提取文本内容。
@@ -146,3 +230,17 @@ def get_message_text(msg: AnyMessage) -> str:
     else:
         txts = [c if isinstance(c, str) else (c.get("text") or "") for c in content]
         return "".join(txts).strip()
+
+
+_TRAILING_PUNCTUATION = re.compile(r"[\s?？。.!！~～]+$")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_question(question: str) -> str:
+    """规范化问题文本，用作缓存的键。
+
+    统一全角半角、大小写，合并空白并去掉句末标点。
+    """
+    text = unicodedata.normalize("NFKC", question).strip().lower()
+    text = _WHITESPACE.sub(" ", text)
+    return _TRAILING_PUNCTUATION.sub("", text)
@@ -47,9 +47,12 @@ async def analyze_and_route_query(
         dict[str, Router]: 一个字典，包含 'router' 键，其值为分类结果（分类类型和逻辑）。
     """
 
-    # 如果输入包含了文件路径，那么判断为file_question
-    if state.messages[-1].additional_kwargs.get("file_path"):
-        return {"router": Router(type="file_question", logic=state.messages[-1].additional_kwargs.get("file_path"))}
+    # 如果输入包含了文件路径（单个文件、文件列表或目录），那么判断为file_question
+    additional_kwargs = state.messages[-1].additional_kwargs
+    if additional_kwargs.get("file_path") or additional_kwargs.get("file_paths"):
+        file_paths = [additional_kwargs["file_path"]] if additional_kwargs.get("file_path") else []
+        file_paths.extend(additional_kwargs.get("file_paths") or [])
+        return {"router": Router(type="file_question", logic=", ".join(file_paths))}
     elif state.choose_web_search:
         return {"router": Router(type="web_search", logic="用户选择了网页搜索")}
     
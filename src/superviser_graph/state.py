@@ -90,5 +90,8 @@ class AgentState(InputState):
     router: Router = field(default_factory=lambda: Router(type="general", logic=""))
     """The router's classification of the user's query."""
 
+    file_refs: list[str] = field(default_factory=list)
+    """file_agent在本会话中已解析文件的内容哈希引用，文档内容保存在store中。"""
+
     # Feel free to add additional attributes to your state as needed.
     # Common examples include retrieved documents, extracted entities, API connections, etc.
@@ -0,0 +1,26 @@
+from address_book_agent.cache import VersionedLRUCache, normalize_question
+
+
+def test_normalize_question() -> None:
+    assert normalize_question(" 张三的电话？ ") == normalize_question("张三的电话")
+    assert normalize_question("ＡＢＣ  部门") == "abc 部门"
+
+
+def test_cache_is_invalidated_by_new_version() -> None:
+    cache = VersionedLRUCache(max_size=2)
+    cache.put("book.xlsx", "v1", "q", "answer")
+
+    assert cache.get("book.xlsx", "v1", "q") == "answer"
+    assert cache.get("book.xlsx", "v2", "q") is None
+    assert cache.get("book.xlsx", "v1", "q") is None
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    cache = VersionedLRUCache(max_size=2)
+    cache.put("p", "v", "a", 1)
+    cache.put("p", "v", "b", 2)
+    cache.get("p", "v", "a")
+    cache.put("p", "v", "c", 3)
+
+    assert cache.get("p", "v", "b") is None
+    assert cache.get("p", "v", "a") == 1
@@ -0,0 +1,30 @@
+import os
+
+import pandas as pd
+
+from address_book_agent.dataset import load_address_book
+
+
+def _write_book(path, rows) -> None:
+    pd.DataFrame(rows, columns=["姓名", "部门", "电话"]).to_excel(path, index=False)
+
+
+def test_load_address_book_caches_and_invalidates(tmp_path) -> None:
+    path = str(tmp_path / "book.xlsx")
+    cache_dir = str(tmp_path / "cache")
+    _write_book(path, [["张三", "研发部", "123"], ["李四", "研发部", "456"]])
+
+    first = load_address_book(path, cache_dir=cache_dir, categorical_columns=["部门"])
+    second = load_address_book(path, cache_dir=cache_dir, categorical_columns=["部门"])
+
+    assert second is first
+    assert isinstance(first.df["部门"].dtype, pd.CategoricalDtype)
+    assert any(name.endswith(".parquet") for name in os.listdir(cache_dir))
+
+    _write_book(path, [["王五", "市场部", "789"]])
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    third = load_address_book(path, cache_dir=cache_dir, categorical_columns=["部门"])
+
+    assert third.version != first.version
+    assert third.df["姓名"].tolist() == ["王五"]
@@ -0,0 +1,105 @@
+import pandas as pd
+import pytest
+from langchain_core.messages import AIMessage
+
+from address_book_agent import graph as address_book_graph
+from address_book_agent.state import AddressBookQuery
+
+
+class _FakeStructuredModel:
+    def __init__(self, calls: list[str]) -> None:
+        self.calls = calls
+
+    async def ainvoke(self, *args, **kwargs):
+        self.calls.append("extract")
+        return AddressBookQuery(name="张三", fields=["phone"])
+
+
+class _FakeChatModel:
+    def __init__(self, calls: list[str]) -> None:
+        self.calls = calls
+
+    def with_structured_output(self, schema):
+        assert schema is AddressBookQuery
+        return _FakeStructuredModel(self.calls)
+
+    async def ainvoke(self, *args, **kwargs):  # pragma: no cover - must not be called
+        self.calls.append("chat")
+        raise AssertionError("respond should not call the LLM")
+
+
+@pytest.mark.asyncio
+async def test_single_field_lookup_skips_think_and_respond(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "book.xlsx"
+    pd.DataFrame({"姓名": ["张三", "李四"], "电话": ["123", "456"]}).to_excel(
+        path, index=False
+    )
+    calls: list[str] = []
+    monkeypatch.setattr(
+        address_book_graph, "load_chat_model", lambda _: _FakeChatModel(calls)
+    )
+    config = {
+        "configurable": {
+            "address_book_path": str(path),
+            "address_book_cache_dir": None,
+        }
+    }
+
+    result = await address_book_graph.graph.ainvoke(
+        {"messages": [("user", "张三的电话")]}, config
+    )
+    assert result["messages"][-1].content == "张三的电话是123。"
+    assert result["llm_calls_saved"] == 2
+    assert calls == ["extract"]
+
+    result = await address_book_graph.graph.ainvoke(
+        {"messages": [("user", "张三的电话？")]}, config
+    )
+    assert result["llm_calls_saved"] == 3
+    assert calls == ["extract"]
+
+
+class _CountingChatModel:
+    def __init__(self, calls: list[str]) -> None:
+        self.calls = calls
+
+    def with_structured_output(self, schema):
+        return self
+
+    async def ainvoke(self, *args, **kwargs):
+        from address_book_agent.state import ThinkContent
+
+        if not args or not isinstance(args[0], list):
+            self.calls.append("respond")
+            return AIMessage(content="张三的电话是123。")
+        self.calls.append("think")
+        return ThinkContent(need_retrive=False, thought="够了")
+
+
+@pytest.mark.asyncio
+async def test_repeated_pandas_query_makes_no_llm_call(tmp_path, monkeypatch) -> None:
+    path = tmp_path / "book.xlsx"
+    pd.DataFrame({"姓名": ["张三"], "电话": ["123"]}).to_excel(path, index=False)
+    calls: list[str] = []
+
+    async def fake_pandas_agent(snapshot, question, configuration):
+        calls.append("pandas_agent")
+        return "张三 123"
+
+    monkeypatch.setattr(address_book_graph, "load_chat_model", lambda _: _CountingChatModel(calls))
+    monkeypatch.setattr(address_book_graph, "_ask_pandas_agent", fake_pandas_agent)
+    config = {
+        "configurable": {
+            "address_book_path": str(path),
+            "address_book_cache_dir": None,
+            "address_book_backend": "pandas",
+        }
+    }
+
+    first = await address_book_graph.graph.ainvoke({"messages": [("user", "张三电话多少")]}, config)
+    assert calls == ["pandas_agent", "think", "respond"]
+
+    calls.clear()
+    second = await address_book_graph.graph.ainvoke({"messages": [("user", "张三电话多少？")]}, config)
+    assert calls == []
+    assert second["messages"][-1].content == first["messages"][-1].content
@@ -0,0 +1,70 @@
+import pandas as pd
+import pytest
+
+from address_book_agent.lookup import AddressBookIndex, format_records
+from address_book_agent.state import AddressBookQuery
+
+
+@pytest.fixture
+def index() -> AddressBookIndex:
+    df = pd.DataFrame(
+        {
+            "姓名": ["张三", "张三丰", "李四", "王五"],
+            "部门": ["研发部", "研发部", "市场部", "财务部"],
+            "电话": [13800001234, 13900005678, 13700009999, None],
+            "邮箱": ["zhangsan@x.com", "zsf@x.com", "lisi@x.com", "wangwu@x.com"],
+        }
+    )
+    return AddressBookIndex(df)
+
+
+def _names(index: AddressBookIndex, **kwargs) -> list[str]:
+    result = index.search(AddressBookQuery(**kwargs))
+    return [record["姓名"] for record in result.records]
+
+
+def test_exact_prefix_and_fuzzy_matching(index: AddressBookIndex) -> None:
+    assert _names(index, name="张三") == ["张三"]
+    assert _names(index, name="张", match_mode="prefix") == ["张三", "张三丰"]
+    assert _names(index, department="研发") == ["张三", "张三丰"]
+    assert _names(index, phone="1234") == ["张三"]
+    assert _names(index, email="lisi@x.com") == ["李四"]
+
+
+def test_filters_are_intersected(index: AddressBookIndex) -> None:
+    assert _names(index, name="张", department="研发部", phone="5678") == ["张三丰"]
+
+
+def test_pinyin_name_matching(index: AddressBookIndex) -> None:
+    pytest.importorskip("pypinyin")
+    assert _names(index, name="lisi") == ["李四"]
+    assert _names(index, name="zsf") == ["张三丰"]
+
+
+def test_requested_fields_and_unsupported_queries(index: AddressBookIndex) -> None:
+    query = AddressBookQuery(name="张三", fields=["phone"])
+    result = index.search(query)
+
+    assert result.columns == ["姓名", "电话"]
+    assert format_records(result.records) == "姓名: 张三, 电话: 13800001234"
+    assert not index.can_answer(AddressBookQuery(department="研发部", supported=False))
+    assert not index.can_answer(AddressBookQuery())
+
+
+def test_fuzzy_single_hit_is_not_unambiguous(index: AddressBookIndex) -> None:
+    book = AddressBookIndex(pd.DataFrame({"姓名": ["张三", "李四"], "电话": ["123", "456"]}))
+    result = book.search(AddressBookQuery(name="张三丰", fields=["phone"]))
+
+    assert [record["姓名"] for record in result.records] == ["张三"]
+    assert result.match_modes == {"name": "fuzzy"}
+    assert not result.is_unambiguous()
+    assert result.render_single_field_answer() is None
+
+    exact = book.search(AddressBookQuery(name="张三", fields=["phone"]))
+    assert exact.render_single_field_answer() == "张三的电话是123。"
+
+
+def test_filter_normalized_to_empty_matches_nothing(index: AddressBookIndex) -> None:
+    result = index.search(AddressBookQuery(phone="分机号", fields=["name"]))
+    assert result.records == [] and result.match_modes == {"phone": "empty"}
+    assert _names(index, phone="转", department="研发部") == []
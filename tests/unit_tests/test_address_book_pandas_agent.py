@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+from address_book_agent import graph as address_book_graph
+from address_book_agent.cache import agent_cache
+from address_book_agent.configuration import AddressBookAgentConfiguration
+from address_book_agent.dataset import AddressBookSnapshot
+
+pytest.importorskip("tabulate")
+
+
+class _RecordingChatModel(FakeListChatModel):
+    prompts: list = []
+
+    def _call(self, messages, *args, **kwargs):
+        self.prompts.append(messages[-1].content)
+        return super()._call(messages, *args, **kwargs)
+
+    async def _astream(self, messages, *args, **kwargs):
+        self.prompts.append(messages[-1].content)
+        async for chunk in super()._astream(messages, *args, **kwargs):
+            yield chunk
+
+
+def _step(code: str) -> str:
+    return f"Thought: run code\nAction: python_repl_ast\nAction Input: {code}"
+
+
+@pytest.mark.asyncio
+async def test_cached_pandas_agent_does_not_share_locals(monkeypatch) -> None:
+    agent_cache._items.clear()
+    llm = _RecordingChatModel(
+        responses=[
+            _step("df = df[df['姓名'] == '张三']; scratch = 1"),
+            "Final Answer: done",
+            _step("print(len(df), 'scratch' in locals())"),
+            "Final Answer: done",
+        ]
+    )
+    llm.prompts = []
+    monkeypatch.setattr(address_book_graph, "load_chat_model", lambda _: llm)
+    df = pd.DataFrame({"姓名": ["张三", "李四"], "电话": ["123", "456"]})
+    snapshot = AddressBookSnapshot(df=df, version="v1", path="book.xlsx")
+    configuration = AddressBookAgentConfiguration()
+
+    await address_book_graph._ask_pandas_agent(snapshot, "第一问", configuration)
+    await address_book_graph._ask_pandas_agent(snapshot, "第二问", configuration)
+
+    assert "2 False" in llm.prompts[-1]
+    assert len(snapshot.df) == 2
@@ -0,0 +1,42 @@
+import pandas as pd
+import pytest
+
+pytest.importorskip("duckdb")
+
+from address_book_agent.sql import AddressBookSQLEngine  # noqa: E402
+
+
+@pytest.fixture
+def engine() -> AddressBookSQLEngine:
+    df = pd.DataFrame(
+        {
+            "姓名": ["张三", "李四", "王五"],
+            "部门": pd.Categorical(["研发部", "研发部", "市场部"]),
+        }
+    )
+    return AddressBookSQLEngine(df)
+
+
+def test_aggregation_runs_in_one_statement(engine: AddressBookSQLEngine) -> None:
+    result = engine.execute("SELECT count(*) AS n FROM address_book WHERE 部门 = '研发部';")
+
+    assert result.records == [{"n": 2}]
+    assert "研发部" in engine.schema
+
+
+@pytest.mark.parametrize(
+    "sql",
+    [
+        "DELETE FROM address_book",
+        "SELECT 1; DROP TABLE address_book",
+        "COPY address_book TO '/tmp/out.csv'",
+    ],
+)
+def test_rejects_non_select_statements(engine: AddressBookSQLEngine, sql: str) -> None:
+    with pytest.raises(ValueError):
+        engine.execute(sql)
+
+
+def test_external_file_access_is_disabled(engine: AddressBookSQLEngine) -> None:
+    with pytest.raises(Exception, match="disabled"):
+        engine.execute("SELECT * FROM read_csv('/etc/hostname')")
@@ -0,0 +1,83 @@
+from langchain_core.documents import Document
+
+from shared.chunking import (
+    ChunkStats,
+    chunk_documents,
+    estimate_tokens,
+    expand_neighbors,
+    split_sentences,
+)
+
+
+def _doc(text: str, uuid: str = "parent") -> Document:
+    return Document(page_content=text, metadata={"uuid": uuid, "source": "a.txt"})
+
+
+def test_split_sentences_handles_chinese_and_english_boundaries() -> None:
+    text = "第一句。第二句！“第三句？”Fourth one. Fifth\n\n第六句"
+    assert split_sentences(text) == [
+        "第一句。",
+        "第二句！",
+        "“第三句？”",
+        "Fourth one. ",
+        "Fifth\n\n",
+        "第六句",
+    ]
+    assert "".join(split_sentences(text)) == text
+
+
+def test_estimate_tokens_counts_cjk_characters_individually() -> None:
+    assert estimate_tokens("你好") == 2
+    assert estimate_tokens("abcdefgh") == 2
+
+
+def test_chunks_overlap_and_merge_small_tail() -> None:
+    sentences = [f"第{i:02d}句内容。" for i in range(10)]  # 每句 6 个 token
+    stats = ChunkStats()
+    chunks = chunk_documents(
+        [_doc("".join(sentences))],
+        chunk_size=18,
+        chunk_overlap=6,
+        min_chunk_size=13,
+        stats=stats,
+    )
+
+    texts = [chunk.page_content for chunk in chunks]
+    assert texts[0] == "".join(sentences[0:3])
+    assert texts[1] == "".join(sentences[2:5])
+    # 尾块只有两句（12 个 token），并入前一块
+    assert texts[-1] == "".join(sentences[6:10])
+    assert [c.metadata["chunk_index"] for c in chunks] == list(range(len(chunks)))
+    assert {c.metadata["chunk_count"] for c in chunks} == {len(chunks)}
+    assert all(c.metadata["parent_id"] == "parent" for c in chunks)
+    assert all(c.metadata["source"] == "a.txt" for c in chunks)
+    assert stats.as_dict()["chunks"] == len(chunks)
+
+
+def test_chunk_ids_are_deterministic_and_short_docs_unchanged() -> None:
+    text = "".join(f"句子{i}。" for i in range(50))
+    first = chunk_documents([_doc(text)], chunk_size=20, chunk_overlap=0)
+    second = chunk_documents([_doc(text)], chunk_size=20, chunk_overlap=0)
+    assert [c.metadata["uuid"] for c in first] == [c.metadata["uuid"] for c in second]
+    assert len({c.metadata["uuid"] for c in first}) == len(first)
+
+    short = _doc("很短的文档。", uuid="short")
+    assert chunk_documents([short]) == [short]
+
+
+def test_expand_neighbors_uses_window_and_skips_covered_hits() -> None:
+    text = "".join(f"句子{i}。" for i in range(12))
+    chunks = chunk_documents([_doc(text)], chunk_size=8, chunk_overlap=0, window=1)
+    assert len(chunks) >= 4
+
+    other = Document(page_content="其他", metadata={"uuid": "x"})
+    expanded = expand_neighbors([chunks[1], chunks[2], other, chunks[3]])
+
+    # chunks[2] 已被 chunks[1] 的窗口覆盖；chunks[3] 没有被覆盖
+    assert [d.page_content for d in expanded] == [
+        chunks[1].metadata["window"],
+        other.page_content,
+        chunks[3].metadata["window"],
+    ]
+    assert chunks[0].page_content in expanded[0].page_content
+    assert "window" not in expanded[0].metadata
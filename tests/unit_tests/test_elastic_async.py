@@ -0,0 +1,165 @@
+import asyncio
+import json
+import threading
+
+import pytest
+
+pytest.importorskip("langchain_elasticsearch")
+web = pytest.importorskip("aiohttp.web")
+
+from langchain_core.embeddings import DeterministicFakeEmbedding  # noqa: E402
+
+from shared.elastic import (  # noqa: E402
+    AsyncElasticsearch,
+    AsyncElasticsearchStore,
+    aclose_clients,
+    connection_params,
+    get_async_client,
+    get_sync_client,
+)
+from shared.configuration import BaseConfiguration  # noqa: E402
+from shared.mmr import mmr_documents, vector_cache  # noqa: E402
+from shared.multi_query import amulti_search  # noqa: E402
+
+_HEADERS = {"X-Elastic-Product": "Elasticsearch"}
+
+
+def _hits(tag: str, k: int, with_vector: bool = False) -> dict:
+    def source(i: int) -> dict:
+        extra = {"vector": [1.0, float(i)]} if with_vector else {}
+        return {"text": f"{tag}-{i}", "metadata": {}, **extra}
+
+    return {
+        "hits": {
+            "hits": [
+                {"_id": f"{tag}-{i}", "_score": 1.0, "_source": source(i)}
+                for i in range(k)
+            ]
+        }
+    }
+
+
+@pytest.fixture(scope="module")
+def stand_in():
+    requests: list[str] = []
+
+    async def info(request):
+        requests.append("info")
+        return web.json_response({"version": {"number": "8.15.0"}}, headers=_HEADERS)
+
+    async def search(request):
+        requests.append("search")
+        body = await request.json()
+        with_vector = "vector" in request.query.get("_source_includes", "")
+        return web.json_response(
+            _hits("search", body.get("size", 4), with_vector), headers=_HEADERS
+        )
+
+    async def msearch(request):
+        requests.append("msearch")
+        lines = [json.loads(line) for line in (await request.text()).splitlines() if line]
+        return web.json_response(
+            {
+                "responses": [
+                    _hits(f"q{i}", body["size"], "vector" in body["_source"]["includes"])
+                    for i, body in enumerate(lines[1::2])
+                ]
+            },
+            headers=_HEADERS,
+        )
+
+    started = threading.Event()
+    port: list[int] = []
+
+    async def serve():
+        app = web.Application()
+        app.router.add_get("/", info)
+        app.router.add_post("/{index}/_search", search)
+        app.router.add_post("/_msearch", msearch)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port.append(site._server.sockets[0].getsockname()[1])
+        started.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=asyncio.run, args=(serve(),), daemon=True).start()
+    started.wait()
+    return f"http://127.0.0.1:{port[0]}", requests
+
+
+@pytest.mark.asyncio
+async def test_async_store_searches_and_batches_through_async_client(stand_in) -> None:
+    url, requests = stand_in
+    store = AsyncElasticsearchStore(
+        connection=connection_params(url),
+        index_name="docs",
+        embedding=DeterministicFakeEmbedding(size=8),
+    )
+
+    docs = await store.asimilarity_search("年假", k=2)
+    assert [d.page_content for d in docs] == ["search-0", "search-1"]
+
+    requests.clear()
+    results = await amulti_search(
+        store.as_retriever(search_kwargs={"k": 1}), ["年假", "报销", "加班"]
+    )
+    assert requests == ["msearch"]
+    assert [r[0].page_content for r in results] == ["q0-0", "q1-0", "q2-0"]
+
+
+def test_clients_connect_lazily_and_close_explicitly(stand_in, monkeypatch) -> None:
+    url, requests = stand_in
+    requests.clear()
+    get_sync_client(connection_params(url, params={"request_timeout": 7}))
+    assert requests == []
+
+    closed = []
+    original_close = AsyncElasticsearch.close
+
+    async def close(self):
+        closed.append(self)
+        await original_close(self)
+
+    monkeypatch.setattr(AsyncElasticsearch, "close", close)
+
+    async def use_clients():
+        first = get_async_client(connection_params(url))
+        await first.info()
+        await aclose_clients()
+        second = get_async_client(connection_params(url))
+        await second.info()
+        await aclose_clients()
+        return first, second
+
+    first, second = asyncio.run(use_clients())
+    assert first is not second
+    assert closed == [first, second]
+
+
+class _QueryOnlyEmbedding(DeterministicFakeEmbedding):
+    async def aembed_documents(self, texts):
+        assert not any("-" in text for text in texts), f"re-embedded hits {texts}"
+        return await super().aembed_documents(texts)
+
+
+@pytest.mark.asyncio
+async def test_mmr_uses_vectors_returned_with_the_hits(stand_in) -> None:
+    url, _ = stand_in
+    vector_cache.clear()
+    embedding = _QueryOnlyEmbedding(size=2)
+    store = AsyncElasticsearchStore(
+        connection=connection_params(url),
+        index_name="docs",
+        embedding=embedding,
+        vector_cache_model="fake",
+    )
+    configuration = BaseConfiguration(embedding_model="fake", mmr_enabled=True, mmr_top_k=2)
+
+    docs = await store.asimilarity_search("年假", k=3)
+    batches = await amulti_search(store.as_retriever(search_kwargs={"k": 2}), ["年假", "报销"])
+
+    for candidates in [docs, batches[0] + batches[1]]:
+        kept = await mmr_documents("年假", candidates, configuration, embedding)
+        assert len(kept) == 2
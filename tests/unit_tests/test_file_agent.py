@@ -0,0 +1,121 @@
+import pytest
+from langchain_core.messages import HumanMessage
+from langgraph.graph import END, START, StateGraph
+
+from file_agent.graph import _resolve_file_paths, read_file
+from file_agent.state import FileAgentState
+
+
+def test_resolve_file_paths_expands_directories(tmp_path) -> None:
+    (tmp_path / "b.txt").write_text("b")
+    (tmp_path / "a.pdf").write_bytes(b"")
+    (tmp_path / "ignored.bin").write_bytes(b"")
+    single = tmp_path / "b.txt"
+
+    paths = _resolve_file_paths(
+        {"file_path": str(single), "file_paths": [str(tmp_path)]}
+    )
+
+    assert paths == [str(single), str(tmp_path / "a.pdf")]
+
+
+@pytest.mark.asyncio
+async def test_read_file_parses_files_in_parallel_with_progress(tmp_path) -> None:
+    for name in ("one.txt", "two.txt"):
+        (tmp_path / name).write_text(f"content of {name}", encoding="utf-8")
+
+    builder = StateGraph(FileAgentState)
+    builder.add_node("read_file", read_file)
+    builder.add_edge(START, "read_file")
+    builder.add_edge("read_file", END)
+    graph = builder.compile()
+
+    message = HumanMessage(content="总结", additional_kwargs={"file_paths": [str(tmp_path)]})
+    events = []
+    final = None
+    async for mode, chunk in graph.astream(
+        {"messages": [message]}, stream_mode=["custom", "values"]
+    ):
+        if mode == "custom":
+            events.append(chunk["file_agent"])
+        else:
+            final = chunk
+
+    sources = {doc.metadata["source"] for doc in final["documents"]}
+    assert sources == {str(tmp_path / "one.txt"), str(tmp_path / "two.txt")}
+    assert [e["status"] for e in events].count("done") == 2
+
+
+@pytest.mark.asyncio
+async def test_read_file_reuses_session_documents(tmp_path) -> None:
+    from langgraph.checkpoint.memory import InMemorySaver
+    from langgraph.store.memory import InMemoryStore
+
+    path = tmp_path / "report.txt"
+    path.write_text("季度报告", encoding="utf-8")
+    store = InMemoryStore()
+
+    builder = StateGraph(FileAgentState)
+    builder.add_node("read_file", read_file)
+    builder.add_edge(START, "read_file")
+    builder.add_edge("read_file", END)
+    graph = builder.compile(checkpointer=InMemorySaver(), store=store)
+    config = {"configurable": {"thread_id": "t1"}}
+
+    async def run(message: HumanMessage) -> tuple[list[str], dict]:
+        statuses, final = [], None
+        async for mode, chunk in graph.astream(
+            {"messages": [message], "documents": "delete"},
+            config,
+            stream_mode=["custom", "values"],
+        ):
+            if mode == "custom":
+                statuses.append(chunk["file_agent"]["status"])
+            else:
+                final = chunk
+        return statuses, final
+
+    kwargs = {"file_path": str(path)}
+    statuses, _ = await run(HumanMessage(content="总结", additional_kwargs=kwargs))
+    assert statuses == ["started", "done"]
+
+    statuses, final = await run(HumanMessage(content="再看看", additional_kwargs=kwargs))
+    assert statuses == ["started", "cached"]
+    assert len(final["file_refs"]) == 1
+
+    _, final = await run(HumanMessage(content="上述文件讲了什么"))
+    assert [doc.page_content for doc in final["documents"]] == ["季度报告"]
+
+
+def test_update_file_refs_evicts_least_recently_used() -> None:
+    from file_agent.memory import update_file_refs
+
+    refs, evicted = update_file_refs(["a", "b", "c"], ["a", "d"], max_files=3)
+
+    assert refs == ["c", "a", "d"]
+    assert evicted == ["b"]
+
+
+@pytest.mark.asyncio
+async def test_session_documents_are_not_embedded_by_an_indexed_store() -> None:
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from langchain_core.documents import Document
+    from langgraph.store.memory import InMemoryStore
+
+    from file_agent.memory import SessionDocumentMemory
+
+    class _CountingEmbedding(DeterministicFakeEmbedding):
+        calls: list[list[str]] = []
+
+        def embed_documents(self, texts):
+            self.calls.append(list(texts))
+            return super().embed_documents(texts)
+
+    embeddings = _CountingEmbedding(size=8)
+    store = InMemoryStore(index={"embed": embeddings, "dims": 8})
+    memory = SessionDocumentMemory(store, "thread-1")
+
+    await memory.aput("hash", "a.txt", [Document(page_content="很长的文件内容")])
+
+    assert embeddings.calls == []
+    assert [d.page_content for d in await memory.aload(["hash"])] == ["很长的文件内容"]
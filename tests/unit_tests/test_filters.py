@@ -0,0 +1,56 @@
+import pytest
+
+from shared.filters import (
+    MetadataFilter,
+    apply_filter,
+    normalize_metadata,
+    to_elasticsearch,
+    to_pinecone,
+)
+
+FIELDS = {"source": "keyword", "date": "date", "user_id": "keyword", "pages": "number"}
+SPEC = {"source": "a.pdf", "doc_type": {"in": ["faq"]}, "date": {"gte": "2024-01-01"}}
+
+
+def test_parse_shorthand_and_reject_bad_conditions() -> None:
+    parsed = MetadataFilter.parse(SPEC)
+    assert [(c.field, c.op) for c in parsed.conditions] == [
+        ("source", "eq"),
+        ("doc_type", "in"),
+        ("date", "gte"),
+    ]
+    assert MetadataFilter.parse(parsed.model_dump()) == parsed
+    with pytest.raises(ValueError):
+        MetadataFilter.parse({"source": {"in": "a.pdf"}})
+    with pytest.raises(ValueError):
+        MetadataFilter.parse({"source": {"like": "a"}})
+
+
+def test_compile_to_native_prefilters() -> None:
+    parsed = MetadataFilter.parse(SPEC)
+    assert to_elasticsearch(parsed, FIELDS) == [
+        {"term": {"metadata.source": "a.pdf"}},
+        {"terms": {"metadata.doc_type.keyword": ["faq"]}},
+        {"range": {"metadata.date": {"gte": 1704067200}}},
+    ]
+    assert to_pinecone(parsed, FIELDS) == {
+        "$and": [
+            {"source": {"$eq": "a.pdf"}},
+            {"doc_type": {"$in": ["faq"]}},
+            {"date": {"$gte": 1704067200}},
+        ]
+    }
+
+    es = apply_filter({"k": 4, "filter": [{"term": {"x": 1}}]}, "elastic", {"user_id": 7}, FIELDS)
+    assert es == {"k": 4, "filter": [{"term": {"x": 1}}, {"term": {"metadata.user_id": "7"}}]}
+    mongo = apply_filter({}, "mongodb", {"user_id": "u1"}, FIELDS)
+    assert mongo == {"pre_filter": {"user_id": {"$eq": "u1"}}}
+    assert apply_filter({"k": 2}, "pinecone", None, FIELDS) == {"k": 2}
+
+
+def test_normalize_metadata_only_touches_declared_fields() -> None:
+    assert normalize_metadata({"date": "2024-01-01T08:00:00+08:00", "pages": "3", "x": "y"}, FIELDS) == {
+        "date": 1704067200,
+        "pages": 3.0,
+        "x": "y",
+    }
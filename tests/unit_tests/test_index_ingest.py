@@ -0,0 +1,70 @@
+import json
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from index_graph import ingest
+from index_graph.ingest import iter_serialized_docs, stream_index
+
+
+class _RecordingStore(InMemoryVectorStore):
+    def __init__(self, fail_after: int | None = None) -> None:
+        super().__init__(DeterministicFakeEmbedding(size=8))
+        self.batches: list[list[str]] = []
+        self.fail_after = fail_after
+
+    async def aadd_embeddings(self, text_embeddings, metadatas, ids):
+        if self.fail_after is not None and len(self.batches) >= self.fail_after:
+            raise RuntimeError("write failed")
+        self.batches.append(ids)
+
+
+def test_iter_serialized_docs_streams_json_arrays(tmp_path, monkeypatch) -> None:
+    monkeypatch.setattr(ingest, "_READ_CHUNK_SIZE", 7)
+    docs = [{"page_content": f"doc {i}", "metadata": {"n": 12345}} for i in range(5)]
+    path = tmp_path / "docs.json"
+    path.write_text(json.dumps(docs, indent=2), encoding="utf-8")
+
+    assert list(iter_serialized_docs(str(path))) == docs
+
+
+def test_iter_serialized_docs_reads_jsonl(tmp_path) -> None:
+    path = tmp_path / "docs.jsonl"
+    path.write_text('"a"\n\n{"page_content": "b"}\n', encoding="utf-8")
+
+    assert list(iter_serialized_docs(str(path))) == ["a", {"page_content": "b"}]
+
+
+@pytest.mark.asyncio
+async def test_stream_index_batches_and_resumes(tmp_path) -> None:
+    docs = [f"doc {i}" for i in range(10)]
+    checkpoint = str(tmp_path / "progress.json")
+    failing = _RecordingStore(fail_after=2)
+
+    with pytest.raises(RuntimeError):
+        await stream_index(
+            iter(docs),
+            failing,
+            DeterministicFakeEmbedding(size=8),
+            batch_size=3,
+            embed_concurrency=1,
+            queue_size=1,
+            checkpoint_path=checkpoint,
+            source="docs",
+        )
+    assert json.loads(open(checkpoint).read())["committed"] == 6
+
+    store = _RecordingStore()
+    stats = await stream_index(
+        iter(docs),
+        store,
+        DeterministicFakeEmbedding(size=8),
+        batch_size=3,
+        checkpoint_path=checkpoint,
+        source="docs",
+    )
+    assert stats.docs_skipped == 6
+    assert stats.docs_written == 4
+    assert sorted(len(batch) for batch in store.batches) == [1, 3]
+    assert not (tmp_path / "progress.json").exists()
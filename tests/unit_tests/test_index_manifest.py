@@ -0,0 +1,60 @@
+import importlib
+import json
+from contextlib import contextmanager
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+
+index_graph_module = importlib.import_module("index_graph.graph")
+
+
+class _CountingStore(InMemoryVectorStore):
+    def __init__(self) -> None:
+        super().__init__(DeterministicFakeEmbedding(size=8))
+        self.added: list[str] = []
+        self.deleted: list[str] = []
+
+    async def aadd_documents(self, documents, **kwargs):
+        self.added.extend(kwargs["ids"])
+        return await super().aadd_documents(documents, **kwargs)
+
+    async def adelete(self, ids=None, **kwargs):
+        self.deleted.extend(ids)
+        return await super().adelete(ids, **kwargs)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("ingest_mode", ["batch", "stream"])
+async def test_reindex_only_touches_changed_documents(tmp_path, monkeypatch, ingest_mode) -> None:
+    store = _CountingStore()
+
+    @contextmanager
+    def fake_make_retriever(config):
+        yield store.as_retriever()
+
+    monkeypatch.setattr(index_graph_module.retrieval, "make_retriever", fake_make_retriever)
+    docs_file = tmp_path / "docs.json"
+    config = {
+        "configurable": {
+            "docs_file": str(docs_file),
+            "ingest_mode": ingest_mode,
+            "incremental_index": True,
+            "index_manifest_file": str(tmp_path / "manifest.json"),
+        }
+    }
+
+    def doc(doc_id: str, text: str) -> dict:
+        return {"page_content": text, "metadata": {"uuid": doc_id}}
+
+    docs_file.write_text(json.dumps([doc("a", "A"), doc("b", "B"), doc("c", "C")]))
+    await index_graph_module.graph.ainvoke({"docs": []}, config)
+    assert sorted(store.added) == ["a", "b", "c"]
+
+    store.added.clear()
+    docs_file.write_text(json.dumps([doc("a", "A"), doc("b", "B2"), doc("d", "D")]))
+    await index_graph_module.graph.ainvoke({"docs": []}, config)
+
+    assert sorted(store.added) == ["b", "d"]
+    assert store.deleted == ["c"]
+    assert sorted(store.store) == ["a", "b", "d"]
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from shared.configuration import BaseConfiguration
+from shared.mmr import maximal_marginal_relevance, mmr_documents, vector_cache
+
+
+def test_mmr_skips_near_duplicates() -> None:
+    query = [1.0, 0.0]
+    docs = [[1.0, 0.1], [1.0, 0.11], [0.6, 0.8]]
+
+    assert maximal_marginal_relevance(query, docs, k=2, lambda_mult=1.0) == [0, 1]
+    assert maximal_marginal_relevance(query, docs, k=2, lambda_mult=0.3) == [0, 2]
+    assert maximal_marginal_relevance(query, docs, k=10) == maximal_marginal_relevance(
+        np.asarray(query), np.asarray(docs), k=3
+    )
+    assert maximal_marginal_relevance(query, [], k=3) == []
+
+
+class _TableEmbedding(Embeddings):
+    """按文本查表返回向量，并记录批量向量化的文本。"""
+
+    def __init__(self, table):
+        self.table = table
+        self.embedded: list[list[str]] = []
+        self.queries: list[str] = []
+
+    def embed_documents(self, texts):
+        self.embedded.append(list(texts))
+        return [self.table[t] for t in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return self.table[text]
+
+
+@pytest.mark.asyncio
+async def test_mmr_documents_reuses_cached_vectors() -> None:
+    vector_cache.clear()
+    embeddings = _TableEmbedding(
+        {"年假": [1.0, 0.0], "年假规定": [1.0, 0.1], "年假规定。": [1.0, 0.11], "请假流程": [0.6, 0.8]}
+    )
+    docs = [Document(page_content=t) for t in ("年假规定", "年假规定。", "请假流程")]
+
+    assert await mmr_documents("年假", docs, BaseConfiguration(), embeddings) is docs
+
+    configuration = BaseConfiguration(mmr_enabled=True, mmr_lambda=0.3, mmr_top_k=2)
+    kept = await mmr_documents("年假", docs, configuration, embeddings)
+    assert [d.page_content for d in kept] == ["年假规定", "请假流程"]
+
+    await mmr_documents("年假", docs[::-1], configuration, embeddings)
+    assert embeddings.embedded == [["年假规定", "年假规定。", "请假流程"]]
+
+
+@pytest.mark.asyncio
+async def test_mmr_documents_reuses_the_query_vector() -> None:
+    vector_cache.clear()
+    embeddings = _TableEmbedding({"年假": [1.0, 0.0], "年假规定": [1.0, 0.1], "请假流程": [0.6, 0.8]})
+    docs = [Document(page_content=t) for t in ("年假规定", "请假流程")]
+    configuration = BaseConfiguration(mmr_enabled=True, mmr_top_k=1)
+
+    kept = await mmr_documents("年假", docs, configuration, embeddings, query_vector=[1.0, 0.0])
+    assert [d.page_content for d in kept] == ["年假规定"]
+    assert embeddings.queries == []
+
+    vector_cache.put_queries(configuration.embedding_model, ["报销"], [[0.6, 0.8]])
+    kept = await mmr_documents("报销", docs, configuration, embeddings)
+    assert [d.page_content for d in kept] == ["请假流程"]
+    assert embeddings.queries == []
+
+    await mmr_documents("年假", docs, configuration, embeddings)
+    await mmr_documents("年假", docs, configuration, embeddings)
+    assert embeddings.queries == ["年假"]
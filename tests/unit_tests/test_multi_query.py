@@ -0,0 +1,99 @@
+import importlib
+from contextlib import contextmanager
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.messages import HumanMessage
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from shared.mmr import vector_cache
+from shared.multi_query import amulti_search, reciprocal_rank_fusion
+
+retrieval_graph_module = importlib.import_module("retrieval_graph.graph")
+
+
+class _CountingEmbedding(DeterministicFakeEmbedding):
+    batch_calls: int = 0
+    query_calls: int = 0
+
+    def embed_documents(self, texts):
+        self.batch_calls += 1
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.query_calls += 1
+        return super().embed_query(text)
+
+
+def _store() -> InMemoryVectorStore:
+    store = InMemoryVectorStore(_CountingEmbedding(size=16))
+    store.add_texts(
+        ["年假规定", "报销流程", "加班制度", "出差补贴"],
+        metadatas=[{"uuid": str(i)} for i in range(4)],
+    )
+    store.embedding.batch_calls = 0
+    return store
+
+
+def _doc(uuid: str) -> Document:
+    return Document(page_content=uuid, metadata={"uuid": uuid})
+
+
+def test_rrf_rewards_documents_found_by_several_queries() -> None:
+    fused = reciprocal_rank_fusion(
+        [[_doc("a"), _doc("b"), _doc("c")], [_doc("c"), _doc("d")], [_doc("b")]]
+    )
+    assert [d.metadata["uuid"] for d in fused] == ["b", "c", "a", "d"]
+
+
+@pytest.mark.asyncio
+async def test_amulti_search_embeds_all_queries_in_one_batch() -> None:
+    store = _store()
+    retriever = store.as_retriever(search_kwargs={"k": 2})
+
+    results = await amulti_search(retriever, ["年假", "报销", "加班"])
+
+    assert len(results) == 3 and all(len(r) == 2 for r in results)
+    assert store.embedding.batch_calls == 1
+    assert store.embedding.query_calls == 0
+
+
+class _FakeStructuredModel:
+    async def ainvoke(self, *args, **kwargs):
+        return retrieval_graph_module.SearchQueries(queries=["年假天数", "休假规定", "年假天数"])
+
+
+class _FakeChatModel:
+    def with_structured_output(self, schema):
+        assert schema is retrieval_graph_module.SearchQueries
+        return _FakeStructuredModel()
+
+
+@pytest.mark.asyncio
+async def test_generate_and_retrieve_fuse_query_variants(monkeypatch) -> None:
+    store = _store()
+
+    @contextmanager
+    def fake_make_retriever(config):
+        yield store.as_retriever(search_kwargs={"k": 2})
+
+    monkeypatch.setattr(retrieval_graph_module, "load_chat_model", lambda _: _FakeChatModel())
+    monkeypatch.setattr(retrieval_graph_module.retrieval, "make_retriever", fake_make_retriever)
+    state = retrieval_graph_module.State(messages=[HumanMessage(content="年假有几天")])
+    config = {"configurable": {"search_kwargs": {"k": 2}, "num_query_variants": 3}}
+
+    update = await retrieval_graph_module.generate_query(state, config=config)
+    assert update["current_queries"] == ["年假有几天", "年假天数", "休假规定"]
+    assert update["queries"] == ["年假有几天"]
+
+    state.current_queries = update["current_queries"]
+    retrieved = (await retrieval_graph_module.retrieve(state, config=config))["retrieved_docs"]
+    assert len(retrieved) == 2
+    assert len({d.metadata["uuid"] for d in retrieved}) == 2
+    assert store.embedding.batch_calls == 1
+
+    vector_cache.clear()
+    config["configurable"]["mmr_enabled"] = True
+    await retrieval_graph_module.retrieve(state, config=config)
+    assert store.embedding.query_calls == 0
@@ -0,0 +1,106 @@
+import importlib
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from researcher_agent.configuration import ResearcherConfiguration
+from researcher_agent.plan_cache import PlanCache, get_plan_cache, prompt_version
+from shared import retrieval
+
+sub_graph_module = importlib.import_module("researcher_agent.sub_graph")
+
+VECTORS = {
+    "年假有几天": [1.0, 0.0],
+    "年假一共有几天": [0.95, 0.1],
+    "报销流程": [0.0, 1.0],
+}
+
+
+class _TableEmbedding(Embeddings):
+    queries: list[str] = []
+
+    def embed_documents(self, texts):
+        return [VECTORS[t] for t in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return VECTORS[text]
+
+
+def test_plan_cache_normalizes_expires_and_persists(tmp_path, monkeypatch) -> None:
+    path = str(tmp_path / "plan_cache.json")
+    version = prompt_version("prompt", "openai/model")
+    cache = PlanCache(path)
+    cache.put("plan", version, "年假有几天？", ["查年假制度"], vector=[1.0, 0.0], vector_model="m")
+    assert not (tmp_path / "plan_cache.json").exists()
+    cache.save()
+
+    assert cache.get("plan", version, " 年假有几天 ", ttl=60) == ["查年假制度"]
+    assert cache.get("plan", prompt_version("new prompt", "openai/model"), "年假有几天", ttl=60) is None
+    assert cache.get("queries", version, "年假有几天", ttl=60) is None
+    reloaded = PlanCache(path)
+    assert reloaded.get("plan", version, "年假有几天", ttl=60) == ["查年假制度"]
+    assert reloaded.get_similar("plan", version, [1.0, 0.0], vector_model="m", ttl=60, threshold=0.9) == ["查年假制度"]
+    assert '"vector":' not in (tmp_path / "plan_cache.json").read_text()
+    assert (tmp_path / "plan_cache.json.vectors.npz").exists()
+
+    monkeypatch.setattr("researcher_agent.plan_cache.time.time", lambda: 1e12)
+    assert cache.get("plan", version, "年假有几天", ttl=60) is None
+    assert cache.metrics()["hits"] == 1 and cache.metrics()["misses"] == 3
+
+
+def test_plan_cache_similarity_fallback_and_eviction() -> None:
+    cache = PlanCache(None, max_entries=2)
+    cache.put("plan", "v", "年假有几天", ["年假"], vector=VECTORS["年假有几天"], vector_model="m")
+    cache.put("plan", "v", "报销流程", ["报销"], vector=VECTORS["报销流程"], vector_model="m")
+
+    similar = VECTORS["年假一共有几天"]
+    assert cache.get_similar("plan", "v", similar, vector_model="m", ttl=60, threshold=0.9) == ["年假"]
+    assert cache.get_similar("plan", "v", similar, vector_model="m", ttl=60, threshold=0.999) is None
+    assert cache.get_similar("plan", "v", similar, vector_model="other", ttl=60, threshold=0.9) is None
+
+    cache.put("plan", "v", "加班", ["加班"])
+    assert cache.get("plan", "v", "年假有几天", ttl=60) is None
+    assert cache.metrics()["similar_hits"] == 1
+
+
+class _CountingQueryModel:
+    calls = 0
+
+    async def ainvoke(self, *args, **kwargs):
+        _CountingQueryModel.calls += 1
+        return {"queries": ["年假有几天"]}
+
+
+@pytest.mark.asyncio
+async def test_generate_queries_reuses_cached_queries(tmp_path, monkeypatch) -> None:
+    _CountingQueryModel.calls = 0
+    model = SimpleNamespace(with_structured_output=lambda schema: _CountingQueryModel())
+    monkeypatch.setattr(sub_graph_module, "load_chat_model", lambda _: model)
+    monkeypatch.setattr(retrieval, "make_text_encoder", lambda model: _TableEmbedding())
+    configurable = {
+        "plan_cache_enabled": True,
+        "plan_cache_path": str(tmp_path / "plan_cache.json"),
+        "plan_cache_similarity": 0.9,
+    }
+
+    _TableEmbedding.queries = []
+    for question in ["年假有几天", "年假一共有几天", "年假有几天？"]:
+        state = sub_graph_module.ResearcherState(question=question)
+        update = await sub_graph_module.generate_queries(state, config={"configurable": configurable})
+        assert update == {"queries": ["年假有几天"]}
+    assert _CountingQueryModel.calls == 1
+    assert _TableEmbedding.queries == ["年假有几天", "年假一共有几天"]
+
+    cache = get_plan_cache(configurable["plan_cache_path"])
+    await cache.aflush()
+    defaults = ResearcherConfiguration()
+    version = prompt_version(defaults.generate_queries_system_prompt, defaults.query_model)
+    reloaded = PlanCache(configurable["plan_cache_path"])
+    assert reloaded.get("queries", version, "年假有几天", ttl=60) == ["年假有几天"]
+
+    configurable["generate_queries_system_prompt"] = "新的提示词"
+    state = sub_graph_module.ResearcherState(question="年假有几天")
+    await sub_graph_module.generate_queries(state, config={"configurable": configurable})
+    assert _CountingQueryModel.calls == 2
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from shared.query_cache import SemanticCacheRetriever, SemanticQueryCache
+
+
+class _CountingStore(InMemoryVectorStore):
+    def __init__(self) -> None:
+        super().__init__(DeterministicFakeEmbedding(size=16))
+        self.searches = 0
+
+    async def asimilarity_search_by_vector(self, embedding, k=4, **kwargs):
+        self.searches += 1
+        return await super().asimilarity_search_by_vector(embedding, k=k, **kwargs)
+
+
+def _retriever(store, cache, **kwargs) -> SemanticCacheRetriever:
+    return SemanticCacheRetriever(
+        vectorstore=store,
+        search_kwargs={"k": 2},
+        cache=cache,
+        index=("elastic", "docs"),
+        embedding_model="fake",
+        **kwargs,
+    )
+
+
+@pytest.fixture
+def store() -> _CountingStore:
+    store = _CountingStore()
+    store.add_texts(["年假规定", "报销流程", "加班制度"])
+    return store
+
+
+@pytest.mark.asyncio
+async def test_repeated_query_is_served_from_cache(store) -> None:
+    cache = SemanticQueryCache()
+    retriever = _retriever(store, cache)
+
+    first = await retriever.ainvoke("年假有几天")
+    second = await retriever.ainvoke("年假有几天")
+    await retriever.ainvoke("完全不同的问题")
+
+    assert store.searches == 2
+    assert [d.page_content for d in second] == [d.page_content for d in first]
+    assert cache.metrics()["hits"] == 1 and cache.metrics()["hit_rate"] == pytest.approx(1 / 3, abs=1e-3)
+
+
+@pytest.mark.asyncio
+async def test_search_kwargs_scope_entries(store) -> None:
+    cache = SemanticQueryCache()
+    await _retriever(store, cache).ainvoke("年假")
+    await _retriever(store, cache).ainvoke("年假", k=1)
+    assert store.searches == 2
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_invalidation(store) -> None:
+    cache = SemanticQueryCache()
+    expired = _retriever(store, cache, ttl=-1)
+    await expired.ainvoke("年假")
+    await expired.ainvoke("年假")
+    assert store.searches == 2 and cache.metrics()["expired"] == 1
+
+    retriever = _retriever(store, cache)
+    await retriever.ainvoke("报销")
+    cache.invalidate("elastic", "docs")
+    await retriever.ainvoke("报销")
+    assert store.searches == 4 and cache.metrics()["invalidations"] == 1
+
+    # 检索期间索引发生写入时，结果不写入缓存
+    generation = cache.generation(("elastic", "docs"))
+    cache.invalidate("elastic", "docs")
+    cache.put(
+        ("elastic", "docs"), "v", "q", np.ones(16), [], generation=generation, ttl=60, max_entries=8
+    )
+    assert cache.metrics()["entries"] == 0
@@ -0,0 +1,52 @@
+import pytest
+from langchain_core.documents import Document
+
+from shared import rerank as rerank_module
+from shared.configuration import BaseConfiguration
+from shared.rerank import RerankStats, rerank, rerank_documents
+
+
+class _OverlapReranker:
+    """按段落中出现的查询字符数打分。"""
+
+    def __init__(self) -> None:
+        self.batches: list[int] = []
+
+    def score(self, query, passages):
+        self.batches.append(len(passages))
+        return [float(sum(ch in passage for ch in query)) for passage in passages]
+
+
+def _docs(*texts: str) -> list[Document]:
+    return [Document(page_content=t, metadata={"uuid": str(i)}) for i, t in enumerate(texts)]
+
+
+@pytest.mark.asyncio
+async def test_rerank_keeps_top_n_in_batches_and_reports_latency() -> None:
+    reranker = _OverlapReranker()
+    stats = RerankStats()
+    docs = _docs("无关", "年假", "年假天数", "天气", "请假")
+
+    kept = await rerank("年假天数", docs, reranker, top_n=2, batch_size=2, stats=stats)
+
+    assert [d.page_content for d in kept] == ["年假天数", "年假"]
+    assert kept[0].metadata["rerank_score"] == 4.0
+    assert "rerank_score" not in docs[2].metadata
+    assert reranker.batches == [2, 2, 1]
+    assert stats.as_dict()["candidates"] == 5 and stats.as_dict()["batches"] == 3
+
+
+@pytest.mark.asyncio
+async def test_rerank_documents_is_noop_without_model(monkeypatch) -> None:
+    docs = _docs("a", "b")
+    assert await rerank_documents("a", docs, BaseConfiguration()) is docs
+
+    monkeypatch.setattr(rerank_module, "make_reranker", lambda model: _OverlapReranker())
+    configuration = BaseConfiguration(rerank_model="fake/model", rerank_top_n=1)
+    kept = await rerank_documents("b", docs, configuration)
+    assert [d.page_content for d in kept] == ["b"]
+
+
+def test_make_reranker_rejects_unknown_provider() -> None:
+    with pytest.raises(ValueError):
+        rerank_module.make_reranker("unknown/model")
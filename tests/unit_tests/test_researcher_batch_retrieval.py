@@ -0,0 +1,133 @@
+import importlib
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from shared.multi_query import _msearch_elasticsearch
+
+sub_graph_module = importlib.import_module("researcher_agent.sub_graph")
+
+
+class _FakeStrategy:
+    def es_query(self, *, query, query_vector, text_field, vector_field, k, num_candidates, filter):
+        return {
+            "knn": {
+                "field": vector_field,
+                "query_vector": query_vector,
+                "k": k,
+                "num_candidates": num_candidates,
+                "filter": filter,
+            }
+        }
+
+
+class _FakeClient:
+    def __init__(self) -> None:
+        self.requests = []
+
+    def msearch(self, searches):
+        self.requests.append(searches)
+        return {
+            "responses": [
+                {
+                    "hits": {
+                        "hits": [
+                            {
+                                "_id": f"id-{i}",
+                                "_source": {"text": f"doc for {body['knn']['query_vector']}", "metadata": {"i": i}},
+                            }
+                        ]
+                    }
+                }
+                for i, body in enumerate(searches[1::2])
+            ]
+        }
+
+
+def test_msearch_sends_one_request_and_scatters_results() -> None:
+    client = _FakeClient()
+    vectorstore = SimpleNamespace(
+        _store=SimpleNamespace(
+            retrieval_strategy=_FakeStrategy(),
+            text_field="text",
+            vector_field="vector",
+            index="docs",
+            client=client,
+        )
+    )
+
+    results = _msearch_elasticsearch(
+        vectorstore, ["q1", "q2", "q3"], [[1.0], [2.0], [3.0]], {"k": 2, "filter": [{"term": {"a": 1}}]}
+    )
+
+    assert len(client.requests) == 1
+    searches = client.requests[0]
+    assert searches[0::2] == [{"index": "docs"}] * 3
+    assert all(body["size"] == 2 and body["knn"]["filter"] for body in searches[1::2])
+    assert [r[0].page_content for r in results] == ["doc for [1.0]", "doc for [2.0]", "doc for [3.0]"]
+    assert [r[0].metadata["i"] for r in results] == [0, 1, 2]
+    assert [r[0].id for r in results] == ["id-0", "id-1", "id-2"]
+
+
+class _CountingEmbedding(DeterministicFakeEmbedding):
+    batch_calls: int = 0
+
+    def embed_documents(self, texts):
+        self.batch_calls += 1
+        return super().embed_documents(texts)
+
+
+class _FakeStructuredModel:
+    async def ainvoke(self, *args, **kwargs):
+        return {"queries": ["年假", "报销", "加班"]}
+
+
+class _FakeChatModel:
+    def with_structured_output(self, schema):
+        return _FakeStructuredModel()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("provider, batched", [("elastic", True), ("pinecone", False)])
+async def test_researcher_routes_elastic_queries_to_batch_node(monkeypatch, provider, batched) -> None:
+    store = InMemoryVectorStore(_CountingEmbedding(size=16))
+    store.add_texts(["年假规定", "报销流程", "加班制度"])
+    store.embedding.batch_calls = 0
+    opened = []
+
+    @contextmanager
+    def fake_make_retriever(config):
+        opened.append(1)
+        yield store.as_retriever(search_kwargs={"k": 1})
+
+    monkeypatch.setattr(sub_graph_module, "load_chat_model", lambda _: _FakeChatModel())
+    monkeypatch.setattr(sub_graph_module.retrieval, "make_retriever", fake_make_retriever)
+
+    result = await sub_graph_module.graph.ainvoke(
+        {"question": "公司制度"}, {"configurable": {"retriever_provider": provider}}
+    )
+
+    assert result["documents"]
+    assert len(opened) == (1 if batched else 3)
+    assert store.embedding.batch_calls == (1 if batched else 0)
+
+
+class _RepeatingQueryModel:
+    async def ainvoke(self, *args, **kwargs):
+        return {"queries": ["年假有几天?", "病假怎么请"]}
+
+
+@pytest.mark.asyncio
+async def test_generate_queries_drops_queries_covered_by_speculative_retrieval(monkeypatch) -> None:
+    model = SimpleNamespace(with_structured_output=lambda schema: _RepeatingQueryModel())
+    monkeypatch.setattr(sub_graph_module, "load_chat_model", lambda _: model)
+    state = sub_graph_module.ResearcherState(question="年假", covered_queries=["年假有几天"])
+
+    update = await sub_graph_module.generate_queries(state, config={})
+    assert update == {"queries": ["病假怎么请"]}
+
+    state.queries = []
+    assert sub_graph_module.retrieve_in_parallel(state, config={}) == sub_graph_module.END
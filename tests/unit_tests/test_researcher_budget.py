@@ -0,0 +1,58 @@
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from researcher_agent.budget import admit_documents
+from researcher_agent.configuration import ResearcherConfiguration
+from shared import retrieval
+from shared.mmr import vector_cache
+
+VECTORS = {
+    "年假规定": [1.0, 0.0],
+    " 年假规定\n": [0.0, 1.0],
+    "年假规定如下": [1.0, 0.05],
+    "报销流程": [0.0, 1.0],
+    "加班制度说明": [0.7, 0.7],
+}
+
+
+class _TableEmbedding(Embeddings):
+    def embed_documents(self, texts):
+        return [VECTORS[t] for t in texts]
+
+    def embed_query(self, text):
+        return VECTORS[text]
+
+
+def _doc(text: str, uuid: str) -> Document:
+    return Document(page_content=text, metadata={"uuid": uuid})
+
+
+@pytest.mark.asyncio
+async def test_budget_drops_duplicates_near_duplicates_and_overflow(monkeypatch) -> None:
+    vector_cache.clear()
+    monkeypatch.setattr(retrieval, "make_text_encoder", lambda model: _TableEmbedding())
+    kept = [_doc("年假规定", "a")]
+    steps = [
+        (1, "加班", [_doc("加班制度说明", "e")]),
+        (0, "年假", [_doc("年假规定", "a"), _doc(" 年假规定\n", "b"), _doc("年假规定如下", "c"), _doc("报销流程", "d")]),
+    ]
+    configuration = ResearcherConfiguration(min_document_novelty=0.1, max_context_tokens=9)
+
+    admitted, reports = await admit_documents(kept, steps, configuration)
+
+    assert [d.metadata["uuid"] for d in admitted] == ["d"]
+    first, second = (r.as_dict() for r in reports)
+    assert (first["step_index"], first["retrieved"], first["kept"]) == (0, 4, 1)
+    assert (first["duplicates"], first["low_novelty"], first["over_budget"]) == (2, 1, 0)
+    assert first["new_rate"] == 0.5 and 0 < first["novelty"] < 0.5
+    assert (second["kept"], second["over_budget"]) == (0, 1)
+
+
+@pytest.mark.asyncio
+async def test_budget_without_novelty_skips_embeddings(monkeypatch) -> None:
+    monkeypatch.setattr(retrieval, "make_text_encoder", lambda model: pytest.fail("embedded"))
+    admitted, [report] = await admit_documents(
+        [], [(0, "年假", [_doc("年假规定", "a"), _doc("报销流程", "b")])], ResearcherConfiguration()
+    )
+    assert len(admitted) == 2 and report.novelty == 1.0 and report.tokens == 8
@@ -0,0 +1,288 @@
+import asyncio
+import importlib
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage, HumanMessage
+
+from shared import retrieval
+from shared.mmr import vector_cache
+
+graph_module = importlib.import_module("researcher_agent.graph")
+
+PLAN = [
+    {"step": "A", "depends_on": []},
+    {"step": "B", "depends_on": []},
+    {"step": "C", "depends_on": [1, 2]},
+    {"step": "D", "depends_on": [1, 4]},
+]
+
+
+def test_parse_plan_keeps_only_earlier_dependencies() -> None:
+    steps, dependencies = graph_module._parse_plan(PLAN + ["E"])
+    assert steps == ["A", "B", "C", "D", "E"]
+    assert dependencies == [[], [], [0, 1], [0], []]
+
+
+class _FakeResearcher:
+    def __init__(self) -> None:
+        self.running = 0
+        self.max_running = 0
+        self.events: list[str] = []
+
+    async def ainvoke(self, state, config=None):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        self.events.append(f"start {state['question']}")
+        await asyncio.sleep(0.01)
+        self.events.append(f"end {state['question']}")
+        self.running -= 1
+        return {"documents": [Document(page_content=state["question"])]}
+
+
+class _FakeModel:
+    def with_structured_output(self, schema):
+        return self
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        if messages[0]["content"] == "plan":
+            return {"steps": PLAN}
+        return AIMessage(content="answer")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("cap, expected_parallel", [(3, 2), (1, 1)])
+async def test_steps_run_in_waves_respecting_dependencies(monkeypatch, cap, expected_parallel) -> None:
+    researcher = _FakeResearcher()
+    monkeypatch.setattr(graph_module, "researcher_graph", researcher)
+    monkeypatch.setattr(graph_module, "load_chat_model", lambda _: _FakeModel())
+
+    result = await graph_module.graph.ainvoke(
+        {"messages": [HumanMessage(content="问题")]},
+        {"configurable": {"max_parallel_steps": cap, "research_plan_system_prompt": "plan"}},
+    )
+
+    assert result["completed_steps"] == [0, 1, 2, 3]
+    assert {d.page_content for d in result["documents"]} == {"A", "B", "C", "D"}
+    assert researcher.max_running == expected_parallel
+    events = researcher.events
+    assert events.index("start C") > max(events.index("end A"), events.index("end B"))
+    assert events.index("start D") > events.index("end A")
+
+
+class _LinearPlanModel(_FakeModel):
+    async def ainvoke(self, messages, *args, **kwargs):
+        if messages[0]["content"] == "plan":
+            steps = range(1, graph_module.MAX_PLAN_STEPS + 3)
+            return {"steps": [{"step": f"S{i}", "depends_on": [i - 1] if i > 1 else []} for i in steps]}
+        return AIMessage(content="answer")
+
+
+@pytest.mark.asyncio
+async def test_longest_linear_plan_fits_the_recursion_limit(monkeypatch) -> None:
+    researcher = _FakeResearcher()
+    monkeypatch.setattr(graph_module, "researcher_graph", researcher)
+    monkeypatch.setattr(graph_module, "load_chat_model", lambda _: _LinearPlanModel())
+
+    result = await graph_module.graph.ainvoke(
+        {"messages": [HumanMessage(content="问题")]},
+        {"configurable": {"research_plan_system_prompt": "plan"}},
+    )
+
+    assert graph_module.graph.config["recursion_limit"] == graph_module.RECURSION_LIMIT
+    assert result["completed_steps"] == list(range(graph_module.MAX_PLAN_STEPS))
+
+
+class _RecordingModel(_FakeModel):
+    def __init__(self) -> None:
+        self.prompts: list[str] = []
+
+    async def ainvoke(self, messages, *args, **kwargs):
+        content = messages[0]["content"]
+        self.prompts.append(content)
+        if content == "plan":
+            return {"steps": PLAN}
+        if content.startswith("总结"):
+            return AIMessage(content=f"摘要-{content.split()[1]}")
+        return AIMessage(content="answer")
+
+
+@pytest.mark.asyncio
+async def test_progressive_mode_streams_step_summaries_and_merges_them(monkeypatch) -> None:
+    model = _RecordingModel()
+    monkeypatch.setattr(graph_module, "researcher_graph", _FakeResearcher())
+    monkeypatch.setattr(graph_module, "load_chat_model", lambda _: model)
+    config = {
+        "configurable": {
+            "progressive_report": True,
+            "research_plan_system_prompt": "plan",
+            "partial_synthesis_system_prompt": "总结 {step} {context}",
+            "response_system_prompt": "回答 {context}",
+        }
+    }
+
+    events = [
+        chunk["researcher_step"]
+        async for chunk in graph_module.graph.astream(
+            {"messages": [HumanMessage(content="问题")]}, config, stream_mode="custom"
+        )
+    ]
+
+    assert sorted(e["step"] for e in events) == ["A", "B", "C", "D"]
+    assert events[0]["summary"] == f"摘要-{events[0]['step']}"
+    final_prompt = model.prompts[-1]
+    assert final_prompt.startswith("回答") and "摘要-D" in final_prompt
+    assert "<document>\nA\n</document>" not in final_prompt
+
+
+class _SameDocResearcher(_FakeResearcher):
+    async def ainvoke(self, state, config=None):
+        self.events.append(state["question"])
+        return {"documents": [Document(page_content="同一文档")]}
+
+
+class _QuestionEmbedding(Embeddings):
+    def __init__(self, question_vector):
+        self.question_vector = question_vector
+
+    def embed_documents(self, texts):
+        return [[1.0, 0.0] for _ in texts]
+
+    def embed_query(self, text):
+        return self.question_vector
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "question_vector, expected_runs, expected_skipped",
+    [([1.0, 0.0], ["A", "B"], [2, 3]), ([0.0, 1.0], ["A", "B", "C; D"], [3])],
+)
+async def test_early_termination_skips_or_merges_saturated_steps(
+    monkeypatch, question_vector, expected_runs, expected_skipped
+) -> None:
+    vector_cache.clear()
+    researcher = _SameDocResearcher()
+    monkeypatch.setattr(graph_module, "researcher_graph", researcher)
+    monkeypatch.setattr(graph_module, "load_chat_model", lambda _: _FakeModel())
+    monkeypatch.setattr(retrieval, "make_text_encoder", lambda _: _QuestionEmbedding(question_vector))
+
+    result = await graph_module.graph.ainvoke(
+        {"messages": [HumanMessage(content="问题")]},
+        {
+            "configurable": {
+                "early_termination": True,
+                "max_parallel_steps": 1,
+                "research_plan_system_prompt": "plan",
+            }
+        },
+    )
+
+    assert researcher.events == expected_runs
+    assert [s["step_index"] for s in result["skipped_steps"]] == expected_skipped
+    assert all(s["reason"].startswith("saturated") for s in result["skipped_steps"])
+    assert len(result["documents"]) == 1
+
+
+class _EmptyResearcher(_FakeResearcher):
+    async def ainvoke(self, state, config=None):
+        self.events.append(state["question"])
+        return {"documents": []}
+
+
+@pytest.mark.asyncio
+async def test_early_termination_continues_after_waves_without_documents(monkeypatch) -> None:
+    researcher = _EmptyResearcher()
+    monkeypatch.setattr(graph_module, "researcher_graph", researcher)
+    monkeypatch.setattr(graph_module, "load_chat_model", lambda _: _FakeModel())
+
+    result = await graph_module.graph.ainvoke(
+        {"messages": [HumanMessage(content="问题")]},
+        {
+            "configurable": {
+                "early_termination": True,
+                "max_parallel_steps": 1,
+                "research_plan_system_prompt": "plan",
+            }
+        },
+    )
+
+    assert researcher.events == ["A", "B", "C", "D"]
+    assert result["skipped_steps"] == []
+
+
+@pytest.mark.asyncio
+async def test_speculative_retrieval_overlaps_planning_and_seeds_documents(monkeypatch) -> None:
+    events: list[str] = []
+    researcher = _FakeResearcher()
+
+    class _SlowPlanModel(_FakeModel):
+        async def ainvoke(self, messages, *args, **kwargs):
+            if messages[0]["content"] == "plan":
+                events.append("plan start")
+                await asyncio.sleep(0.02)
+                events.append("plan end")
+            return await super().ainvoke(messages)
+
+    async def fake_retrieve_documents(state, *, config):
+        events.append("speculative start")
+        await asyncio.sleep(0.02)
+        events.append("speculative end")
+        return {"documents": [Document(page_content=f"预取 {state.query}")]}
+
+    monkeypatch.setattr(graph_module, "researcher_graph", researcher)
+    monkeypatch.setattr(graph_module, "load_chat_model", lambda _: _SlowPlanModel())
+    monkeypatch.setattr(graph_module, "retrieve_documents", fake_retrieve_documents)
+
+    result = await graph_module.graph.ainvoke(
+        {"messages": [HumanMessage(content="年假有几天")]},
+        {"configurable": {"speculative_retrieval": True, "research_plan_system_prompt": "plan"}},
+    )
+
+    assert events.index("speculative start") < events.index("plan end")
+    assert events.index("plan start") < events.index("speculative end")
+    assert result["documents"][0].page_content == "预取 年假有几天"
+    assert result["document_budget"][0]["step_index"] == -1
+    assert result["speculative_documents"] == []
+
+
+class _CoveredStepResearcher(_FakeResearcher):
+    async def ainvoke(self, state, config=None):
+        result = await super().ainvoke(state, config)
+        return {"documents": []} if state["question"] == "A" else result
+
+
+@pytest.mark.asyncio
+async def test_progressive_mode_keeps_speculative_documents(monkeypatch) -> None:
+    model = _RecordingModel()
+
+    async def fake_retrieve_documents(state, *, config):
+        return {"documents": [Document(page_content=f"预取 {state.query}")]}
+
+    monkeypatch.setattr(graph_module, "researcher_graph", _CoveredStepResearcher())
+    monkeypatch.setattr(graph_module, "load_chat_model", lambda _: model)
+    monkeypatch.setattr(graph_module, "retrieve_documents", fake_retrieve_documents)
+    config = {
+        "configurable": {
+            "progressive_report": True,
+            "speculative_retrieval": True,
+            "research_plan_system_prompt": "plan",
+            "partial_synthesis_system_prompt": "总结 {step} {context}",
+            "response_system_prompt": "回答 {context}",
+        }
+    }
+
+    events = [
+        chunk["researcher_step"]
+        async for chunk in graph_module.graph.astream(
+            {"messages": [HumanMessage(content="年假有几天")]}, config, stream_mode="custom"
+        )
+    ]
+
+    assert sorted((e["step_index"], e["summary"]) for e in events)[:2] == [
+        (-1, "摘要-年假有几天"),
+        (1, "摘要-B"),
+    ]
+    assert all(e["step"] != "A" for e in events)
+    final_prompt = model.prompts[-1]
+    assert "摘要-年假有几天" in final_prompt and "摘要-D" in final_prompt
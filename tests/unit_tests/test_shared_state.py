@@ -0,0 +1,42 @@
+import pickle
+
+from langchain_core.documents import Document
+
+from shared.state import DocumentList, reduce_docs
+
+
+def test_reduce_docs_dedupes_against_existing_and_within_batch() -> None:
+    docs = reduce_docs([], ["a", "b"])
+    docs = reduce_docs(docs, ["b", "c", "c", {"page_content": "a"}])
+
+    assert isinstance(docs, DocumentList)
+    assert [d.page_content for d in docs] == ["a", "b", "c"]
+    assert reduce_docs(docs, "delete") == []
+
+
+def test_reduce_docs_does_not_mutate_inputs() -> None:
+    original = Document(page_content="无 uuid", metadata={"source": "x"})
+    first = reduce_docs([], ["a"])
+    second = reduce_docs(first, [original])
+
+    assert "uuid" not in original.metadata
+    assert second[1].metadata["source"] == "x" and second[1].metadata["uuid"]
+    assert len(first) == 1
+
+
+def test_forked_lists_share_index_without_false_hits() -> None:
+    base = reduce_docs([], ["a"])
+    left = reduce_docs(base, ["b"])
+    right = reduce_docs(base, ["c"])
+
+    # right 从非最新的 base 分叉，拥有独立的索引，两个分支互不影响
+    assert [d.page_content for d in reduce_docs(right, ["b"])] == ["a", "c", "b"]
+    assert [d.page_content for d in reduce_docs(left, ["b"])] == ["a", "b"]
+
+
+def test_plain_list_from_checkpoint_is_indexed_once() -> None:
+    restored = list(pickle.loads(pickle.dumps(reduce_docs([], ["a", "b"]))))
+    docs = reduce_docs(restored, ["a", "d"])
+
+    assert isinstance(docs, DocumentList)
+    assert [d.page_content for d in docs] == ["a", "b", "d"]
@@ -0,0 +1,40 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from shared.utils import load_document, supported_extensions
+
+
+def test_importing_utils_does_not_import_document_loaders() -> None:
+    code = (
+        "import sys, shared.utils;"
+        "print('langchain_community.document_loaders' in sys.modules)"
+    )
+    src_dir = os.path.join(os.path.dirname(__file__), "..", "..", "src")
+    output = subprocess.run(
+        [sys.executable, "-c", code],
+        env={**os.environ, "PYTHONPATH": src_dir},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    assert output.strip() == "False"
+
+
+def test_load_document_dispatches_on_extension(tmp_path) -> None:
+    path = tmp_path / "note.TXT"
+    path.write_text("你好", encoding="utf-8")
+
+    docs = load_document(str(path))
+
+    assert docs[0].page_content == "你好"
+    assert {".pdf", ".docx", ".xlsx", ".pptx", ".csv", ".md", ".png"} <= set(
+        supported_extensions()
+    )
+
+
+def test_load_document_rejects_unknown_extension(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        load_document(str(tmp_path / "archive.zip"))